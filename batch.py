@@ -0,0 +1,167 @@
+"""Validate and cost many saved plans without the browser.
+
+Input is a directory of ``.json`` plans or a JSONL file, one
+``mealsync_state`` (or packed payload, or ``{"user", "state"}`` wrapper)
+per line.  Writes one row per plan with the summary totals, their budget
+differences and the day overruns; ``--overruns`` also writes one row per
+day over its limit.  The output format follows the extension (``.csv``
+or ``.parquet``); ``-`` writes CSV to stdout.  Exits 1 if any plan
+was invalid.
+
+``--simulate`` instead prices every valid plan under each scenario of a
+JSON file (``{"name": {"item_id": new_price, ...}, ...}``) and writes one
+JSON report per scenario: users over each budget and day limit and the
+spend distribution (see :mod:`mealsync.simulate`).
+
+    python batch.py plans.jsonl --out month-end.parquet --overruns days.csv
+    python batch.py exports/ --out - --workers 8 --chunk-size 2000
+    python batch.py plans.jsonl --simulate scenarios.json --out what-if.json
+
+``--archive YYYY-MM`` stores the month's spend per user, week and meal
+type in the history store (``--history``) and updates its rollups, which
+the dashboard page reads.
+
+    python batch.py mealsync.db --archive 2026-09 --history history/
+
+``--bulk OPS`` applies a JSON list of bulk operations (see
+:mod:`mealsync.bulk`) to the plans in a plan store, one journal entry per
+user; ``--user`` limits it to some users.  The app can keep running:
+it reloads the edited plans it holds and sends them to their open pages
+on the pages' next rerun.  Users without a plan (or with nothing to
+change) are listed as skipped; it exits 1 only if operations did not fit
+some plan.
+
+    python batch.py mealsync.db --bulk ops.json --user alice --user bob
+
+``--group NAME`` adds the ``--user`` ids (``id=Display name`` to name
+them) to a group of the plan store and prints the group's totals, which
+the group page shows live (see :mod:`mealsync.group`).
+
+    python batch.py mealsync.db --group mess-a --user alice="Alice K" --user bob
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from mealsync import bulk, group, history, report, simulate
+from mealsync.store import PlanStore
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="directory of .json plans or a JSONL file")
+    parser.add_argument("--out", default="-", help="output .csv or .parquet file, - for stdout")
+    parser.add_argument("--overruns", help="also write per-day overruns to this .csv or .parquet file")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--simulate", metavar="SCENARIOS", help="JSON file of price scenarios to simulate")
+    parser.add_argument("--archive", metavar="YYYY-MM", help="add the plans to the history as this month")
+    parser.add_argument("--history", default=history.HISTORY_DIR, help="history store directory")
+    parser.add_argument("--bulk", metavar="OPS",
+                        help="JSON list of bulk operations to apply to a plan store; open pages get "
+                             "the edited plan on their next rerun")
+    parser.add_argument("--user", action="append", help="with --bulk: only this user; with --group: add them (repeatable)")
+    parser.add_argument("--group", help="add the --user ids to this group of a plan store and print its totals")
+    args = parser.parse_args(argv)
+    if args.group:
+        return run_group(args)
+    if args.bulk:
+        return run_bulk(args)
+    if args.simulate:
+        return run_simulation(args)
+    if args.archive:
+        return run_archive(args)
+
+    t0 = time.perf_counter()
+    sink = report.open_sink("/dev/stdout" if args.out == "-" else args.out)
+    days = report.open_sink(args.overruns, report.OVERRUN_COLUMNS) if args.overruns else None
+    plans = invalid = overruns = 0
+    try:
+        for rows, over in report.run(args.source, args.chunk_size, args.workers):
+            sink.write(rows)
+            if days:
+                days.write(over)
+            plans += len(rows)
+            invalid += sum(not row["valid"] for row in rows)
+            overruns += len(over)
+    finally:
+        sink.close()
+        if days:
+            days.close()
+    summary = {"plans": plans, "invalid": invalid, "overrun_days": overruns,
+               "seconds": round(time.perf_counter() - t0, 3)}
+    print(json.dumps(summary), file=sys.stderr)
+    return 1 if invalid else 0
+
+
+def run_simulation(args):
+    with open(args.simulate, encoding="utf-8") as f:
+        scenarios = json.load(f)
+    t0 = time.perf_counter()
+    usage = simulate.Usage.concat(
+        report.run(args.source, args.chunk_size, args.workers, work=simulate.usage_chunk)
+    )
+    loaded = time.perf_counter()
+    results = simulate.simulate(usage, scenarios)
+    text = json.dumps(results, indent=2)
+    if args.out == "-":
+        print(text)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    summary = {"plans": len(usage), "scenarios": len(results),
+               "load_seconds": round(loaded - t0, 3), "simulate_seconds": round(time.perf_counter() - loaded, 3)}
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+
+def run_archive(args):
+    t0 = time.perf_counter()
+    store = history.HistoryStore(args.history)
+    store.append_month(args.archive, report.run(args.source, args.chunk_size, args.workers, work=history.spend_chunk))
+    stats = store.summary()["stats"]
+    month = next(s for s in stats if s["month"] == args.archive)
+    print(json.dumps({**month, "seconds": round(time.perf_counter() - t0, 3)}), file=sys.stderr)
+    return 0
+
+
+def run_bulk(args):
+    with open(args.bulk, encoding="utf-8") as f:
+        ops = json.load(f)
+    if isinstance(ops, dict):
+        ops = [ops]
+    t0 = time.perf_counter()
+    store = PlanStore(args.source)
+    try:
+        changed, skipped, errors = bulk.apply_to_store(store, ops, args.user)
+    finally:
+        store.close()
+    for user, reason in sorted(skipped.items()):
+        print(f"{user}: skipped, {reason}", file=sys.stderr)
+    for user, message in sorted(errors.items()):
+        print(f"{user}: {message}", file=sys.stderr)
+    print(json.dumps({"changed": changed, "skipped": len(skipped), "errors": len(errors),
+                      "seconds": round(time.perf_counter() - t0, 3)}), file=sys.stderr)
+    return 1 if errors else 0
+
+
+def run_group(args):
+    store = PlanStore(args.source)
+    try:
+        members = [tuple(u.split("=", 1)) if "=" in u else u for u in args.user or ()]
+        if members:
+            store.add_members(args.group, members)
+        totals = group.GroupTotals(store, args.group)
+        try:
+            print(json.dumps({"group": args.group, **totals.summary()}))
+        finally:
+            totals.close()
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
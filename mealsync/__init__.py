@@ -0,0 +1 @@
+"""Server-side helpers for the MealSync Streamlit app."""
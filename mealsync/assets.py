@@ -0,0 +1,285 @@
+"""Startup build of the frontend assets.
+
+``build()`` turns ``frontend/`` into a directory the component is served
+from:
+
+* JS modules and CSS are minified and renamed ``<name>.<hash>.<ext>``
+  (imports rewritten to match), so a URL only ever names one version of
+  a file and can be cached for good;
+* ``index.html`` is minified and preloads every module but the worker
+  entry points, so the browser fetches the whole import graph in one
+  round trip instead of a waterfall;
+* every text asset gets ``.gz`` and, when the ``brotli`` package is
+  installed, ``.br`` siblings for a fronting proxy (``gzip_static`` /
+  ``brotli_static``; set ``Cache-Control: max-age=31536000, immutable`` on
+  the hashed names).  Streamlit itself compresses on the fly.
+
+The output directory is named after a hash of the sources and this
+module, so the build runs once per change, not once per process.  Older
+builds stay for pages and processes still on them: a process marks the
+build it serves as used (its mtime), and only builds beyond the
+``KEEP_BUILDS`` newest that went unused for ``BUILD_GRACE`` seconds are
+removed.
+``MEALSYNC_DEV_ASSETS=1`` serves ``frontend/`` as is.
+"""
+
+import functools
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional: .br files are skipped without it
+    brotli = None
+
+FRONTEND_DIR = Path(__file__).parent / "frontend"
+BUILD_ROOT = Path(os.environ.get("MEALSYNC_ASSET_DIR", Path(__file__).parent / "_build"))
+DEV = os.environ.get("MEALSYNC_DEV_ASSETS") == "1"
+
+# Development-only pages that are not shipped.
+EXCLUDE = {"bench.html", "bench.js"}
+COMPRESSIBLE = {".js", ".css", ".html", ".json", ".svg"}
+GZIP_LEVEL = 9
+KEEP_BUILDS = 3
+BUILD_GRACE = 7 * 24 * 3600
+
+# Static and dynamic imports, and new URL('./x.js', import.meta.url) for workers.
+_IMPORT = re.compile(r"""(\bfrom\s*|\bimport\s*\(?\s*|\bnew\s+URL\s*\(\s*)(['"])\./([\w.-]+\.js)\2""")
+_WORKER_URL = re.compile(r"""\bnew\s+Worker\s*\(\s*new\s+URL\s*\(\s*(['"])\./([\w.-]+\.js)\1""")
+_REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_AFTER_WORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw"}
+_WORD = re.compile(r"[\w$]")
+
+
+def _skip_string(src, i):
+    """Index just past the string or template literal starting at ``i``."""
+    quote, i = src[i], i + 1
+    while i < len(src):
+        c = src[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == quote:
+            return i + 1
+        if quote == "`" and src.startswith("${", i):
+            i = _skip_braces(src, i + 2)
+            continue
+        i += 1
+    return i
+
+
+def _skip_braces(src, i):
+    """Index just past the ``}`` closing a template substitution."""
+    depth = 1
+    while i < len(src) and depth:
+        c = src[i]
+        if c in "'\"`":
+            i = _skip_string(src, i)
+            continue
+        depth += (c == "{") - (c == "}")
+        i += 1
+    return i
+
+
+def _skip_regex(src, i):
+    i += 1
+    in_class = False
+    while i < len(src):
+        c = src[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            i += 1
+            break
+        i += 1
+    while i < len(src) and _WORD.match(src[i]):
+        i += 1
+    return i
+
+
+def minify_js(src):
+    """Drop comments and indentation; newlines are kept so ASI still holds."""
+    out = []
+    last = ""
+    i, n = 0, len(src)
+    while i < n:
+        c = src[i]
+        nxt = src[i + 1] if i + 1 < n else ""
+        if c == "/" and nxt == "*":
+            end = src.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+        elif c == "/" and nxt == "/":
+            end = src.find("\n", i)
+            i = n if end < 0 else end
+        elif c in "'\"`":
+            j = _skip_string(src, i)
+            out.append(src[i:j])
+            last, i = c, j
+        elif c == "/" and (not last or last in _REGEX_AFTER or _last_word(out) in _REGEX_AFTER_WORDS):
+            j = _skip_regex(src, i)
+            out.append(src[i:j])
+            last, i = "/", j
+        elif c.isspace():
+            j = i
+            while j < n and src[j].isspace():
+                j += 1
+            newline = "\n" in src[i:j]
+            ahead = src[j] if j < n else ""
+            if newline and last and last != "\n":
+                out.append("\n")
+                last = "\n"
+            elif not newline and last and ahead and (
+                (_WORD.match(last) and _WORD.match(ahead)) or (last in "+-" and ahead in "+-")
+            ):
+                out.append(" ")
+            i = j
+        else:
+            out.append(c)
+            last, i = c, i + 1
+    return "".join(out).strip() + "\n"
+
+
+def _last_word(out):
+    m = re.search(r"[\w$]+$", "".join(out[-12:]))
+    return m.group(0) if m else ""
+
+
+def minify_css(src):
+    src = re.sub(r"/\*.*?\*/", "", src, flags=re.S)
+    src = re.sub(r"\s+", " ", src)
+    src = re.sub(r"\s*([{};,>])\s*", r"\1", src)
+    src = re.sub(r":\s+", ":", src)
+    return src.replace(";}", "}").strip() + "\n"
+
+
+def minify_html(src):
+    src = re.sub(r"<!--.*?-->", "", src, flags=re.S)
+    return re.sub(r">\s+<", "><", src).strip() + "\n"
+
+
+def source_hash(src=FRONTEND_DIR):
+    """Hash of every shipped source file plus this builder."""
+    h = hashlib.sha256(Path(__file__).read_bytes())
+    for path in sorted(src.iterdir()):
+        if path.is_file() and path.name not in EXCLUDE:
+            h.update(path.name.encode() + b"\0" + path.read_bytes() + b"\0")
+    return h.hexdigest()[:16]
+
+
+def _hashed_name(name, data):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+
+def _write(out, name, data, manifest):
+    (out / name).write_bytes(data)
+    entry = {"bytes": len(data)}
+    if os.path.splitext(name)[1] in COMPRESSIBLE:
+        gz = gzip.compress(data, GZIP_LEVEL, mtime=0)
+        (out / f"{name}.gz").write_bytes(gz)
+        entry["gzip"] = len(gz)
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            (out / f"{name}.br").write_bytes(br)
+            entry["brotli"] = len(br)
+    manifest[name] = entry
+
+
+def _build_into(src, out):
+    manifest, names = {}, {}
+    modules = {p.name: p.read_text("utf-8") for p in sorted(src.glob("*.js")) if p.name not in EXCLUDE}
+    minified = {name: minify_js(text) for name, text in modules.items()}
+
+    # A module's hashed name depends on the names it imports, so resolve
+    # leaves first.
+    def resolve(name, seen=()):
+        if name in names:
+            return names[name]
+        if name in seen:
+            raise ValueError(f"import cycle through {name}")
+        body = _IMPORT.sub(
+            lambda m: f"{m.group(1)}{m.group(2)}./{resolve(m.group(3), seen + (name,))}{m.group(2)}",
+            minified[name],
+        )
+        data = body.encode("utf-8")
+        names[name] = _hashed_name(name, data)
+        _write(out, names[name], data, manifest)
+        return names[name]
+
+    for name in minified:
+        resolve(name)
+
+    for path in sorted(src.glob("*.css")):
+        data = minify_css(path.read_text("utf-8")).encode("utf-8")
+        names[path.name] = _hashed_name(path.name, data)
+        _write(out, names[path.name], data, manifest)
+
+    html = (src / "index.html").read_text("utf-8")
+    for name, hashed in names.items():
+        html = re.sub(rf'(\b(?:src|href)=")(?:\./)?{re.escape(name)}"', rf'\g<1>{hashed}"', html)
+    # Worker entry points run in their own realm; preloading them here is wasted.
+    workers = {m.group(2) for text in minified.values() for m in _WORKER_URL.finditer(text)}
+    preload = "".join(
+        f'<link rel="modulepreload" href="{h}">' for n, h in names.items() if n.endswith(".js") and n not in workers
+    )
+    html = html.replace("</head>", preload + "</head>", 1)
+    _write(out, "index.html", minify_html(html).encode("utf-8"), manifest)
+    (out / "manifest.json").write_text(json.dumps({"files": names, "sizes": manifest}, indent=2))
+
+
+@functools.lru_cache(maxsize=None)
+def build(src=FRONTEND_DIR, root=BUILD_ROOT):
+    """Directory to serve the component from, building it if needed."""
+    if DEV:
+        return src
+    src, root = Path(src), Path(root)
+    out = root / source_hash(src)
+    if (out / "manifest.json").exists():
+        os.utime(out)
+        return out
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=root))
+    try:
+        _build_into(src, tmp)
+        try:
+            tmp.rename(out)
+        except OSError:
+            if not (out / "manifest.json").exists():  # lost a race only if it's there
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    os.utime(out)
+    prune(root, out)
+    return out
+
+
+def prune(root=BUILD_ROOT, current=None, keep=KEEP_BUILDS, grace=BUILD_GRACE):
+    """Remove old builds: those beyond the ``keep`` most recently used that
+    no process used for ``grace`` seconds, never ``current``.  Leftover
+    temporary directories go after ``grace`` too."""
+    root = Path(root)
+    cutoff = time.time() - grace
+    used = {}
+    for path in root.iterdir():
+        try:
+            if path.is_dir():
+                used[path] = path.stat().st_mtime
+        except FileNotFoundError:  # another process pruned it first
+            pass
+    dirs = sorted(used, key=used.get, reverse=True)
+    builds = [p for p in dirs if not p.name.startswith(".tmp-")]
+    for old in builds[keep:] + [p for p in dirs if p.name.startswith(".tmp-")]:
+        if old != current and used[old] < cutoff:
+            shutil.rmtree(old, ignore_errors=True)
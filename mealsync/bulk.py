@@ -0,0 +1,262 @@
+"""Bulk plan edits: copy a week, fill a slot across weeks, clear a meal
+type, apply a template.
+
+Each operation returns one delta (see :mod:`mealsync.plan`), so it
+reaches the browser as a single patch: one store transaction, one
+persistence flush and one render.  ``frontend/bulk.js`` is the browser
+port; both take the same JSON operations::
+
+    {"op": "copy_week", "source": 1, "targets": [2, 3]}
+    {"op": "fill", "day": 0, "meal": "dinner", "item": "d-dosa", "weeks": null}
+    {"op": "clear", "meal": "breakfast", "weeks": [3]}
+    {"op": "template", "days": {"0": {"main": "lunch", "lunch": "l-biryani"}}}
+    {"op": "template", "default": 2, "weeks": [5, 6]}
+
+``weeks`` (and ``targets``) default to every week of the plan.  Main
+meals a bulk edit writes are flagged ``modified``, so the page does not
+put a default breakfast back over a deliberate ``skip``.
+
+Admins can push operations to many stored plans with :func:`apply_to_store`
+(``python batch.py mealsync.db --bulk ops.json``), from any process: the
+app notices the plans it holds were written elsewhere and sends each open
+session of those users the whole edited plan on its next rerun (see
+:mod:`mealsync.hub`).  Inside the app, :meth:`~mealsync.component.PlanSync.bulk`
+applies operations to the session's user as one patch, which the user's
+other sessions get as an ordinary edit.
+"""
+
+import copy
+
+from mealsync import catalog, plan
+
+MAINS = ("breakfast", "lunch")
+
+
+def _weeks(state, weeks):
+    n = plan.horizon(state)
+    if weeks is None:
+        return range(1, n + 1)
+    out = sorted({int(w) for w in weeks})
+    if out and not 1 <= out[0] <= out[-1] <= n:
+        raise ValueError(f"weeks must be within 1-{n}, got {out}")
+    return out
+
+
+def _main_type(state, week, day):
+    """Port of ``mainTypeFor()``."""
+    if day == catalog.SUNDAY:
+        return "lunch"
+    return state["dayChoice"].get(f"{week}-w{day}") or "breakfast"
+
+
+def _shown_week(state, week):
+    """Week ``week`` as its day cards show it, lazy defaults filled in
+    (what ``materializeDay()`` would write)."""
+    wk = dict(state["weeks"].get(str(week)) or {})
+    for d in range(7):
+        main = _main_type(state, week, d)
+        key = f"sel-{week}-{d}-{main}"
+        default = catalog.default_for(catalog.BREAKFAST_DEFAULTS, week, d) if main == "breakfast" else None
+        if key not in wk:
+            wk[key] = default or "skip"
+        elif default and wk[key] == "skip" and not state["modified"].get(key):
+            wk[key] = default
+        wk.setdefault(f"sel-{week}-{d}-dinner", "skip")
+        for meal in (main, "dinner"):
+            if wk[f"sel-{week}-{d}-{meal}"] == "custom":
+                wk.setdefault(f"price-{week}-{d}-{meal}", "0")
+    return wk
+
+
+def _rename(key, week):
+    kind, _, rest = key.split("-", 2)
+    return f"{kind}-{week}-{rest}"
+
+
+def _check_item(week, day, meal, item):
+    if meal not in catalog.MEAL_TYPES:
+        raise ValueError(f"unknown meal type {meal!r}")
+    if meal == "breakfast" and day == catalog.SUNDAY:
+        raise ValueError("Sunday has no breakfast")
+    if item in ("skip", "custom"):
+        return
+    if day == catalog.SUNDAY:
+        raise ValueError(f"Sunday only takes skip or custom, got {item!r}")
+    menu = catalog.current()
+    options = menu.breakfast_options(week, day) if meal == "breakfast" else menu.menu[meal]
+    if not any(o["id"] == item for o in options):
+        raise ValueError(f"{item!r} is not a {meal} option in week {week} on {catalog.WEEK_DAYS[day]}")
+
+
+def _offered(week, day, item):
+    if item in ("skip", "custom"):
+        return day != catalog.SUNDAY
+    return any(o["id"] == item for o in catalog.current().breakfast_options(week, day))
+
+
+def _set_slot(delta, week, day, meal, item, price=None):
+    """Select ``item`` for one slot; a main meal also becomes the day's main."""
+    _check_item(week, day, meal, item)
+    wk = delta["weeks"].setdefault(str(week), {})
+    key = f"sel-{week}-{day}-{meal}"
+    wk[key] = item
+    if item == "custom":
+        wk[f"price-{week}-{day}-{meal}"] = "0" if price is None else str(price)
+    if meal in MAINS:
+        if day != catalog.SUNDAY:
+            delta["dayChoice"][f"{week}-w{day}"] = meal
+        delta["modified"][key] = True
+
+
+def _empty():
+    return {"weeks": {}, "dayChoice": {}, "modified": {}}
+
+
+def copy_week(state, source, targets=None):
+    """Make every ``targets`` week (default: all others) a copy of ``source``."""
+    source = int(source)
+    _weeks(state, [source])
+    src = _shown_week(state, source)
+    delta = _empty()
+    for week in _weeks(state, targets):
+        if week == source:
+            continue
+        old = state["weeks"].get(str(week)) or {}
+        new = {_rename(k, week): v for k, v in src.items()}
+        delta["weeks"][str(week)] = {**{k: None for k in old if k not in new}, **new}
+        for d in range(catalog.SUNDAY):
+            delta["dayChoice"][f"{week}-w{d}"] = _main_type(state, source, d)
+        prefix = f"sel-{week}-"
+        delta["modified"].update({k: None for k in state["modified"] if k.startswith(prefix)})
+        for d in range(7):
+            delta["modified"][f"{prefix}{d}-{_main_type(state, source, d)}"] = True
+    return delta
+
+
+def fill(state, day, meal, item, weeks=None, price=None):
+    """Select ``item`` for ``meal`` on weekday ``day`` (0 = Mon) of every week."""
+    day = int(day)
+    if not 0 <= day <= catalog.SUNDAY:
+        raise ValueError(f"day must be 0-6, got {day}")
+    delta = _empty()
+    for week in _weeks(state, weeks):
+        _set_slot(delta, week, day, meal, item, price)
+    return delta
+
+
+def clear(state, meal, weeks=None, days=None):
+    """Set ``meal`` to "Not planned" on ``days`` (default: all) of every week."""
+    if meal not in catalog.MEAL_TYPES:
+        raise ValueError(f"unknown meal type {meal!r}")
+    delta = _empty()
+    for week in _weeks(state, weeks):
+        wk = delta["weeks"].setdefault(str(week), {})
+        for d in range(7) if days is None else map(int, days):
+            if meal == "breakfast" and d == catalog.SUNDAY:
+                continue
+            key = f"sel-{week}-{d}-{meal}"
+            wk[key] = "skip"
+            wk[f"price-{week}-{d}-{meal}"] = None
+            if meal in MAINS:
+                delta["modified"][key] = True
+    return delta
+
+
+def default_template(week):
+    """The default plan's days for ``week`` (1-4) as template ``days``."""
+    days = {}
+    for d in range(7):
+        ids = {
+            "breakfast": catalog.default_for(catalog.BREAKFAST_DEFAULTS, week, d),
+            "lunch": catalog.default_for(catalog.LUNCH_DEFAULTS, week, d),
+            "dinner": catalog.default_for(catalog.DINNER_DEFAULTS, week, d),
+        }
+        if d == catalog.SUNDAY:
+            days[str(d)] = {"lunch": "skip", "dinner": "skip"}
+            continue
+        main = "lunch" if not ids["breakfast"] and ids["lunch"] else "breakfast"
+        days[str(d)] = {"main": main, main: ids[main] or "skip", "dinner": ids["dinner"] or "skip"}
+    return days
+
+
+def template(state, days=None, weeks=None, default=None):
+    """Apply per-day picks to every week.
+
+    ``days`` maps a day (0-6) to ``{"main": "breakfast" | "lunch",
+    <meal>: item, ...}``; ``default=n`` uses the default plan's week ``n``.
+    Breakfast specials are only offered on their day of the default
+    rotation; elsewhere that pick is left out.
+    """
+    if default is not None:
+        days = default_template(int(default))
+    delta = _empty()
+    for week in _weeks(state, weeks):
+        for d, spec in (days or {}).items():
+            d = int(d)
+            main = spec.get("main")
+            if main is not None and main not in MAINS:
+                raise ValueError(f"main must be breakfast or lunch, got {main!r}")
+            for meal in catalog.MEAL_TYPES:
+                if meal in spec and (meal != "breakfast" or _offered(week, d, spec[meal])):
+                    _set_slot(delta, week, d, meal, spec[meal])
+            if main and d != catalog.SUNDAY:
+                delta["dayChoice"][f"{week}-w{d}"] = main
+    return delta
+
+
+OPERATIONS = {"copy_week": copy_week, "fill": fill, "clear": clear, "template": template}
+
+
+def operation(state, op):
+    """The delta of one JSON operation (``{"op": name, **arguments}``)."""
+    op = dict(op)
+    name = op.pop("op", None)
+    if name not in OPERATIONS:
+        raise ValueError(f"unknown bulk operation {name!r}")
+    return OPERATIONS[name](state, **op)
+
+
+def combined(state, ops):
+    """One delta for a sequence of operations, each seeing the ones before."""
+    if len(ops) == 1:
+        return operation(state, ops[0])
+    work = copy.deepcopy(state)
+    deltas = []
+    for op in ops:
+        deltas.append(operation(work, op))
+        plan.apply_delta(work, deltas[-1])
+    return plan.merge_deltas(*deltas)
+
+
+def _no_change(delta):
+    return all(isinstance(v, dict) and _no_change(v) for v in delta.values())
+
+
+def apply_to_store(store, ops, users=None):
+    """Apply ``ops`` to the stored plans of ``users`` (default: everyone).
+
+    Each user gets one journal entry.  Returns ``(changed, skipped,
+    errors)``: the number of plans edited, ``{user: reason}`` for users
+    with no stored plan or nothing to change, and ``{user: message}`` for
+    those the operations do not fit (left untouched).
+    """
+    changed, skipped, errors = 0, {}, {}
+    for user in store.users() if users is None else users:
+        store.track(user)
+        state = store.load(user)
+        if state is None:
+            skipped[user] = "no stored plan"
+            continue
+        state = plan.ensure_structure(state)
+        try:
+            delta = combined(state, ops)
+        except (ValueError, TypeError) as exc:
+            errors[user] = str(exc)
+            continue
+        if _no_change(delta):
+            skipped[user] = "nothing to change"
+            continue
+        store.record(user, delta, plan.apply_delta(state, delta))
+        changed += 1
+    store.flush()
+    return changed, skipped, errors
@@ -0,0 +1,141 @@
+"""Menu catalog, budgets and default plan tables.
+
+The menu (``breakfastAll``, ``lunchOptions``, ``dinnerOptions`` in the
+browser) lives in ``data/menu.json`` so prices can change without a
+deploy; budgets and the ``*_DEFAULTS`` tables mirror the browser
+constants so the server can reason about a plan without a browser.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+MEAL_TYPES = ("breakfast", "lunch", "dinner")
+WEEK_DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+WEEKS = 4
+MAX_WEEKS = 52
+SUNDAY = 6
+
+DEFAULT_BUDGETS = {"weekly": 840, "sunday": 2140, "weekdays": 3360, "grandTotal": 5500}
+WEEKDAY_LIMIT = 140
+SUNDAY_LIMIT = 535
+
+# week -> one entry per day, Mon..Sun; None means "Not planned".  Longer
+# horizons repeat the four-week rotation (see default_for).
+BREAKFAST_DEFAULTS = {
+    1: [None, "pav", None, "maggi", "medu", "alu", None],
+    2: [None, "pongal", None, "mac", "mac", None, None],
+    3: [None, "sambar", "pav", None, "curd", None, None],
+    4: [None, "sambar", None, "alu", None, "daal", None],
+}
+LUNCH_DEFAULTS = {
+    1: ["l-biryani", None, "l-sambar", None, None, None, None],
+    2: ["l-biryani", None, "l-biryani", None, None, "l-biryani", None],
+    3: ["l-biryani", None, None, "l-biryani", None, "l-biryani", None],
+    4: ["l-biryani", None, "l-biryani", None, "l-biryani", None, None],
+}
+DINNER_DEFAULTS = {
+    1: ["d-dosa", "d-fish", "d-mushroom", "d-veg", "d-chicken", "d-biryani", None],
+    2: ["d-dosa", "d-chicken", "d-dosa", "d-fish", "d-veg", "d-chicken", None],
+    3: ["d-dosa", "d-veg", "d-fish", "d-dosa", "d-biryani", "d-biryani", None],
+    4: ["d-dosa", "d-fish", "d-dosa", "d-veg", "d-dosa", "d-chicken", None],
+}
+
+
+def default_for(table, week, day):
+    """Default pick from one of the ``*_DEFAULTS`` tables for any week."""
+    return table[(week - 1) % len(table) + 1][day]
+
+
+def day_limit(day):
+    """Per-day spending limit shown next to each day total."""
+    return SUNDAY_LIMIT if day == SUNDAY else WEEKDAY_LIMIT
+
+
+MENU_PATH = Path(os.environ.get("MEALSYNC_MENU", Path(__file__).parent / "data" / "menu.json"))
+
+
+class Catalog:
+    """One loaded menu: ordered item lists plus an id index per meal type.
+
+    ``menu`` is what ``priceForSelection()`` iterates (``breakfastAll``,
+    ``lunchOptions``, ``dinnerOptions``); ``index`` makes every lookup by id
+    O(1).  Breakfast items flagged ``"base"`` form ``breakfastBase``.
+    """
+
+    def __init__(self, menu, version=None):
+        self.menu = {meal: [dict(item) for item in menu.get(meal, [])] for meal in MEAL_TYPES}
+        self.index = {meal: {item["id"]: item for item in items} for meal, items in self.menu.items()}
+        self.breakfast_base = [item for item in self.menu["breakfast"] if item.get("base")]
+        # Breakfast options only depend on the day of the default rotation.
+        self._breakfast_options = {
+            (week, day): self._build_breakfast_options(week, day)
+            for week in BREAKFAST_DEFAULTS
+            for day in range(7)
+        }
+        if version is None:
+            raw = json.dumps(self.menu, sort_keys=True).encode()
+            version = hashlib.sha1(raw).hexdigest()[:12]
+        self.version = version
+
+    @classmethod
+    def load(cls, path=MENU_PATH):
+        raw = Path(path).read_bytes()
+        return cls(json.loads(raw), hashlib.sha1(raw).hexdigest()[:12])
+
+    def item(self, meal, item_id):
+        return self.index[meal].get(item_id)
+
+    def price(self, meal, item_id):
+        item = self.index[meal].get(item_id)
+        return item["price"] if item else 0
+
+    def breakfast_options(self, week, day):
+        """Port of ``getBreakfastConfig()``: the base list plus the day's special.
+
+        The list is shared; callers must not modify it.
+        """
+        return self._breakfast_options[((week - 1) % len(BREAKFAST_DEFAULTS) + 1, day)]
+
+    def _build_breakfast_options(self, week, day):
+        default_id = default_for(BREAKFAST_DEFAULTS, week, day)
+        options = list(self.breakfast_base)
+        if default_id and not any(m["id"] == default_id for m in options):
+            special = self.item("breakfast", default_id)
+            if special:
+                options.insert(0, special)
+        return options
+
+    @functools.cached_property
+    def client(self):
+        """Id-keyed maps for the browser; insertion order is option order."""
+        out = {"version": self.version}
+        for meal, items in self.menu.items():
+            out[meal] = {item["id"]: {k: v for k, v in item.items() if k != "id"} for item in items}
+        return out
+
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def load_catalog(path=MENU_PATH):
+    """The catalog at ``path``, re-read only when the file's mtime changes."""
+    path = str(path)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _loaded.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with _lock:
+        cached = _loaded.get(path)
+        if not cached or cached[0] != mtime:
+            _loaded[path] = (mtime, Catalog.load(path))
+        return _loaded[path][1]
+
+
+def current():
+    """The catalog every server-side computation should price against."""
+    return load_catalog(MENU_PATH)
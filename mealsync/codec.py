@@ -0,0 +1,207 @@
+"""Packed plan format shared with ``frontend/codec.js``.
+
+Version 1 keeps one code per (week, day, meal) slot in a fixed-layout byte
+array, bitsets for ``dayChoice`` and ``modified``, and a sparse table of
+custom prices::
+
+    {"v": 1, "w": weeks, "sw": selectedWeek,
+     "d": [item ids used by the plan], "sb": bytes per slot code,
+     "s": base64 slot codes, "c": base64 dayChoice bits (1 = lunch),
+     "m": base64 modified bits, "p": {"slot": "price"},
+     "b": [weekly, sunday, weekdays, grandTotal]}
+
+Slot codes are 0 for an absent key, 1 for ``skip``, 2 for ``custom`` and
+``3 + i`` for ``d[i]``.  ``w`` is the plan's horizon.  Legacy ``mealsync_state`` objects are version 0.
+"""
+
+import base64
+
+import numpy as np
+
+from mealsync import catalog, cost, plan
+
+FORMAT_VERSION = 1
+MEALS = catalog.MEAL_TYPES
+BUDGET_KEYS = ("weekly", "sunday", "weekdays", "grandTotal")
+
+ABSENT, SKIP, CUSTOM, FIRST_ITEM = range(4)
+
+
+def slot_index(week, day, meal):
+    return ((week - 1) * 7 + day) * 3 + meal
+
+
+def _b64(array):
+    return base64.b64encode(array.tobytes()).decode("ascii")
+
+
+def _unb64(text, length, dtype=np.uint8):
+    raw = base64.b64decode(text or "")
+    out = np.zeros(length, dtype=dtype)
+    data = np.frombuffer(raw, dtype=dtype)[:length]
+    out[: len(data)] = data
+    return out
+
+
+def _bits(text, length):
+    return np.unpackbits(_unb64(text, (length + 7) // 8), bitorder="little")[:length].astype(bool)
+
+
+def encode(state):
+    """Pack a ``mealsync_state`` dict."""
+    weeks = plan.horizon(state)
+    n_slots = weeks * 21
+    codes = np.zeros(n_slots, dtype=np.uint16)
+    choice = np.zeros(weeks * 6, dtype=bool)
+    modified = np.zeros(n_slots, dtype=bool)
+    ids, index, prices = [], {}, {}
+    all_weeks = state.get("weeks") or {}
+    day_choice = state.get("dayChoice") or {}
+    mods = state.get("modified") or {}
+
+    for w in range(1, weeks + 1):
+        wk = all_weeks.get(str(w)) or all_weeks.get(w) or {}
+        for d in range(7):
+            if d < 6 and day_choice.get(f"{w}-w{d}") == "lunch":
+                choice[(w - 1) * 6 + d] = True
+            for m, meal in enumerate(MEALS):
+                i = slot_index(w, d, m)
+                key = f"sel-{w}-{d}-{meal}"
+                sel = wk.get(key)
+                if sel == "skip":
+                    codes[i] = SKIP
+                elif sel == "custom":
+                    codes[i] = CUSTOM
+                elif sel is not None:
+                    if sel not in index:
+                        index[sel] = len(ids)
+                        ids.append(sel)
+                    codes[i] = FIRST_ITEM + index[sel]
+                pk = f"price-{w}-{d}-{meal}"
+                if pk in wk:
+                    prices[str(i)] = str(wk[pk])
+                if mods.get(key):
+                    modified[i] = True
+
+    width = 2 if len(ids) + FIRST_ITEM > 255 else 1
+    slots = codes.astype("<u2") if width == 2 else codes.astype(np.uint8)
+    budgets = state.get("budgets") or {}
+    return {
+        "v": FORMAT_VERSION,
+        "w": weeks,
+        "sw": state.get("selectedWeek") or 1,
+        "d": ids,
+        "sb": width,
+        "s": _b64(slots),
+        "c": _b64(np.packbits(choice, bitorder="little")),
+        "m": _b64(np.packbits(modified, bitorder="little")),
+        "p": prices,
+        "b": [budgets.get(k) for k in BUDGET_KEYS],
+    }
+
+
+def _check(payload):
+    """Raise ``ValueError`` unless ``payload`` has the fields every decode reads."""
+    weeks = payload.get("w")
+    if isinstance(weeks, bool) or not isinstance(weeks, int) or not 1 <= weeks <= catalog.MAX_WEEKS:
+        raise ValueError(f"packed plan needs 1-{catalog.MAX_WEEKS} weeks in 'w', got {weeks!r}")
+    if not isinstance(payload.get("s"), str):
+        raise ValueError("packed plan has no slot codes 's'")
+    for key, kind in (("sw", int), ("d", list), ("c", str), ("m", str), ("p", dict), ("b", list)):
+        if payload.get(key) is not None and not isinstance(payload[key], kind):
+            raise ValueError(f"packed plan field {key!r} must be a {kind.__name__}")
+
+
+def slot_codes(payload):
+    """The raw slot code array of a packed plan, shaped (weeks, 7, 3)."""
+    _check(payload)
+    weeks = payload["w"]
+    dtype = "<u2" if payload.get("sb", 1) == 2 else np.uint8
+    return _unb64(payload["s"], weeks * 21, dtype).astype(np.int32).reshape(weeks, 7, 3)
+
+
+def decode(payload):
+    """Unpack a version 1 payload into a ``mealsync_state`` dict."""
+    if payload.get("v") != FORMAT_VERSION:
+        raise ValueError(f"unsupported plan format v{payload.get('v')}")
+    _check(payload)
+    weeks = payload["w"]
+    codes = slot_codes(payload).reshape(-1)
+    choice = _bits(payload.get("c"), weeks * 6)
+    modified = _bits(payload.get("m"), weeks * 21)
+    ids = payload.get("d") or []
+    prices = payload.get("p") or {}
+    state = {"selectedWeek": payload.get("sw") or 1, "horizon": weeks, "weeks": {}, "dayChoice": {}, "budgets": {}, "modified": {}}
+
+    for w in range(1, weeks + 1):
+        wk = state["weeks"][str(w)] = {}
+        for d in range(7):
+            if d < 6:
+                state["dayChoice"][f"{w}-w{d}"] = "lunch" if choice[(w - 1) * 6 + d] else "breakfast"
+            for m, meal in enumerate(MEALS):
+                i = slot_index(w, d, m)
+                key = f"sel-{w}-{d}-{meal}"
+                code = codes[i]
+                if code == SKIP:
+                    wk[key] = "skip"
+                elif code == CUSTOM:
+                    wk[key] = "custom"
+                elif code >= FIRST_ITEM:
+                    if code - FIRST_ITEM >= len(ids):
+                        raise ValueError(f"slot code {code} has no item id")
+                    wk[key] = ids[code - FIRST_ITEM]
+                if str(i) in prices:
+                    wk[f"price-{w}-{d}-{meal}"] = prices[str(i)]
+                if modified[i]:
+                    state["modified"][key] = True
+
+    for k, v in zip(BUDGET_KEYS, payload.get("b") or []):
+        if v is not None:
+            state["budgets"][k] = v
+    return state
+
+
+def migrate(payload):
+    """Return a ``mealsync_state`` dict from any stored payload version."""
+    if isinstance(payload, dict):
+        if payload.get("v") == FORMAT_VERSION:
+            return decode(payload)
+        if payload.get("v") is None and any(k in payload for k in ("weeks", "dayChoice", "budgets")):
+            return payload
+    raise ValueError("unrecognised plan payload")
+
+
+def batch_from_packed(payloads, table=None, weeks=None):
+    """Build a :class:`cost.PlanBatch` straight from packed payloads.
+
+    Slot codes are remapped to the price table with one lookup array per
+    plan, so no per-slot string handling is needed.  ``weeks`` defaults to
+    the longest horizon in the batch.
+    """
+    table = table or cost.PriceTable()
+    weeks = weeks or max((p["w"] for p in payloads), default=catalog.WEEKS)
+    n = len(payloads)
+    codes = np.zeros((n, weeks, 7, 3), dtype=np.int16)
+    custom = np.zeros((n, weeks, 7, 3), dtype=np.float64)
+    lunch_main = np.zeros((n, weeks, 7), dtype=bool)
+    lunch_main[:, :, catalog.SUNDAY] = True
+    selected = np.ones(n, dtype=np.int64)
+
+    for i, p in enumerate(payloads):
+        w = min(p["w"], weeks)
+        raw = slot_codes(p)[:w]
+        ids = p.get("d") or []
+        lut = np.zeros((3, FIRST_ITEM + len(ids)), dtype=np.int16)
+        lut[:, CUSTOM] = cost.CUSTOM
+        for m, meal in enumerate(MEALS):
+            lut[m, FIRST_ITEM:] = [table.code(meal, item) for item in ids]
+        codes[i, :w] = lut[np.arange(3), raw]
+        for slot, value in (p.get("p") or {}).items():
+            s = int(slot)
+            if s < w * 21:
+                custom[i].flat[s] = cost.parse_price(value)
+        lunch_main[i, :w, :6] = _bits(p.get("c"), p["w"] * 6).reshape(p["w"], 6)[:w]
+        selected[i] = p.get("sw") or 1
+
+    custom[codes != cost.CUSTOM] = 0.0
+    return cost.PlanBatch(codes, custom, lunch_main, selected)
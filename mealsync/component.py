@@ -0,0 +1,295 @@
+"""The MealSync planner as a declared, bidirectional Streamlit component.
+
+The frontend (``frontend/``) is served once as static files; each rerun
+only exchanges small JSON deltas:
+
+* the browser reports ``{"sid", "seq", "delta" | "full", "pushAck"}`` with
+  every change the server has not acknowledged yet;
+* the server answers with ``ack`` (highest client ``seq`` applied) and
+  ``patches`` (server-side edits the browser has not acknowledged yet),
+  each either ``{"seq", "delta"}`` or ``{"seq", "replace": packed plan}``;
+* a delta the server has no plan for (after a restart or a session
+  reset) stays unacknowledged and the server sets ``needFull``, to which
+  the browser answers with its whole plan.
+
+When a user id is given the plan is also kept in the shared SQLite
+:class:`~mealsync.store.PlanStore`, which wins over the browser's copy
+when a page loads, and every session of the user (tabs, devices) works on
+one versioned :class:`~mealsync.hub.SharedPlan`: ``args.version`` is the
+version the browser reaches with the patches, which also carry the other
+sessions' edits merged per slot (see :mod:`mealsync.hub`).
+
+The menu is sent as ``catalog`` only while the browser's reported
+``catalogVersion`` differs from the loaded one.
+
+Sampled sessions get ``metrics: true`` and add their timings to the values
+they report; :func:`shared_metrics` aggregates them (see
+:mod:`mealsync.metrics`) and :func:`metrics_panel` shows them.
+"""
+
+import copy
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from mealsync import assets, bulk, catalog, codec, hub, metrics, plan
+from mealsync.store import PlanStore
+
+DB_PATH = os.environ.get("MEALSYNC_DB", "mealsync.db")
+
+# Served from the minified, content-hashed build (see mealsync.assets).
+_component = components.declare_component("mealsync", path=str(assets.build()))
+
+
+@st.cache_resource
+def shared_store(path=DB_PATH):
+    """One plan store (and connection pool) for every session."""
+    return PlanStore(path)
+
+
+@st.cache_resource
+def shared_hub():
+    """The shared plans of every user with an open session."""
+    return hub.PlanHub(shared_store())
+
+
+@st.cache_resource
+def shared_metrics():
+    """The process-wide metrics aggregator."""
+    return metrics.Metrics()
+
+
+@st.cache_resource(max_entries=4)
+def _catalog_at(path, mtime_ns):
+    return catalog.load_catalog(path)
+
+
+def shared_catalog(path=catalog.MENU_PATH):
+    """The menu catalog, shared by every session and reloaded when edited."""
+    return _catalog_at(str(path), os.stat(path).st_mtime_ns)
+
+
+def _apply_patch(state, patch):
+    if "replace" in patch:
+        return plan.share_defaults(plan.ensure_structure(codec.decode(patch["replace"])))
+    return plan.apply_delta(state, patch["delta"])
+
+
+class PlanSync:
+    """Per-session server copy of the browser plan plus sync bookkeeping.
+
+    The copy shares its unchanged parts with the default plan (see
+    :func:`plan.share_defaults`), so a session costs about the size of its
+    user's edits.  With a ``hub`` the copy is the user's
+    :class:`~mealsync.hub.SharedPlan`, one for all of their sessions.
+    """
+
+    def __init__(self, user=None, store=None, hub=None):
+        self.user = user
+        self.store = store
+        self.shared = hub.plan(user) if hub is not None and user is not None else None
+        self._plan = None
+        self.sid = None
+        self.ack = 0
+        self.patches = []
+        self.patch_seq = 0
+        self.version = 0  # shared version the browser is brought up to
+        self.need_full = False  # a delta arrived before any plan
+        self.sampled = False  # whether the page reports metrics
+
+    @property
+    def plan(self):
+        return self.shared.state if self.shared is not None else self._plan
+
+    def receive(self, value):
+        """Fold a component value into the server copy; True if it changed."""
+        if not value:
+            return False
+        sid, seq = value.get("sid"), value.get("seq", 0)
+        new_page = sid != self.sid
+        if new_page:
+            self.sid, self.ack = sid, 0
+        push_ack = value.get("pushAck", 0)
+        self.patches = [p for p in self.patches if p["seq"] > push_ack]
+        if seq <= self.ack:
+            return False
+        if "full" not in value and self.plan is None:
+            # A delta without a plan to apply it to (the server restarted
+            # or the session was reset): leave it unacknowledged and ask
+            # the page for its whole plan instead.
+            self.need_full = True
+            return False
+        self.ack = seq
+        self.need_full = False
+        if "full" in value:
+            stored = self._stored_plan() if new_page else None
+            if stored is not None:
+                self.replace(stored)
+                return True
+            # Patches the browser has not acknowledged are replayed to it,
+            # so keep them applied to the server copy as well.
+            unacked = [p for p in self.patches if "delta" in p]
+            if self.shared is not None:
+                self.version = self.shared.replace(value["full"], self.sid)
+                for patch in unacked:
+                    self.version = self.shared.commit(patch["delta"], self.sid)
+                return True
+            self._plan = plan.share_defaults(plan.ensure_structure(copy.deepcopy(value["full"])))
+            for patch in self.patches:
+                self._plan = _apply_patch(self._plan, patch)
+            self._persist()
+        else:
+            delta = value.get("delta") or {}
+            # The browser's edit is newer than any queued patch to the same slots.
+            self._drop_from_patches(delta)
+            if self.shared is not None:
+                version = self.shared.commit(delta, self.sid, value.get("base"))
+                # With no other edit in between, the browser already holds
+                # this version: catch_up() would only bump it.
+                if version == self.version + 1:
+                    self.version = version
+            else:
+                plan.apply_delta(self._plan, delta)
+                self._persist(delta)
+        return True
+
+    def _drop_from_patches(self, delta):
+        paths = {path for path, _ in hub.leaves(delta)}
+        if not paths:
+            return
+        kept = []
+        for patch in self.patches:
+            if "delta" in patch:
+                rest = hub.without(patch["delta"], paths)
+                if rest is None:
+                    continue
+                patch = {**patch, "delta": rest}
+            kept.append(patch)
+        self.patches = kept
+
+    def _stored_plan(self):
+        if self.shared is not None:
+            return self.shared.state
+        if self.store is None or self.user is None:
+            return None
+        return self.store.load(self.user)
+
+    def _persist(self, delta=None):
+        """Save the plan: journal ``delta`` if given, else a full snapshot."""
+        if self.store is None or self.user is None or self._plan is None:
+            return
+        if delta is None:
+            self.store.save(self.user, self._plan)
+        else:
+            self.store.record(self.user, delta, self._plan)
+
+    def _queue_replace(self, state):
+        self.patch_seq += 1
+        self.patches = [{"seq": self.patch_seq, "replace": codec.encode(state)}]
+
+    def replace(self, state):
+        """Make ``state`` the plan on both sides."""
+        if self.shared is not None:
+            if state is not self.shared.state:
+                self.shared.replace(state, self.sid)
+            self.version = self.shared.version
+        else:
+            self._plan = plan.share_defaults(plan.ensure_structure(copy.deepcopy(state)))
+        self._queue_replace(self.plan)
+
+    def push(self, delta):
+        """Queue a server-side edit for the browser and apply it locally."""
+        self.patch_seq += 1
+        self.patches.append({"seq": self.patch_seq, "delta": delta})
+        if self.shared is not None and self.plan is not None:
+            self.shared.commit(delta, self.sid)
+        elif self._plan is not None:
+            plan.apply_delta(self._plan, delta)
+            self._persist(delta)
+
+    def bulk(self, *ops):
+        """Apply bulk operations (see :mod:`mealsync.bulk`) as one patch.
+
+        Returns the delta, or None while the browser has not reported its
+        plan yet.  Call it before :func:`mealsync` renders so the patch
+        goes out in the same rerun.
+        """
+        if self.plan is None:
+            return None
+        delta = bulk.combined(self.plan, list(ops))
+        self.push(delta)
+        return delta
+
+    def catch_up(self):
+        """Queue the other sessions' edits this browser has not seen."""
+        if self.shared is None or self.sid is None:
+            return
+        version, delta = self.shared.changes(self.version, self.sid)
+        if delta == "replace":
+            self._queue_replace(self.shared.state)
+        elif delta:
+            self.patch_seq += 1
+            self.patches.append({"seq": self.patch_seq, "delta": delta})
+        self.version = version
+
+    def args(self):
+        self.catch_up()
+        args = {"sid": self.sid, "ack": self.ack, "patches": self.patches, "version": self.version}
+        if self.need_full:
+            args["needFull"] = True
+        if self.sampled:
+            args["metrics"] = True
+        return args
+
+
+def plan_sync(key="mealsync", user=None):
+    """The :class:`PlanSync` for this session and component key."""
+    slot = f"_{key}_sync"
+    sync = st.session_state.get(slot)
+    if sync is None or sync.user != user:
+        sync = st.session_state[slot] = PlanSync(user, shared_store() if user else None, shared_hub() if user else None)
+        sync.sampled = shared_metrics().sample()
+    return sync
+
+
+def mealsync(key="mealsync", user=None, weeks=None, debug=False):
+    """Render the planner and return the session's :class:`PlanSync`.
+
+    With a ``user`` id the plan is persisted server-side per user; with
+    ``weeks`` the plan is resized to that many weeks (up to
+    ``catalog.MAX_WEEKS``); ``debug`` makes the page report metrics.
+    """
+    sync = plan_sync(key, user)
+    sync.sampled = sync.sampled or debug
+    # The widget value is readable before the call, so the ack we send
+    # back below already covers the change that triggered this rerun.
+    value = st.session_state.get(key)
+    if sync.receive(value) and value.get("metrics"):
+        shared_metrics().ingest(value["metrics"])
+    if weeks and sync.plan is not None and plan.horizon(sync.plan) != weeks:
+        sync.push(plan.resize(sync.plan, weeks))
+    menu = shared_catalog()
+    args = sync.args()
+    if (value or {}).get("catalogVersion") != menu.version:
+        args["catalog"] = menu.client
+    _component(key=key, default=None, **args)
+    return sync
+
+
+def metrics_panel(sync=None):
+    """Debug panel: this process's metrics and the session's sync state."""
+    aggregate = shared_metrics()
+    with st.expander("Metrics", expanded=True):
+        rows = aggregate.summary()
+        if rows:
+            st.dataframe(rows, width="stretch", hide_index=True)
+        else:
+            st.caption("Nothing recorded yet.")
+        if sync is not None:
+            st.caption(f"sampled {sync.sampled} · version {sync.version} · "
+                       f"queued patches {len(sync.patches)} · acked seq {sync.ack}")
+        if aggregate.export_path:
+            st.caption(f"Exported to {aggregate.export_path}")
+        if st.toggle("Prometheus text"):
+            st.code(aggregate.render(), language="text")
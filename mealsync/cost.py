@@ -0,0 +1,167 @@
+"""Vectorized plan costing.
+
+A plan is the ``mealsync_state`` object the browser keeps in
+``localStorage``.  Plans are encoded as a dense ``(plans, weeks, 7, 3)``
+array of item codes that index into a single price vector, so the totals
+shown by ``updateSummary()`` can be computed for thousands of plans in one
+batched pass.
+"""
+
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from mealsync import catalog, plan
+
+SKIP = 0
+CUSTOM = 1
+
+BREAKFAST, LUNCH, DINNER = range(3)
+
+_FLOAT_PREFIX = re.compile(r"\s*([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)")
+
+
+def parse_float(value):
+    """Port of ``parseFloat``; None where it would give ``NaN``."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value == value else None
+    m = _FLOAT_PREFIX.match(str(value))
+    return float(m.group(1)) if m else None
+
+
+def parse_price(value):
+    """Parse a custom price the way ``parseFloat(v || 0) || 0`` does."""
+    return parse_float(value) or 0.0
+
+
+class PriceTable:
+    """Item codes and the price vector they index into.
+
+    Code 0 is "skip" and code 1 is "custom" (priced per slot); catalog
+    items follow, one block per meal type.  Ids unknown to the catalog map
+    to ``SKIP`` which, like ``priceForSelection``, prices them at zero.
+    """
+
+    def __init__(self, menu=None):
+        menu = menu if menu is not None else catalog.current().menu
+        prices = [0.0, 0.0]
+        self.codes = {}
+        self.items = [None, None]
+        for meal in catalog.MEAL_TYPES:
+            codes = {"skip": SKIP, "custom": CUSTOM}
+            for item in menu[meal]:
+                codes[item["id"]] = len(prices)
+                prices.append(float(item["price"]))
+                self.items.append((meal, item))
+            self.codes[meal] = codes
+        self.prices = np.asarray(prices, dtype=np.float64)
+
+    def code(self, meal, sel):
+        return self.codes[meal].get(sel or "skip", SKIP)
+
+
+@dataclass
+class PlanBatch:
+    """Dense encoding of ``n`` plans over ``weeks`` weeks."""
+
+    codes: np.ndarray  # (n, weeks, 7, 3) int16 item codes
+    custom: np.ndarray  # (n, weeks, 7, 3) float64 custom prices
+    lunch_main: np.ndarray  # (n, weeks, 7) bool, main meal is lunch
+    selected_week: np.ndarray  # (n,) int, 1-based
+
+    @property
+    def weeks(self):
+        return self.codes.shape[1]
+
+    def __len__(self):
+        return self.codes.shape[0]
+
+
+@dataclass
+class PlanTotals:
+    day: np.ndarray  # (n, weeks, 7)
+    week: np.ndarray  # (n, weeks), Mon-Sat only like "Current Week Total"
+    current_week: np.ndarray  # (n,)
+    sunday: np.ndarray  # (n,)
+    weekdays: np.ndarray  # (n,)
+    grand: np.ndarray  # (n,)
+
+
+def encode_plans(states, table=None, weeks=None):
+    """Encode ``mealsync_state`` dicts into a :class:`PlanBatch`.
+
+    ``weeks`` defaults to the longest horizon; shorter plans cost nothing
+    past their last week.
+    """
+    table = table or PriceTable()
+    weeks = weeks or max((plan.horizon(s) for s in states), default=catalog.WEEKS)
+    n = len(states)
+    codes = np.zeros((n, weeks, 7, 3), dtype=np.int16)
+    custom = np.zeros((n, weeks, 7, 3), dtype=np.float64)
+    lunch_main = np.zeros((n, weeks, 7), dtype=bool)
+    lunch_main[:, :, catalog.SUNDAY] = True
+    selected = np.ones(n, dtype=np.int64)
+
+    for i, s in enumerate(states):
+        all_weeks = s.get("weeks") or {}
+        day_choice = s.get("dayChoice") or {}
+        try:
+            selected[i] = int(s.get("selectedWeek") or 1)
+        except (TypeError, ValueError):
+            pass
+        for w in range(1, min(plan.horizon(s), weeks) + 1):
+            wk = all_weeks.get(str(w)) or all_weeks.get(w) or {}
+            for d in range(7):
+                if d != catalog.SUNDAY and day_choice.get(f"{w}-w{d}") == "lunch":
+                    lunch_main[i, w - 1, d] = True
+                for m, meal in enumerate(catalog.MEAL_TYPES):
+                    c = table.code(meal, wk.get(f"sel-{w}-{d}-{meal}"))
+                    codes[i, w - 1, d, m] = c
+                    if c == CUSTOM:
+                        custom[i, w - 1, d, m] = parse_price(wk.get(f"price-{w}-{d}-{meal}"))
+
+    return PlanBatch(codes, custom, lunch_main, selected)
+
+
+def active_mask(batch):
+    """Which of the three slots count towards each day total."""
+    mask = np.empty(batch.codes.shape, dtype=bool)
+    mask[..., BREAKFAST] = ~batch.lunch_main
+    mask[..., LUNCH] = batch.lunch_main
+    mask[..., DINNER] = True
+    return mask
+
+
+def slot_prices(batch, table=None):
+    """Price of every slot, with custom prices substituted."""
+    table = table or PriceTable()
+    prices = table.prices[batch.codes]
+    return np.where(batch.codes == CUSTOM, batch.custom, prices)
+
+
+def compute_totals(batch, table=None):
+    """Compute every total ``updateSummary()`` shows, for all plans at once."""
+    prices = slot_prices(batch, table) * active_mask(batch)
+    day = prices.sum(axis=3)
+    week = day[:, :, : catalog.SUNDAY].sum(axis=2)
+    sunday = day[:, :, catalog.SUNDAY].sum(axis=1)
+    weekdays = week.sum(axis=1)
+    idx = np.clip(batch.selected_week - 1, 0, batch.weeks - 1)
+    current = week[np.arange(len(batch)), idx]
+    return PlanTotals(
+        day=day,
+        week=week,
+        current_week=current,
+        sunday=sunday,
+        weekdays=weekdays,
+        grand=weekdays + sunday,
+    )
+
+
+def plan_totals(states, table=None, weeks=None):
+    """Encode and total a list of plans in one call."""
+    table = table or PriceTable()
+    return compute_totals(encode_plans(states, table, weeks), table)
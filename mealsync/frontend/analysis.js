@@ -0,0 +1,132 @@
+import { createEngine } from './engine.js';
+
+/* ---------- Plan analysis off the main thread ----------
+   Totals, validation and swap suggestions are computed by the engine in
+   engine.js, which keeps its own copy of the plan.  The page ships it the
+   store writes ([path, value] ops, one batch per task, repeated writes to
+   a path folded) and gets back {seq, summary, invalid, suggestions}; only
+   the input handlers and DOM patches stay on the UI thread.  With
+   window.MEALSYNC_DEBUG set, each batch asks the engine to check its
+   running totals against a full recompute and the answer carries the
+   outcome as `check`.
+
+   The engine runs in worker.js.  Where module workers are unavailable
+   (old browsers, the node harness) the same engine runs on the page a
+   microtask later, so callers never see the difference. */
+
+const DEBUG = typeof window !== 'undefined' && !!window.MEALSYNC_DEBUG;
+
+/* Page side: mirrors store writes into the engine and calls
+   onResult(analysis) with each answer, in order. */
+export function createAnalysis(store, { onResult, debug = DEBUG } = {}){
+  const stats = { posted:0, results:0, ops:0, worker:false, ms:0, drifts:0 };
+  let checked = null;          // the latest answer's totals check, when debugging
+  let pending = new Map();     // path key -> [path, value], in last-write order
+  let extra = null;            // state / catalog riding on the next post
+  let scheduled = false;
+  let seq = 0, shown = 0;
+  let worker = null, inline = null;
+  let catalogData = null;      // the latest menu sent, to replay on fallback
+  const sentAt = new Map();
+
+  function receive(result){
+    if(!result || result.seq <= shown) return;
+    shown = result.seq;
+    stats.results += 1;
+    stats.ms = performance.now() - (sentAt.get(result.seq) ?? performance.now());
+    for(const k of sentAt.keys()) if(k <= result.seq) sentAt.delete(k);
+    if('check' in result){
+      checked = result.check;
+      if(!checked) stats.drifts += 1;
+    }
+    if(onResult) onResult(result);
+  }
+
+  function runInline(){
+    if(!inline) inline = createEngine();
+    return inline;
+  }
+
+  function post(msg){
+    if(worker){
+      worker.postMessage(msg);
+    } else {
+      /* Copy now, as the worker's structured clone would: the page keeps
+         mutating the objects these ops point into. */
+      const copy = structuredClone(msg);
+      queueMicrotask(() => receive(runInline().handle(copy)));
+    }
+  }
+
+  function flush(){
+    scheduled = false;
+    if(!pending.size && !extra) return;
+    seq += 1;
+    const msg = Object.assign({ seq, ops:[...pending.values()] }, extra, debug ? { debug:true } : null);
+    stats.posted += 1;
+    stats.ops += pending.size;
+    sentAt.set(seq, performance.now());
+    pending = new Map();
+    extra = null;
+    post(msg);
+  }
+
+  function schedule(){
+    if(scheduled) return;
+    scheduled = true;
+    queueMicrotask(flush);
+  }
+
+  store.subscribe((path, value)=>{
+    const key = path.join('\u0001');
+    pending.delete(key);
+    pending.set(key, [path, value]);
+    schedule();
+  });
+
+  function start(){
+    if(typeof Worker !== 'undefined'){
+      try{
+        worker = new Worker(new URL('./worker.js', import.meta.url), { type:'module' });
+        worker.onmessage = (e) => receive(e.data);
+        worker.onerror = (e) => {
+          /* Fall back for good and replay the whole plan inline. */
+          console.warn('mealsync analysis worker failed; running inline', e.message);
+          worker.terminate();
+          worker = null;
+          stats.worker = false;
+          api.reset(catalogData);
+        };
+        stats.worker = true;
+      } catch(err){
+        worker = null;
+      }
+    }
+  }
+
+  const api = {
+    stats,
+    /* Send the whole plan (startup, replaced plan) and drop queued ops. */
+    reset(catalog){
+      if(catalog) catalogData = catalog;
+      pending = new Map();
+      extra = Object.assign(extra || {}, { state: store.state }, catalog ? { catalog } : {});
+      schedule();
+    },
+    setCatalog(catalog){
+      catalogData = catalog;
+      extra = Object.assign(extra || {}, { catalog });
+      schedule();
+    },
+    /* Ask for a fresh answer even if nothing changed. */
+    refresh(){
+      extra = extra || {};
+      schedule();
+    },
+    /* Debug: whether the engine's totals match a full recompute; from the
+       worker, as of its latest answer (null unless debugging). */
+    check(){ return worker ? checked : inline ? inline.check() : true; }
+  };
+  start();
+  return api;
+}
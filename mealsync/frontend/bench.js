@@ -0,0 +1,73 @@
+/* Render benchmark: drives the real UI through DOM events and reports the
+   DOM mutations and time each kind of edit costs.  Open bench.html from
+   the component's static path (it uses its own localStorage key). */
+
+const ROUNDS = 50;
+
+function countMutations(records){
+  let ops = 0, nodes = 0;
+  for(const r of records){
+    ops += 1;
+    nodes += r.addedNodes.length + r.removedNodes.length;
+  }
+  return { ops, nodes };
+}
+
+function pick(list, i){ return list[i % list.length]; }
+
+function cards(){ return Array.from(document.querySelectorAll('#grid .card')); }
+
+const scenarios = {
+  'select change'(i){
+    const card = pick(cards().slice(0, 6), i);
+    const sel = card.querySelectorAll('.meal-select')[1];
+    const opts = Array.from(sel.options).filter(o => o.value !== 'custom');
+    sel.value = pick(opts, i + 1).value;
+    sel.dispatchEvent(new Event('change'));
+  },
+  'breakfast/lunch toggle'(i){
+    pick(cards().slice(0, 6), i).querySelector('.toggle-btn').click();
+  },
+  'custom price keystroke'(i){
+    const card = cards()[6];
+    const sel = card.querySelectorAll('.meal-select')[1];
+    if(sel.value !== 'custom'){ sel.value = 'custom'; sel.dispatchEvent(new Event('change')); }
+    const input = Array.from(card.querySelectorAll('.custom-input')).find(x => !x.hidden);
+    input.value = String(100 + i);
+    input.dispatchEvent(new Event('input'));
+  },
+  'budget default'(){
+    cards()[7].querySelector('.budget-default-btn').click();
+  },
+  'week switch'(i){
+    const btns = document.querySelectorAll('#weekRow .week-btn:not(.week-nav)');
+    btns[(i + 1) % btns.length].click();
+  }
+};
+
+function run(){
+  const observer = new MutationObserver(()=>{});
+  observer.observe(document.body, { subtree:true, childList:true, attributes:true, characterData:true });
+  const rows = [];
+  for(const [name, edit] of Object.entries(scenarios)){
+    let ops = 0, nodes = 0, ms = 0;
+    observer.takeRecords();
+    for(let i=0; i<ROUNDS; i++){
+      const t0 = performance.now();
+      edit(i);
+      ms += performance.now() - t0;
+      const c = countMutations(observer.takeRecords());
+      ops += c.ops; nodes += c.nodes;
+    }
+    rows.push({ edit:name, mutationsPerEdit:ops/ROUNDS, nodesPerEdit:nodes/ROUNDS, msPerEdit:ms/ROUNDS });
+  }
+  observer.disconnect();
+
+  const out = document.getElementById('benchOut');
+  out.textContent = 'edit'.padEnd(26) + 'mutations/edit'.padStart(16) + 'nodes/edit'.padStart(12) + 'ms/edit'.padStart(10) + '\n' +
+    rows.map(r => r.edit.padEnd(26) + r.mutationsPerEdit.toFixed(1).padStart(16) +
+      r.nodesPerEdit.toFixed(1).padStart(12) + r.msPerEdit.toFixed(3).padStart(10)).join('\n');
+  window.mealsyncBench = rows;
+}
+
+run();
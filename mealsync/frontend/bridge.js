@@ -0,0 +1,172 @@
+import { addToDelta, deltaPaths } from './state.js';
+import { decodePlan } from './codec.js';
+import { catalogVersion, setCatalog } from './catalog.js';
+import { onRender, componentReady, setComponentValue } from './streamlit.js';
+
+/* Two-way plan sync with the Python side.
+
+   Client -> server: every store change is folded into a pending delta
+   tagged with a sequence number.  The value we report carries the merged
+   delta of everything the server has not acknowledged yet; the server
+   echoes the highest seq it applied as args.ack and we drop those.
+
+   Server -> client: args.patches is a list of {seq, delta} or
+   {seq, replace} (a packed plan that supersedes ours); each is applied once
+   and acknowledged through pushAck in our next value.  args.needFull
+   means the server has no plan to apply our deltas to (it restarted);
+   we answer with the whole plan.
+
+   The server numbers the versions of a user's plan; args.version is the
+   one our copy reaches once the patches are applied and we report it back
+   as `base` with our next change.  Patches carry the other sessions' edits (another tab, another
+   device) merged per slot: a slot we changed and the server has not
+   acknowledged yet keeps our value, since our edit is the newer one and
+   wins on the server too.
+
+   The menu arrives as args.catalog only while the catalogVersion we report
+   differs from the server's, so it crosses the wire once per change.
+
+   args.metrics turns sampling on for this page (see metrics.js); samples
+   then ride along with the values we report. */
+export function createBridge(store, { onPatch, onReplace, onCatalog, metrics } = {}){
+  const sid = Math.random().toString(36).slice(2);
+  let seq = 0;
+  let current = {};        // changes not yet flushed
+  let dirty = false;
+  let pending = [];        // [{seq, delta}] flushed, not yet acknowledged
+  let fullSeq = 0;         // seq of the latest full snapshot, if unacked
+  let pushAck = 0;
+  let base = 0;            // server version of the plan we hold
+  let started = false;
+  const stats = { patches:0, protectedSlots:0 };
+
+  function report(){
+    const value = { sid, seq, pushAck, base, catalogVersion };
+    const sampled = metrics && metrics.drain();
+    if(sampled) value.metrics = sampled;
+    if(fullSeq){
+      value.full = store.state;
+    } else {
+      const merged = {};
+      for(const p of pending) mergeInto(merged, p.delta);
+      value.delta = merged;
+    }
+    setComponentValue(value);
+  }
+
+  /* Replace the server's copy wholesale (first load, reset, or a server
+     that lost it). */
+  function sendFull(){
+    seq += 1;
+    fullSeq = seq;
+    pending = [];
+    current = {};
+    dirty = false;
+    report();
+  }
+
+  /* Edits from the server or from another tab (whose own session sends
+     them) are not echoed back. */
+  store.subscribe((path, value, prev, origin)=>{
+    if(origin) return;
+    addToDelta(current, path, value);
+    dirty = true;
+  });
+
+  /* `delta` without the slots we changed and the server has not applied. */
+  function unlessPending(delta){
+    const mine = {};
+    mergeInto(mine, current);
+    for(const p of pending) mergeInto(mine, p.delta);
+    let out = null;
+    for(const [path, v] of deltaPaths(delta)){
+      if(hasPath(mine, path)){ stats.protectedSlots += 1; continue; }
+      addToDelta(out || (out = {}), path, v);
+    }
+    return out;
+  }
+
+  return {
+    sid,
+    stats,
+    unlessPending,
+    /* Send whatever changed since the last flush. */
+    flush(){
+      if(!started || !dirty) return;
+      seq += 1;
+      if(fullSeq) fullSeq = seq;   // the snapshot already carries it
+      else pending.push({ seq, delta: current });
+      current = {};
+      dirty = false;
+      report();
+    },
+    sendFull,
+    start(){
+      onRender((args)=>{
+        let changed = false;
+        if(metrics) metrics.enable(args.metrics);
+        if(args.catalog && args.catalog.version !== catalogVersion){
+          setCatalog(args.catalog);
+          if(onCatalog) onCatalog(args.catalog);
+          changed = true;
+        }
+        const ack = args.sid === sid ? (args.ack || 0) : 0;
+        if(ack){
+          pending = pending.filter(p => p.seq > ack);
+          if(fullSeq && ack >= fullSeq) fullSeq = 0;
+        }
+        const patches = (args.patches || []).filter(p => p.seq > pushAck);
+        if(patches.length){
+          const applied = [];
+          for(const p of patches){
+            if(p.replace){
+              onReplace(decodePlan(p.replace));
+              applied.push(p);
+              continue;
+            }
+            const delta = fullSeq ? null : unlessPending(p.delta);
+            if(delta){
+              store.applyDelta(delta, 'server');
+              applied.push({ seq: p.seq, delta });
+            }
+          }
+          stats.patches += patches.length;
+          pushAck = patches[patches.length-1].seq;
+          if(onPatch && applied.length) onPatch(applied);
+          changed = true;
+        }
+        // A new base alone is not worth a rerun; it goes with the next change.
+        if(args.sid === sid && args.version) base = args.version;
+        if(args.sid === sid && args.needFull && !fullSeq) sendFull();
+        else if(changed) report();
+      });
+      started = true;
+      componentReady();
+      sendFull();
+    }
+  };
+}
+
+function hasPath(tree, path){
+  let node = tree;
+  for(const p of path){
+    if(node == null || typeof node !== 'object') return false;
+    if(!(p in node)) return false;
+    node = node[p];
+    if(node == null || typeof node !== 'object') return true;   // a leaf, or a whole section we set
+  }
+  return true;
+}
+
+function mergeInto(target, delta){
+  for(const k in delta){
+    const v = delta[k];
+    if(v && typeof v === 'object'){
+      if(!target[k] || typeof target[k] !== 'object') target[k] = {};
+      mergeInto(target[k], v);
+    } else {
+      target[k] = v;
+    }
+  }
+  return target;
+}
@@ -0,0 +1,147 @@
+import {
+  BREAKFAST_DEFAULTS, LUNCH_DEFAULTS, DINNER_DEFAULTS, defaultFor, getBreakfastConfig, optionsFor
+} from './catalog.js';
+import { horizonOf, mainTypeFor } from './state.js';
+
+/* ---------- Bulk edits ----------
+   Copy a week, fill one slot across weeks, clear a meal type or apply a
+   template.  bulkDelta() only computes the change as one delta; the page
+   applies it with store.applyDelta() inside one undo step and renders
+   once.  Port of mealsync/bulk.py, with the same JSON operations:
+
+     {op:'copy_week', source:1, targets:[2,3]}
+     {op:'fill', day:0, meal:'dinner', item:'d-dosa', weeks:null}
+     {op:'clear', meal:'breakfast', weeks:[3]}
+     {op:'template', days:{0:{main:'lunch', lunch:'l-biryani'}}}
+     {op:'template', default:2, weeks:[5,6]}
+
+   weeks / targets default to every week of the plan. */
+
+const MEAL_TYPES = ['breakfast', 'lunch', 'dinner'];
+const MAINS = ['breakfast', 'lunch'];
+
+function weeksOf(s, weeks){
+  const n = horizonOf(s);
+  if(weeks == null) return Array.from({length:n}, (_, i) => i + 1);
+  const out = [...new Set(weeks.map(Number))].sort((a, b) => a - b);
+  if(out.length && !(out[0] >= 1 && out[out.length-1] <= n)) throw new Error(`weeks must be within 1-${n}`);
+  return out;
+}
+
+/* Week w as its day cards show it, lazy defaults filled in. */
+function shownWeek(s, w){
+  const wk = Object.assign({}, s.weeks[w]);
+  for(let d=0; d<7; d++){
+    const main = mainTypeFor(s, w, d);
+    const key = `sel-${w}-${d}-${main}`;
+    const def = main === 'breakfast' ? getBreakfastConfig(w, d).defaultId : null;
+    if(!(key in wk)) wk[key] = def || 'skip';
+    else if(def && wk[key] === 'skip' && !s.modified[key]) wk[key] = def;
+    if(!(`sel-${w}-${d}-dinner` in wk)) wk[`sel-${w}-${d}-dinner`] = 'skip';
+    for(const meal of [main, 'dinner']){
+      const pk = `price-${w}-${d}-${meal}`;
+      if(wk[`sel-${w}-${d}-${meal}`] === 'custom' && !(pk in wk)) wk[pk] = '0';
+    }
+  }
+  return wk;
+}
+
+const rename = (key, w) => key.replace(/^(sel|price)-\d+-/, `$1-${w}-`);
+
+const offered = (w, d, meal, item) =>
+  (item === 'skip' || item === 'custom') ? !(meal === 'breakfast' && d === 6)
+                                         : optionsFor(meal, w, d).some(o => o.id === item);
+
+function setSlot(delta, w, d, meal, item, price){
+  if(!MEAL_TYPES.includes(meal)) throw new Error(`unknown meal type ${meal}`);
+  if(meal === 'breakfast' && d === 6) throw new Error('Sunday has no breakfast');
+  if(!offered(w, d, meal, item)) throw new Error(`${item} is not a ${meal} option in week ${w}, day ${d}`);
+  const wk = delta.weeks[w] || (delta.weeks[w] = {});
+  const key = `sel-${w}-${d}-${meal}`;
+  wk[key] = item;
+  if(item === 'custom') wk[`price-${w}-${d}-${meal}`] = price == null ? '0' : String(price);
+  if(MAINS.includes(meal)){
+    if(d !== 6) delta.dayChoice[`${w}-w${d}`] = meal;
+    delta.modified[key] = true;
+  }
+}
+
+const empty = () => ({ weeks:{}, dayChoice:{}, modified:{} });
+
+export function defaultTemplate(week){
+  const days = {};
+  for(let d=0; d<7; d++){
+    if(d === 6){ days[d] = { lunch:'skip', dinner:'skip' }; continue; }
+    const b = defaultFor(BREAKFAST_DEFAULTS, week, d), l = defaultFor(LUNCH_DEFAULTS, week, d);
+    const main = !b && l ? 'lunch' : 'breakfast';
+    days[d] = { main, [main]: (main === 'lunch' ? l : b) || 'skip', dinner: defaultFor(DINNER_DEFAULTS, week, d) || 'skip' };
+  }
+  return days;
+}
+
+const OPERATIONS = {
+  copy_week(s, { source, targets }){
+    source = Number(source);
+    weeksOf(s, [source]);
+    const src = shownWeek(s, source);
+    const delta = empty();
+    for(const w of weeksOf(s, targets)){
+      if(w === source) continue;
+      const next = {};
+      for(const k in src) next[rename(k, w)] = src[k];
+      const old = s.weeks[w] || {};
+      const wk = delta.weeks[w] = {};
+      for(const k in old) if(!(k in next)) wk[k] = null;
+      Object.assign(wk, next);
+      for(let d=0; d<6; d++) delta.dayChoice[`${w}-w${d}`] = mainTypeFor(s, source, d);
+      for(const k in s.modified) if(k.startsWith(`sel-${w}-`)) delta.modified[k] = null;
+      for(let d=0; d<7; d++) delta.modified[`sel-${w}-${d}-${mainTypeFor(s, source, d)}`] = true;
+    }
+    return delta;
+  },
+  fill(s, { day, meal, item, weeks, price }){
+    day = Number(day);
+    if(!(day >= 0 && day <= 6)) throw new Error(`day must be 0-6`);
+    const delta = empty();
+    for(const w of weeksOf(s, weeks)) setSlot(delta, w, day, meal, item, price);
+    return delta;
+  },
+  clear(s, { meal, weeks, days }){
+    if(!MEAL_TYPES.includes(meal)) throw new Error(`unknown meal type ${meal}`);
+    const delta = empty();
+    for(const w of weeksOf(s, weeks)){
+      const wk = delta.weeks[w] = {};
+      for(const d of days ? days.map(Number) : [0, 1, 2, 3, 4, 5, 6]){
+        if(meal === 'breakfast' && d === 6) continue;
+        const key = `sel-${w}-${d}-${meal}`;
+        wk[key] = 'skip';
+        wk[`price-${w}-${d}-${meal}`] = null;
+        if(MAINS.includes(meal)) delta.modified[key] = true;
+      }
+    }
+    return delta;
+  },
+  template(s, { days, weeks, default: def }){
+    if(def != null) days = defaultTemplate(Number(def));
+    const delta = empty();
+    for(const w of weeksOf(s, weeks)){
+      for(const [dk, spec] of Object.entries(days || {})){
+        const d = Number(dk);
+        if(spec.main != null && !MAINS.includes(spec.main)) throw new Error(`main must be breakfast or lunch`);
+        for(const meal of MEAL_TYPES){
+          /* Breakfast specials only exist on their rotation day. */
+          if(meal in spec && (meal !== 'breakfast' || offered(w, d, meal, spec[meal]))) setSlot(delta, w, d, meal, spec[meal]);
+        }
+        if(spec.main && d !== 6) delta.dayChoice[`${w}-w${d}`] = spec.main;
+      }
+    }
+    return delta;
+  }
+};
+
+/* The delta of one operation ({op, ...arguments}); throws on a bad one. */
+export function bulkDelta(s, op){
+  const fn = OPERATIONS[op && op.op];
+  if(!fn) throw new Error(`unknown bulk operation ${op && op.op}`);
+  return fn(s, op);
+}
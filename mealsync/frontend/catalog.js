@@ -0,0 +1,116 @@
+/* ---------- Data ----------
+   The menu comes from the server (data/menu.json) as id-keyed maps; the
+   built-in copy below only covers the first paint before it arrives.
+   Lists keep option order, itemIndex makes lookups by id O(1). */
+export let breakfastBase = [];
+export let breakfastAll  = [];
+export let lunchOptions  = [];
+export let dinnerOptions = [];
+export let catalogVersion = null;
+let itemIndex = { breakfast:new Map(), lunch:new Map(), dinner:new Map() };
+
+const BUILTIN_MENU = {
+  breakfast: {
+    medu:   {name:'Medu vada',   price:20, base:true},
+    pongal: {name:'Pongal',      price:25, base:true},
+    sambar: {name:'Sambar vada', price:32, base:true},
+    curd:   {name:'Curd vada',   price:32, base:true},
+    pav:    {name:'Pav bhaji',   price:38},
+    maggi:  {name:'Maggi',       price:38},
+    alu:    {name:'Alu paratha', price:38},
+    mac:    {name:'Macaroni',    price:38},
+    daal:   {name:'Daal poori',  price:38}
+  },
+  lunch: {
+    'l-biryani': {name:'Biryani',     price:85},
+    'l-sambar':  {name:'Sambar rice', price:57}
+  },
+  dinner: {
+    'd-dosa':     {name:'Dosa',     price:48},
+    'd-fish':     {name:'Fish',     price:90},
+    'd-veg':      {name:'Veg',      price:95},
+    'd-chicken':  {name:'Chicken',  price:110},
+    'd-mushroom': {name:'Mushroom', price:80},
+    'd-biryani':  {name:'Biryani',  price:131}
+  }
+};
+
+export function setCatalog(data){
+  const lists = {};
+  const index = {};
+  for(const meal of ['breakfast', 'lunch', 'dinner']){
+    lists[meal] = Object.entries(data[meal] || {}).map(([id, item]) => Object.assign({id}, item));
+    index[meal] = new Map(lists[meal].map(item => [item.id, item]));
+  }
+  breakfastAll = lists.breakfast;
+  breakfastBase = breakfastAll.filter(item => item.base);
+  lunchOptions = lists.lunch;
+  dinnerOptions = lists.dinner;
+  itemIndex = index;
+  catalogVersion = data.version || null;
+}
+
+setCatalog(BUILTIN_MENU);
+
+export function findItem(mealType, id){
+  return itemIndex[mealType === 'breakfast' || mealType === 'lunch' ? mealType : 'dinner'].get(id);
+}
+
+export const DEFAULT_BUDGETS = { weekly:840, sunday:2140, weekdays:3360, grandTotal:5500 };
+export const WEEK_DAYS = ['Mon','Tue','Wed','Thu','Fri','Sat','Sun'];
+export const WEEKS = 4;        // default horizon
+export const MAX_WEEKS = 52;
+/* A day total above its limit shows red on the card. */
+export const WEEKDAY_LIMIT = 140;
+export const SUNDAY_LIMIT = 535;
+
+export function dayLimit(day){
+  return day === 6 ? SUNDAY_LIMIT : WEEKDAY_LIMIT;
+}
+
+/* Default plan taken from your table
+   Index day 0=Mon ... 6=Sun; longer horizons repeat the four weeks.
+*/
+export const BREAKFAST_DEFAULTS = {
+  1: {0:null,    1:'pav',   2:null,   3:'maggi', 4:'medu', 5:'alu',  6:null},
+  2: {0:null,    1:'pongal',2:null,   3:'mac',   4:'mac',  5:null,   6:null},
+  3: {0:null,    1:'sambar',2:'pav',  3:null,    4:'curd', 5:null,   6:null},
+  4: {0:null,    1:'sambar',2:null,   3:'alu',   4:null,   5:'daal', 6:null}
+};
+
+export const LUNCH_DEFAULTS = {
+  1: {0:'l-biryani',1:null,       2:'l-sambar',3:null,       4:null,       5:null,       6:null},
+  2: {0:'l-biryani',1:null,       2:'l-biryani',3:null,      4:null,       5:'l-biryani',6:null},
+  3: {0:'l-biryani',1:null,       2:null,       3:'l-biryani',4:null,      5:'l-biryani',6:null},
+  4: {0:'l-biryani',1:null,       2:'l-biryani',3:null,      4:'l-biryani',5:null,       6:null}
+};
+
+export const DINNER_DEFAULTS = {
+  1: {0:'d-dosa',   1:'d-fish',   2:'d-mushroom',3:'d-veg',    4:'d-chicken',5:'d-biryani',6:null},
+  2: {0:'d-dosa',   1:'d-chicken',2:'d-dosa',    3:'d-fish',  4:'d-veg',    5:'d-chicken',6:null},
+  3: {0:'d-dosa',   1:'d-veg',    2:'d-fish',    3:'d-dosa',  4:'d-biryani',5:'d-biryani',6:null},
+  4: {0:'d-dosa',   1:'d-fish',   2:'d-dosa',    3:'d-veg',   4:'d-dosa',   5:'d-chicken',6:null}
+};
+
+export function defaultFor(table, week, day){
+  return table[(week - 1) % 4 + 1][day] || null;
+}
+
+export function getBreakfastConfig(week, dayIndex){
+  const defId = defaultFor(BREAKFAST_DEFAULTS, week, dayIndex);
+  let options = breakfastBase.slice();
+  if(defId){
+    const special = findItem('breakfast', defId);
+    if(special && !options.some(m=>m.id===defId)){
+      options.unshift(special);
+    }
+  }
+  return { defaultId:defId, options };
+}
+
+/* Options offered in a day's main / dinner select (Sunday has none). */
+export function optionsFor(mealType, week, day){
+  if(mealType === 'breakfast') return getBreakfastConfig(week, day).options;
+  if(day === 6) return [];
+  return mealType === 'lunch' ? lunchOptions : dinnerOptions;
+}
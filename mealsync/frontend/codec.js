@@ -0,0 +1,136 @@
+import { WEEKS, MAX_WEEKS } from './catalog.js';
+
+/* ---------- Packed plan format ----------
+   Version 1 stores one byte per (week, day, meal) slot instead of a
+   string-keyed map:
+
+     {v:1, w:<weeks>, sw:<selectedWeek>,
+      d:[ids...],          dictionary of item ids used by this plan
+      s:<base64 bytes>,    slot codes, index ((w-1)*7+d)*3+meal
+      sb:1|2,              bytes per slot code (2 once d outgrows a byte)
+      c:<base64 bits>,     dayChoice bitset, bit (w-1)*6+d set = lunch
+      m:<base64 bits>,     modified bitset, same index as the slots
+      p:{slot:"price"},    sparse custom prices, kept as typed
+      b:[weekly, sunday, weekdays, grandTotal]}
+
+   w is the plan's horizon.  Slot codes: 0 key absent, 1 'skip',
+   2 'custom', 3+i = d[i].  The dictionary keeps a stored plan readable
+   when the catalog changes. */
+
+export const FORMAT_VERSION = 1;
+export const MEALS = ['breakfast', 'lunch', 'dinner'];
+export const BUDGET_KEYS = ['weekly', 'sunday', 'weekdays', 'grandTotal'];
+
+const ABSENT = 0, SKIP = 1, CUSTOM = 2, FIRST_ITEM = 3;
+
+export function slotIndex(week, day, meal){ return ((week - 1) * 7 + day) * 3 + meal; }
+
+function toBase64(bytes){
+  let s = '';
+  for(let i=0; i<bytes.length; i++) s += String.fromCharCode(bytes[i]);
+  return btoa(s);
+}
+
+function fromBase64(text, length){
+  const bytes = new Uint8Array(length);
+  const s = atob(text || '');
+  for(let i=0; i<s.length && i<length; i++) bytes[i] = s.charCodeAt(i);
+  return bytes;
+}
+
+const getBit = (bits, i) => (bits[i >> 3] >> (i & 7)) & 1;
+const setBit = (bits, i) => { bits[i >> 3] |= 1 << (i & 7); };
+
+/* Weeks in the plan.  Plans from before the horizon was configurable
+   have no `horizon` and span their highest week (at least WEEKS). */
+export function horizonOf(s){
+  let n = s.horizon;
+  if(!n){
+    n = WEEKS;
+    for(const w in (s.weeks || {})) if(/^\d+$/.test(w)) n = Math.max(n, parseInt(w, 10));
+  }
+  return Math.max(1, Math.min(n, MAX_WEEKS));
+}
+
+export function encodePlan(s){
+  const weeks = horizonOf(s);
+  const nSlots = weeks * 21;
+  const codes = new Array(nSlots).fill(ABSENT);
+  const choice = new Uint8Array(Math.ceil(weeks * 6 / 8));
+  const modified = new Uint8Array(Math.ceil(nSlots / 8));
+  const dict = [], dictIndex = {};
+  const prices = {};
+
+  for(let w=1; w<=weeks; w++){
+    const wk = (s.weeks || {})[w] || {};
+    for(let d=0; d<7; d++){
+      if(d < 6 && s.dayChoice && s.dayChoice[`${w}-w${d}`] === 'lunch') setBit(choice, (w - 1) * 6 + d);
+      for(let m=0; m<3; m++){
+        const i = slotIndex(w, d, m);
+        const key = `sel-${w}-${d}-${MEALS[m]}`;
+        const sel = wk[key];
+        let code = ABSENT;
+        if(sel === 'skip') code = SKIP;
+        else if(sel === 'custom') code = CUSTOM;
+        else if(sel != null){
+          if(!(sel in dictIndex)){ dictIndex[sel] = dict.length; dict.push(sel); }
+          code = FIRST_ITEM + dictIndex[sel];
+        }
+        codes[i] = code;
+        const pk = `price-${w}-${d}-${MEALS[m]}`;
+        if(pk in wk) prices[i] = String(wk[pk]);
+        if(s.modified && s.modified[key]) setBit(modified, i);
+      }
+    }
+  }
+  const width = dict.length + FIRST_ITEM > 255 ? 2 : 1;
+  const slots = new Uint8Array(nSlots * width);
+  codes.forEach((code, i) => {
+    if(width === 1) slots[i] = code;
+    else { slots[2*i] = code & 255; slots[2*i+1] = code >> 8; }
+  });
+  const budgets = s.budgets || {};
+  return {
+    v: FORMAT_VERSION, w: weeks, sw: s.selectedWeek || 1, d: dict, sb: width,
+    s: toBase64(slots), c: toBase64(choice), m: toBase64(modified), p: prices,
+    b: BUDGET_KEYS.map(k => (k in budgets ? budgets[k] : null))
+  };
+}
+
+export function decodePlan(p){
+  if(p.v !== FORMAT_VERSION) throw new Error('unsupported plan format v' + p.v);
+  const weeks = p.w;
+  const nSlots = weeks * 21;
+  const width = p.sb || 1;
+  const bytes = fromBase64(p.s, nSlots * width);
+  const slots = width === 1 ? bytes : Uint16Array.from({length:nSlots}, (_, i) => bytes[2*i] | (bytes[2*i+1] << 8));
+  const choice = fromBase64(p.c, Math.ceil(weeks * 6 / 8));
+  const modified = fromBase64(p.m, Math.ceil(nSlots / 8));
+  const s = { selectedWeek: p.sw || 1, horizon: weeks, weeks:{}, dayChoice:{}, budgets:{}, modified:{} };
+  for(let w=1; w<=weeks; w++){
+    const wk = s.weeks[w] = {};
+    for(let d=0; d<7; d++){
+      if(d < 6) s.dayChoice[`${w}-w${d}`] = getBit(choice, (w - 1) * 6 + d) ? 'lunch' : 'breakfast';
+      for(let m=0; m<3; m++){
+        const i = slotIndex(w, d, m);
+        const key = `sel-${w}-${d}-${MEALS[m]}`;
+        const code = slots[i];
+        if(code === SKIP) wk[key] = 'skip';
+        else if(code === CUSTOM) wk[key] = 'custom';
+        else if(code >= FIRST_ITEM) wk[key] = p.d[code - FIRST_ITEM];
+        if(i in (p.p || {})) wk[`price-${w}-${d}-${MEALS[m]}`] = p.p[i];
+        if(getBit(modified, i)) s.modified[key] = true;
+      }
+    }
+  }
+  BUDGET_KEYS.forEach((k, i) => { if(p.b && p.b[i] != null) s.budgets[k] = p.b[i]; });
+  return s;
+}
+
+/* Accept any stored payload: the packed format or the legacy
+   `mealsync_state` JSON object (version 0). */
+export function migrate(payload){
+  if(payload && payload.v === FORMAT_VERSION) return decodePlan(payload);
+  if(payload && payload.v == null && (payload.weeks || payload.dayChoice || payload.budgets)) return payload;
+  throw new Error('unrecognised plan payload');
+}
@@ -0,0 +1,98 @@
+import { breakfastBase, catalogVersion, dinnerOptions, lunchOptions, optionsFor } from './catalog.js';
+
+/* ---------- Budget-fit combos ----------
+   Every (main, dinner) pair of menu items per main type, sorted by total
+   price, so the best pairs under a day's limit take a few binary searches
+   instead of a scan of all pairs.  Built lazily, once per catalog
+   version: a few hundred items a list is some 10^5 pairs, sorted once.
+
+   A day's breakfast select can offer that day's special on top of the
+   base items (getBreakfastConfig); such extra mains are paired at query
+   time with the dinners, which are kept sorted by price for that. */
+
+const EPSILON = 0.005;
+const MAX_FITS = 3;
+
+let built = null;           // { version, breakfast, lunch, dinners, dinnerPrices }
+
+/* First position in the ascending `totals` whose value exceeds x (or,
+   unless `upper`, is at least x). */
+function bound(totals, x, upper){
+  let lo = 0, hi = totals.length;
+  while(lo < hi){
+    const mid = (lo + hi) >>> 1;
+    if(upper ? totals[mid] <= x : totals[mid] < x) lo = mid + 1; else hi = mid;
+  }
+  return lo;
+}
+
+/* Pairs are sorted as one Float64Array of keys, cents * n + pair number,
+   which the native numeric sort handles without a comparator; the totals
+   come back out of the keys in whole cents. */
+function pairIndex(mains, dinners){
+  const n = mains.length * dinners.length;
+  const keys = new Float64Array(n);
+  for(let i=0, k=0; i<mains.length; i++){
+    for(let j=0; j<dinners.length; j++, k++){
+      keys[k] = Math.round((mains[i].price + dinners[j].price) * 100) * n + k;
+    }
+  }
+  keys.sort();
+  const order = new Uint32Array(n);
+  const totals = new Float64Array(n);
+  for(let p=0; p<n; p++){
+    order[p] = keys[p] % n;
+    totals[p] = Math.floor(keys[p] / n) / 100;
+  }
+  return { mains, dinners, order, totals, ids: new Set(mains.map(m => m.id)) };
+}
+
+function index(){
+  if(built && built.version === catalogVersion) return built;
+  const dinners = dinnerOptions.slice().sort((a, b) => a.price - b.price);
+  built = {
+    version: catalogVersion,
+    breakfast: pairIndex(breakfastBase, dinnerOptions),
+    lunch: pairIndex(lunchOptions, dinnerOptions),
+    dinners,
+    dinnerPrices: Float64Array.from(dinners, d => d.price)
+  };
+  return built;
+}
+
+/* Up to `k` pairs with distinct totals at or below `limit`, dearest first;
+   pair(pos) reads position `pos` of the ascending `totals`.  Each step
+   jumps past the pairs sharing a total, so this is O(k log n). */
+function walkDown(totals, limit, k, pair, out){
+  let pos = bound(totals, limit + EPSILON, true) - 1;
+  for(let taken = 0; pos >= 0 && taken < k; taken++){
+    out.push(pair(pos));
+    pos = bound(totals, totals[pos] - EPSILON, false) - 1;
+  }
+}
+
+/* The dearest (main, dinner) pairs of a day's options that fit `limit`:
+   [{main, dinner, total}], at most MAX_FITS, with distinct totals. */
+export function bestFits(mainType, week, day, limit){
+  const mains = optionsFor(mainType, week, day);
+  if(!mains.length || !optionsFor('dinner', week, day).length) return [];
+  const idx = index();
+  const pairs = idx[mainType];
+  const found = [];
+  walkDown(pairs.totals, limit, MAX_FITS, (pos) => {
+    const k = pairs.order[pos], m = pairs.dinners.length;
+    return { main: pairs.mains[(k / m) | 0], dinner: pairs.dinners[k % m], total: pairs.totals[pos] };
+  }, found);
+  for(const main of mains){
+    if(pairs.ids.has(main.id)) continue;
+    walkDown(idx.dinnerPrices, limit - main.price, MAX_FITS,
+             (pos) => ({ main, dinner: idx.dinners[pos], total: main.price + idx.dinnerPrices[pos] }), found);
+  }
+  found.sort((a, b) => b.total - a.total);
+  const out = [];
+  for(const pair of found){
+    if(out.length >= MAX_FITS) break;
+    if(!out.length || Math.abs(out[out.length - 1].total - pair.total) > EPSILON) out.push(pair);
+  }
+  return out;
+}
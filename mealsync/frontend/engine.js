@@ -0,0 +1,148 @@
+import { createStore, mainTypeFor, priceForSelection } from './state.js';
+import { DEFAULT_BUDGETS, dayLimit, optionsFor, setCatalog } from './catalog.js';
+import { createTotals } from './totals.js';
+
+/* ---------- Analysis engine ----------
+   Keeps its own copy of the plan, fed by the page's store writes, and
+   answers each batch with the summary totals, the prices and budgets
+   that do not parse and swap suggestions for the selected week.  Runs in
+   worker.js, or on the page when there is no worker (see analysis.js). */
+
+const EPSILON = 0.005;
+const MAX_SUGGESTIONS = 3;
+const PRICE_KEY = /^price-\d+-\d-(?:breakfast|lunch|dinner)$/;
+
+const isInvalid = (value) => value != null && String(value).trim() !== '' && isNaN(parseFloat(value));
+
+export function createEngine(){
+  let store = null;
+  let totals = null;
+  const invalid = new Set();   // 'week:price-key' or 'budgets:key'
+
+  function checkPrice(w, key, value){
+    const id = `${w}:${key}`;
+    if(isInvalid(value)) invalid.add(id); else invalid.delete(id);
+  }
+
+  function scanWeek(w){
+    for(const id of [...invalid]) if(id.startsWith(`${w}:`)) invalid.delete(id);
+    const wk = store.state.weeks[w] || {};
+    for(const key in wk) if(PRICE_KEY.test(key)) checkPrice(w, key, wk[key]);
+  }
+
+  function scanBudgets(){
+    for(const k in DEFAULT_BUDGETS){
+      const id = `budgets:${k}`;
+      if(isInvalid(store.state.budgets[k])) invalid.add(id); else invalid.delete(id);
+    }
+  }
+
+  function scanAll(){
+    invalid.clear();
+    for(const w in store.state.weeks) scanWeek(w);
+    scanBudgets();
+  }
+
+  function watch(path, value){
+    const [section, key, leaf] = path;
+    if(section === 'weeks' && key != null){
+      if(leaf == null) scanWeek(key);
+      else if(PRICE_KEY.test(leaf)) checkPrice(key, leaf, value);
+    } else if(section === 'weeks'){
+      scanAll();
+    } else if(section === 'budgets'){
+      scanBudgets();
+    }
+  }
+
+  function reset(state){
+    store = createStore(state);
+    store.subscribe(watch);
+    totals = createTotals(store);
+    scanAll();
+  }
+
+  /* Cheapest change that brings one slot's day back under its limit or,
+     failing that, the largest saving a single swap offers. */
+  function bestSwap(w, d, type, over){
+    const s = store.state;
+    const from = (s.weeks[w] || {})[`sel-${w}-${d}-${type}`] || 'skip';
+    if(from === 'skip') return null;
+    const price = priceForSelection(s, type, from, w, d);
+    let fit = null, best = null;
+    for(const item of optionsFor(type, w, d)){
+      const saving = price - item.price;
+      if(item.id === from || saving <= EPSILON) continue;
+      const swap = { week:w, day:d, meal:type, from, to:item.id, name:item.name, saving };
+      if(saving >= over - EPSILON){ if(!fit || saving < fit.saving) fit = swap; }
+      else if(!best || saving > best.saving) best = swap;
+    }
+    return fit || best;
+  }
+
+  /* Swaps for the selected week: first for days over their limit, then,
+     while the week is over its budget, the biggest savings left. */
+  function suggest(current){
+    const s = store.state;
+    const w = s.selectedWeek;
+    if(!s.weeks[w]) return [];
+    const out = [];
+    const used = new Set();
+    const take = (swap, reason) => {
+      if(!swap || used.has(`${swap.day}-${swap.meal}`)) return;
+      used.add(`${swap.day}-${swap.meal}`);
+      out.push(Object.assign(swap, { reason }));
+    };
+    for(let d=0; d<7 && out.length<MAX_SUGGESTIONS; d++){
+      const over = totals.day(w, d) - dayLimit(d);
+      if(over <= EPSILON) continue;
+      const swaps = [bestSwap(w, d, mainTypeFor(s, w, d), over), bestSwap(w, d, 'dinner', over)].filter(Boolean);
+      const fits = swaps.filter(x => x.saving >= over - EPSILON);
+      const pick = fits.length ? fits.reduce((a, b) => b.saving < a.saving ? b : a)
+                               : swaps.reduce((a, b) => b.saving > a.saving ? b : a, null);
+      take(pick, 'day');
+    }
+    const budget = parseFloat(s.budgets.weekly || DEFAULT_BUDGETS.weekly);
+    let over = current - budget - out.reduce((sum, x) => sum + x.saving, 0);
+    if(over > EPSILON && out.length < MAX_SUGGESTIONS){
+      const swaps = [];
+      for(let d=0; d<6; d++){
+        for(const type of [mainTypeFor(s, w, d), 'dinner']){
+          if(!used.has(`${d}-${type}`)){
+            const swap = bestSwap(w, d, type, Infinity);
+            if(swap) swaps.push(swap);
+          }
+        }
+      }
+      swaps.sort((a, b) => b.saving - a.saving);
+      for(const swap of swaps){
+        if(over <= EPSILON || out.length >= MAX_SUGGESTIONS) break;
+        take(swap, 'week');
+        over -= swap.saving;
+      }
+    }
+    return out;
+  }
+
+  return {
+    /* msg: {state?, catalog?, ops?, debug?, seq}; returns the analysis,
+       with `check` (totals match a full recompute) when debugging. */
+    handle(msg){
+      if(msg.catalog) setCatalog(msg.catalog);
+      if(msg.state) reset(msg.state);
+      else if(msg.catalog && totals) totals.rebuild();
+      if(!store) return null;
+      if(msg.ops) for(const [path, value] of msg.ops) store.set(path, value);
+      const summary = totals.summary();
+      const result = {
+        seq: msg.seq,
+        summary,
+        invalid: [...invalid],
+        suggestions: suggest(summary.current)
+      };
+      if(msg.debug) result.check = totals.check();
+      return result;
+    },
+    check(){ return totals ? totals.check() : true; }
+  };
+}
@@ -0,0 +1,123 @@
+/* ---------- Undo / redo ----------
+   A history step is the list of [path, before, after] writes one user
+   action made through the store, not a copy of the plan: consecutive
+   versions share everything except those paths, so a step costs about
+   the size of the change.  Whole-section writes (reset) keep the replaced
+   section object by reference rather than cloning it.
+
+   Only writes made inside track() are recorded; materialized defaults,
+   remote patches and week navigation are not.  Undo and redo replay a
+   step's writes through the store, so totals, the journal and the
+   bridge see ordinary O(1) changes.  Steps are costed by their JSON
+   size and the oldest are dropped once the undo stack passes maxBytes. */
+
+/* Keystrokes in one price box within this window make one step. */
+const MERGE_MS = 1000;
+
+function sizeOf(value){
+  if(value === undefined) return 4;
+  if(typeof value === 'string') return value.length + 2;
+  return JSON.stringify(value).length;
+}
+
+function stepBytes(ops){
+  let bytes = 16;
+  for(const [path, before, after] of ops){
+    bytes += 8 + sizeOf(before) + sizeOf(after);
+    for(const p of path) bytes += String(p).length + 3;
+  }
+  return bytes;
+}
+
+const samePath = (a, b) => a.length === b.length && a.every((p, i) => String(p) === String(b[i]));
+
+export function createHistory(store, { maxBytes = 512 * 1024 } = {}){
+  const undoStack = [];        // oldest first
+  const redoStack = [];        // most recently undone last
+  const stats = { steps:0, bytes:0, evicted:0, undos:0, redos:0 };
+  let recording = null;        // ops of the step being tracked
+  let replaying = false;
+
+  store.subscribe((path, value, prev)=>{
+    if(recording && !replaying) recording.push([path, prev, value == null ? undefined : value]);
+  });
+
+  function evict(){
+    while(stats.bytes > maxBytes && undoStack.length > 1){
+      stats.bytes -= undoStack.shift().bytes;
+      stats.evicted += 1;
+    }
+    stats.steps = undoStack.length;
+  }
+
+  function push(ops){
+    const now = Date.now();
+    const top = undoStack[undoStack.length - 1];
+    redoStack.length = 0;
+    if(top && ops.length === 1 && top.ops.length === 1 && now - top.at < MERGE_MS &&
+       samePath(top.ops[0][0], ops[0][0]) && typeof ops[0][2] !== 'object'){
+      stats.bytes -= top.bytes;
+      top.ops[0][2] = ops[0][2];
+      top.bytes = stepBytes(top.ops);
+      top.at = now;
+      stats.bytes += top.bytes;
+    } else {
+      const step = { ops, bytes: stepBytes(ops), at: now };
+      undoStack.push(step);
+      stats.bytes += step.bytes;
+    }
+    evict();
+  }
+
+  function replay(step, forward){
+    replaying = true;
+    try{
+      if(forward) for(const [path, , after] of step.ops) store.set(path, after);
+      else for(let i=step.ops.length-1; i>=0; i--) store.set(step.ops[i][0], step.ops[i][1]);
+    } finally {
+      replaying = false;
+    }
+    return step.ops;
+  }
+
+  return {
+    stats,
+    /* Run fn() as one undoable step. */
+    track(fn){
+      if(recording) return fn();       // nested: part of the outer step
+      recording = [];
+      try{
+        return fn();
+      } finally {
+        const ops = recording;
+        recording = null;
+        if(ops.length) push(ops);
+      }
+    },
+    canUndo(){ return undoStack.length > 0; },
+    canRedo(){ return redoStack.length > 0; },
+    /* Revert the latest step; returns the writes it touched, or null. */
+    undo(){
+      const step = undoStack.pop();
+      if(!step) return null;
+      stats.bytes -= step.bytes;
+      stats.steps = undoStack.length;
+      stats.undos += 1;
+      redoStack.push(step);
+      return replay(step, false);
+    },
+    redo(){
+      const step = redoStack.pop();
+      if(!step) return null;
+      undoStack.push(step);
+      stats.bytes += step.bytes;
+      stats.redos += 1;
+      evict();
+      return replay(step, true);
+    },
+    clear(){
+      undoStack.length = redoStack.length = 0;
+      stats.bytes = stats.steps = 0;
+    }
+  };
+}
@@ -0,0 +1,129 @@
+/* ---------- Edit journal ----------
+   Every store change is recorded as an [n, path, value] operation (value
+   null deletes).  flush() appends the operations since the last flush to
+   `<key>_log` instead of rewriting the packed plan in `<key>`; repeated
+   writes to one path between flushes (custom price keystrokes) collapse
+   into one operation.  localStorage can only replace a value, so the log
+   itself is rewritten, but it stays small: once it passes maxOps or
+   maxBytes it is compacted into a fresh snapshot tagged with the last
+   operation it contains (`j`) and the log restarts.  Loading is the
+   snapshot plus the log entries past its tag (readJournal).
+
+   Tabs of one origin share the log.  Each flush appends to the log as
+   stored, not to this tab's copy of it, and numbers its operations after
+   the newest one any tab wrote; edits that arrive from another tab were
+   journaled there and are skipped here. */
+
+export const LOG_SUFFIX = '_log';
+
+function lastIndex(log){
+  const end = log.lastIndexOf('\n', log.length - 2);
+  const line = log.slice(end + 1).trim();
+  if(!line) return 0;
+  try{ return JSON.parse(line)[0] || 0; } catch(e){ return 0; }
+}
+
+/* Operations logged after snapshot tag `after`, oldest first. */
+export function readJournal(key, after=0){
+  const log = localStorage.getItem(key + LOG_SUFFIX) || '';
+  const ops = [];
+  for(const line of log.split('\n')){
+    if(!line) continue;
+    try{
+      const op = JSON.parse(line);
+      if(op[0] > after) ops.push(op);
+    } catch(e){ break; }     // a torn last line ends the log
+  }
+  return ops;
+}
+
+function snapshotTag(key){
+  try{ return JSON.parse(localStorage.getItem(key) || '{}').j || 0; } catch(e){ return 0; }
+}
+
+export function applyOp(s, path, value){
+  let node = s;
+  for(let i=0; i<path.length-1; i++){
+    if(!node[path[i]] || typeof node[path[i]] !== 'object') node[path[i]] = {};
+    node = node[path[i]];
+  }
+  const last = path[path.length-1];
+  if(value == null) delete node[last];
+  else node[last] = value;
+}
+
+/* snapshot(n) returns the serialized plan tagged with operation n. */
+export function createJournal(store, key, snapshot, { maxOps=200, maxBytes=16384 } = {}){
+  const logKey = key + LOG_SUFFIX;
+  const stats = { ops:0, appends:0, snapshots:0, bytesWritten:0, logBytes:0, resyncs:0 };
+  let log = localStorage.getItem(logKey) || '';
+  let logOps = log ? log.split('\n').filter(Boolean).length : 0;
+  let n = Math.max(snapshotTag(key), lastIndex(log));
+  const pending = new Map();     // JSON path -> [path, value]
+  let full = false;
+
+  store.subscribe((path, value, prev, origin)=>{
+    if(origin === 'tab') return;
+    const id = JSON.stringify(path);
+    pending.delete(id);          // keep the latest write last
+    pending.set(id, [path, value]);
+  });
+
+  /* Other tabs' writes; the storage event only fires in the tabs that
+     did not make the change. */
+  if(typeof window !== 'undefined') window.addEventListener('storage', (e)=>{
+    if(e.key === key && e.newValue){
+      try{ n = Math.max(n, JSON.parse(e.newValue).j || 0); } catch(err){}
+    } else if(e.key === logKey){
+      n = Math.max(n, lastIndex(e.newValue || ''));
+    }
+  });
+
+  function compact(){
+    const raw = snapshot(n);
+    localStorage.setItem(key, raw);
+    localStorage.removeItem(logKey);
+    log = '';
+    logOps = 0;
+    full = false;
+    stats.snapshots += 1;
+    stats.bytesWritten += raw.length;
+    stats.logBytes = 0;
+    return raw.length;
+  }
+
+  return {
+    stats,
+    /* Write what changed; returns the bytes written (0 if nothing). */
+    flush(){
+      if(!pending.size) return full ? compact() : 0;
+      /* Another tab appended or compacted since our last write. */
+      const stored = localStorage.getItem(logKey) || '';
+      if(stored !== log){
+        if(!stored.startsWith(log)) n = Math.max(n, snapshotTag(key));
+        log = stored;
+        logOps = log ? log.split('\n').filter(Boolean).length : 0;
+        n = Math.max(n, lastIndex(log));
+        stats.resyncs += 1;
+      }
+      let lines = '';
+      for(const [path, value] of pending.values()){
+        n += 1;
+        lines += JSON.stringify([n, path, value]) + '\n';
+      }
+      stats.ops += pending.size;
+      logOps += pending.size;
+      pending.clear();
+      if(full || logOps > maxOps || log.length + lines.length > maxBytes) return compact();
+      log += lines;
+      localStorage.setItem(logKey, log);
+      stats.appends += 1;
+      stats.bytesWritten += lines.length;
+      stats.logBytes = log.length;
+      return lines.length;
+    },
+    /* The state was replaced wholesale (reset, server replace): the next
+       flush writes a snapshot instead of operations. */
+    snapshotNext(){ full = true; pending.clear(); }
+  };
+}
@@ -0,0 +1,411 @@
+import { DEFAULT_BUDGETS, WEEK_DAYS, findItem } from './catalog.js';
+import {
+  defaultState, deltaPaths, ensureStructure, horizonOf, loadState, createStore,
+  materializeDay, materializeBudgets, serializeState, STORAGE_KEY
+} from './state.js';
+import { createBulkBar, createGrid, diffHtml } from './render.js';
+import { bulkDelta } from './bulk.js';
+import { createAnalysis } from './analysis.js';
+import { createBridge } from './bridge.js';
+import { createPersistence } from './persist.js';
+import { createJournal } from './journal.js';
+import { createHistory } from './history.js';
+import { createTabSync } from './tabs.js';
+import { createMetrics } from './metrics.js';
+import { setFrameHeight } from './streamlit.js';
+
+/* ---------- State ---------- */
+const metrics = createMetrics();
+const loadStart = performance.now();
+const state = loadState();
+metrics.startup('loadState', performance.now() - loadStart);
+const store = createStore(state);
+/* Totals, validation and suggestions come back from the analysis worker. */
+const analysis = createAnalysis(store, { onResult: showAnalysis });
+const bridge = createBridge(store, {
+  metrics,
+  onPatch(patches){
+    if(patches.some(p => p.replace)){ makeWeekButtons(); renderWeek(); commit(); }
+    else showRemote(patches.flatMap(p => deltaPaths(p.delta).map(([path]) => path)));
+  },
+  onCatalog(catalog){ analysis.setCatalog(catalog); if(bulkBar) bulkBar.refresh(); if(grid){ renderWeek(); commit(); } },
+  onReplace(next){
+    replaceState(next);
+    journal.snapshotNext();
+  }
+});
+const journal = createJournal(store, STORAGE_KEY, (n) => serializeState(state, n));
+/* Other tabs' edits, merged per slot like the server's patches. */
+const tabs = createTabSync(store, STORAGE_KEY, {
+  onDelta(delta){
+    const theirs = bridge.unlessPending(delta);
+    if(!theirs) return;
+    store.applyDelta(theirs, 'tab');
+    showRemote(deltaPaths(theirs).map(([path]) => path));
+  },
+  onReplace(next){
+    replaceState(Object.assign(next, { selectedWeek: state.selectedWeek }));
+    makeWeekButtons(); renderWeek(); commit();
+  }
+});
+/* The bridge delta and the tab broadcast ride along with each coalesced write. */
+const persistence = createPersistence(() => metrics.span('saveState', () => journal.flush()), {
+  onFlush(){ bridge.flush(); tabs.flush(); }
+});
+const history = createHistory(store);
+
+const setWeekKey = (week, key, value) => store.set(['weeks', week, key], value);
+
+/* Week buttons shown at once; longer horizons scroll with the arrows. */
+const WEEK_WINDOW = 8;
+
+let grid = null;
+let bulkBar = null;
+
+/* Persist locally and hand the delta to the Python side, coalesced. */
+function commit(){
+  persistence.schedule();
+}
+
+/* Patch one day card (after filling its lazy defaults). */
+function renderDay(day){
+  materializeDay(store, state.selectedWeek, day);
+  grid.patchDay(day);
+}
+
+function renderWeek(){
+  metrics.span('renderWeek', ()=>{
+    for(let day=0; day<7; day++) materializeDay(store, state.selectedWeek, day);
+    materializeBudgets(store);
+    grid.patchWeek();
+  });
+}
+
+const handlers = {
+  onMainChange(day, mainType, value){
+    const week = state.selectedWeek;
+    const key = `sel-${week}-${day}-${mainType}`;
+    setWeekKey(week, key, value);
+    store.set(['modified', key], true);
+    renderDay(day); commit();
+  },
+  onDinnerChange(day, value){
+    const week = state.selectedWeek;
+    setWeekKey(week, `sel-${week}-${day}-dinner`, value);
+    renderDay(day); commit();
+  },
+  /* A budget-fit pair from the day card: both selects, one step. */
+  onCombo(day, mainType, mainId, dinnerId){
+    const week = state.selectedWeek;
+    const key = `sel-${week}-${day}-${mainType}`;
+    setWeekKey(week, key, mainId);
+    store.set(['modified', key], true);
+    setWeekKey(week, `sel-${week}-${day}-dinner`, dinnerId);
+    renderDay(day); commit();
+  },
+  onToggle(day){
+    const key = `${state.selectedWeek}-w${day}`;
+    store.set(['dayChoice', key], state.dayChoice[key] === 'breakfast' ? 'lunch' : 'breakfast');
+    renderDay(day); commit();
+  },
+  onPrice(day, mealType, value){
+    const week = state.selectedWeek;
+    setWeekKey(week, `price-${week}-${day}-${mealType}`, value);
+    grid.patchDay(day); commit();
+  },
+  onBudget(k, value){
+    store.set(['budgets', k], value); commit();
+  },
+  onBudgetDefault(k){
+    store.set(['budgets', k], DEFAULT_BUDGETS[k].toFixed(2));
+    grid.patchBudgets(); commit();
+  }
+};
+
+/* Every handler is one undoable step. */
+for(const name of Object.keys(handlers)){
+  const fn = handlers[name];
+  handlers[name] = (...args) => { history.track(() => fn(...args)); updateHistoryButtons(); };
+}
+
+const SECTIONS = ['weeks', 'dayChoice', 'modified', 'budgets'];
+
+/* Swap in a plan from elsewhere; it is not an undoable step. */
+function replaceState(next){
+  for(const k of Object.keys(state)) delete state[k];
+  Object.assign(state, ensureStructure(next));
+  analysis.reset();
+  history.clear();
+  updateHistoryButtons();
+}
+
+/* The plan changed wholesale: snapshot, resend and repaint it all. */
+function refreshAll(){
+  journal.snapshotNext();
+  makeWeekButtons();
+  renderWeek();
+  persistence.schedule();
+  bridge.sendFull();
+  tabs.sendFull();
+}
+
+/* RESET EVERYTHING to defaults (the horizon is kept).  The old sections
+   are swapped out whole, so Undo brings them back. */
+function resetAll(){
+  const fresh = defaultState(horizonOf(state));
+  history.track(()=>{
+    for(const k of SECTIONS) store.set([k], fresh[k]);
+    store.set(['selectedWeek'], 1);
+  });
+  refreshAll();
+  updateHistoryButtons();
+}
+
+/* A bulk edit is one store transaction: one undo step, one flush and one
+   repaint of the visible week.  Returns an error message or null. */
+function applyBulk(op, scope='all'){
+  const week = state.selectedWeek;
+  const horizon = horizonOf(state);
+  const key = op.op === 'copy_week' ? 'targets' : 'weeks';
+  const spec = Object.assign({}, op);
+  if(op.op === 'copy_week') spec.source = week;
+  if(!(key in op)){
+    if(scope === 'this') spec[key] = [week];
+    else if(scope === 'later') spec[key] = Array.from({length: horizon - week}, (_, i) => week + i + 1);
+  }
+  let delta;
+  try{
+    delta = bulkDelta(state, spec);
+  } catch(err){
+    return err.message;
+  }
+  history.track(() => store.applyDelta(delta));
+  renderWeek(); commit();
+  updateHistoryButtons();
+  return null;
+}
+
+/* Week and day of a weeks/modified/dayChoice path, if it names a slot. */
+function slotOf(path){
+  const [section, key, leaf] = path;
+  let m = null;
+  if(section === 'weeks' && leaf != null) m = /^(?:sel|price)-(\d+)-(\d)-/.exec(leaf);
+  else if(section === 'modified' && key != null) m = /^sel-(\d+)-(\d)-/.exec(key);
+  else if(section === 'dayChoice' && key != null) m = /^(\d+)-w(\d)$/.exec(key);
+  return m ? [+m[1], +m[2]] : null;
+}
+
+/* Repaint what changed at `paths`: the touched day cards of the visible
+   week and the budgets; anything else (horizon, whole weeks) repaints the
+   week. */
+function repaint(paths){
+  const days = new Set();
+  let budgets = false, whole = false;
+  for(const path of paths){
+    const slot = slotOf(path);
+    if(slot){ if(slot[0] === state.selectedWeek) days.add(slot[1]); }
+    else if(path[0] === 'budgets') budgets = true;
+    else if(path[0] !== 'selectedWeek') whole = true;
+  }
+  if(whole){ makeWeekButtons(); renderWeek(); return; }
+  for(const day of days) renderDay(day);
+  if(budgets) grid.patchBudgets();
+}
+
+/* Edits from the server or another tab. */
+function showRemote(paths){
+  if(state.selectedWeek > horizonOf(state)) store.set(['selectedWeek'], horizonOf(state));
+  repaint(paths);
+  commit();
+}
+
+/* Repaint after an undo/redo: only the day cards and budgets the step
+   touched, after bringing its week into view. */
+function showHistory(ops){
+  if(!ops) return;
+  if(ops.some(([path]) => path.length === 1 && SECTIONS.includes(path[0]))){
+    refreshAll();
+  } else {
+    /* Stay on the visible week if the step touched it (bulk edits span many). */
+    const touched = ops.map(([path]) => slotOf(path)).filter(Boolean).map(([w]) => w);
+    const week = touched.includes(state.selectedWeek) ? state.selectedWeek : (touched[0] ?? null);
+    if(week != null && week !== state.selectedWeek){
+      store.set(['selectedWeek'], week);
+      makeWeekButtons(); renderWeek();
+    } else {
+      repaint(ops.map(([path]) => path));
+    }
+    commit();
+  }
+  updateHistoryButtons();
+}
+
+function undo(){ showHistory(history.undo()); }
+function redo(){ showHistory(history.redo()); }
+
+function updateHistoryButtons(){
+  const u = document.getElementById('undoBtn');
+  const r = document.getElementById('redoBtn');
+  if(u && u.disabled === history.canUndo()) u.disabled = !history.canUndo();
+  if(r && r.disabled === history.canRedo()) r.disabled = !history.canRedo();
+}
+
+/* ---------- UI Builders ---------- */
+function selectWeek(week){
+  week = Math.max(1, Math.min(week, horizonOf(state)));
+  if(state.selectedWeek === week) return;
+  store.set(['selectedWeek'], week); makeWeekButtons(); renderWeek(); commit();
+}
+
+/* At most WEEK_WINDOW buttons exist, whatever the horizon; they are
+   relabelled as the window follows the selected week. */
+let weekNav = null;
+function makeWeekButtons(){
+  const wr = document.getElementById('weekRow');
+  if(!wr) return;
+  const horizon = horizonOf(state);
+  const count = Math.min(horizon, WEEK_WINDOW);
+  if(!weekNav || weekNav.buttons.length !== count){
+    wr.innerHTML = '';
+    const button = (onclick) => {
+      const b = document.createElement('button');
+      b.onclick = onclick;
+      wr.appendChild(b);
+      return b;
+    };
+    const prev = button(()=> selectWeek(state.selectedWeek - 1));
+    prev.innerText = '‹';
+    const buttons = [];
+    for(let i=0; i<count; i++){
+      const b = button(()=> selectWeek(b.week));
+      buttons.push(b);
+    }
+    const next = button(()=> selectWeek(state.selectedWeek + 1));
+    next.innerText = '›';
+    weekNav = { prev, next, buttons };
+  }
+  const scrolls = horizon > count;
+  const first = Math.max(1, Math.min(state.selectedWeek - (count >> 1), horizon - count + 1));
+  for(const [b, step] of [[weekNav.prev, -1], [weekNav.next, 1]]){
+    if(b.hidden === scrolls) b.hidden = !scrolls;
+    const target = state.selectedWeek + step;
+    const disabled = target < 1 || target > horizon;
+    if(b.disabled !== disabled) b.disabled = disabled;
+    if(b.className !== 'week-btn week-nav') b.className = 'week-btn week-nav';
+  }
+  weekNav.buttons.forEach((b, i)=>{
+    const w = first + i;
+    if(b.week !== w){ b.week = w; b.innerText = 'Week '+w; }
+    const cls = 'week-btn' + (state.selectedWeek===w ? ' active' : '');
+    if(b.className !== cls) b.className = cls;
+  });
+}
+
+/* Paint an analysis result: the summary totals, the inputs that do not
+   parse and the swap suggestions for the selected week. */
+function showAnalysis(result){
+  metrics.record('analysis', analysis.stats.ms);
+  metrics.span('updateSummary', () => paintAnalysis(result));
+}
+
+function paintAnalysis({ summary: t, invalid, suggestions }){
+  const bWeekly   = state.budgets.weekly    || DEFAULT_BUDGETS.weekly;
+  const bSunday   = state.budgets.sunday    || DEFAULT_BUDGETS.sunday;
+  const bWeekdays = state.budgets.weekdays  || DEFAULT_BUDGETS.weekdays;
+  const bGrand    = state.budgets.grandTotal || DEFAULT_BUDGETS.grandTotal;
+
+  const cur = document.getElementById('curWeekVal');
+  const sun = document.getElementById('sunTotalVal');
+  const wd  = document.getElementById('wdTotalVal');
+  const gr  = document.getElementById('grandVal');
+  if(cur) cur.innerHTML = '₹ '+t.current.toFixed(2) + diffHtml(t.current, bWeekly);
+  if(sun) sun.innerHTML = '₹ '+t.sunday.toFixed(2) + diffHtml(t.sunday, bSunday);
+  if(wd)  wd.innerHTML  = '₹ '+t.weekdays.toFixed(2) + diffHtml(t.weekdays, bWeekdays);
+  if(gr)  gr.innerHTML  = '₹ '+t.grand.toFixed(2) + diffHtml(t.grand, bGrand);
+  if(grid) grid.setInvalid(invalid);
+  showSuggestions(suggestions);
+}
+
+let suggestionSig = null;
+function showSuggestions(list){
+  const box = document.getElementById('suggestions');
+  const sig = JSON.stringify(list);
+  if(!box || sig === suggestionSig) return;
+  suggestionSig = sig;
+  box.replaceChildren();
+  box.hidden = !list.length;
+  for(const sx of list){
+    const b = document.createElement('button');
+    b.type = 'button';
+    b.className = 'suggestion-btn';
+    const from = findItem(sx.meal, sx.from);
+    b.textContent = `${WEEK_DAYS[sx.day]}: ${from ? from.name : 'Custom'} → ${sx.name} (save ₹ ${sx.saving.toFixed(2)})`;
+    b.title = sx.reason === 'day' ? 'Brings the day under its limit' : 'Helps the week fit its budget';
+    b.onclick = () => applySuggestion(sx);
+    box.appendChild(b);
+  }
+}
+
+/* A suggestion is an ordinary (undoable) edit, if it still applies. */
+function applySuggestion(sx){
+  const wk = state.weeks[sx.week] || {};
+  if(sx.week !== state.selectedWeek || wk[`sel-${sx.week}-${sx.day}-${sx.meal}`] !== sx.from) return;
+  if(sx.meal === 'dinner') handlers.onDinnerChange(sx.day, sx.to);
+  else handlers.onMainChange(sx.day, sx.meal, sx.to);
+}
+
+function init(){
+  ensureStructure(state);
+  const gridStart = performance.now();
+  grid = createGrid(document.getElementById('grid'), state, handlers);
+  metrics.startup('makeGrid', performance.now() - gridStart);
+  const bulkRow = document.getElementById('bulkRow');
+  if(bulkRow) bulkBar = createBulkBar(bulkRow, applyBulk);
+  makeWeekButtons();
+  renderWeek();
+  analysis.reset();
+  commit();
+  window.mealsyncState = state;
+  window.mealsyncAnalysis = analysis;
+  window.mealsyncPersistence = persistence.stats;
+  window.mealsyncJournal = journal.stats;
+  window.mealsyncHistory = history.stats;
+  window.mealsyncBulk = applyBulk;
+  window.mealsyncSync = { bridge: bridge.stats, tabs: tabs.stats };
+  window.mealsyncMetrics = metrics;
+  /* Read only when a sampled page reports. */
+  metrics.probe('stateBytes', () => serializeState(state).length);
+  metrics.probe('journalBytes', () => journal.stats.logBytes);
+  metrics.probe('domNodes', () => document.querySelectorAll('*').length);
+
+  const resetBtn = document.getElementById('resetBtn');
+  if(resetBtn){
+    resetBtn.addEventListener('click', function(){
+      if(confirm('Reset all weeks and budgets to defaults?')){
+        resetAll();
+      }
+    });
+  }
+
+  const undoBtn = document.getElementById('undoBtn');
+  const redoBtn = document.getElementById('redoBtn');
+  if(undoBtn) undoBtn.addEventListener('click', undo);
+  if(redoBtn) redoBtn.addEventListener('click', redo);
+  updateHistoryButtons();
+  /* Text boxes keep their own undo; everywhere else Ctrl+Z undoes edits. */
+  document.addEventListener('keydown', (e)=>{
+    if(!(e.ctrlKey || e.metaKey) || (e.target && e.target.tagName === 'INPUT')) return;
+    const key = e.key.toLowerCase();
+    if(key === 'z' && !e.shiftKey){ e.preventDefault(); undo(); }
+    else if((key === 'z' && e.shiftKey) || key === 'y'){ e.preventDefault(); redo(); }
+  });
+
+  const container = document.querySelector('.container');
+  new ResizeObserver(()=> setFrameHeight(Math.ceil(container.getBoundingClientRect().height) + 36))
+    .observe(container);
+
+  bridge.start();
+}
+
+/* Module scripts run after parsing, so the DOM is ready here. */
+init();
@@ -0,0 +1,54 @@
+/* ---------- Sampled instrumentation ----------
+   The server turns sampling on for some sessions (args.metrics).  Until
+   then span() just calls its function and record() returns at once, so
+   an unsampled page pays one branch per call.
+
+   Sampled pages time spans (durations in ms, at most MAX_SAMPLES per span
+   between reports) and read their probes (state bytes, DOM nodes) when a
+   report is drained.  drain() rides along with a component value the
+   page sends anyway, so metrics never cause a rerun of their own. */
+
+const MAX_SAMPLES = 64;
+
+export function createMetrics(){
+  let on = false;
+  let spans = {};              // name -> [ms, ...] since the last drain
+  const probes = {};           // name -> () => number, read at drain time
+  const early = {};            // spans recorded before sampling was known
+
+  function record(name, ms){
+    if(!on) return;
+    const list = spans[name] || (spans[name] = []);
+    if(list.length < MAX_SAMPLES) list.push(Math.round(ms * 100) / 100);
+  }
+
+  return {
+    get on(){ return on; },
+    /* Sampling decided by the server; startup spans are kept until then. */
+    enable(flag){
+      if(on === !!flag) return;
+      on = !!flag;
+      spans = {};
+      if(on) for(const name in early) record(name, early[name]);
+    },
+    span(name, fn){
+      if(!on) return fn();
+      const t0 = performance.now();
+      try{ return fn(); } finally { record(name, performance.now() - t0); }
+    },
+    record,
+    /* A span measured before the server could say whether to sample. */
+    startup(name, ms){ early[name] = ms; },
+    probe(name, fn){ probes[name] = fn; },
+    drain(){
+      if(!on) return null;
+      const gauges = {};
+      for(const name in probes){
+        try{ gauges[name] = probes[name](); } catch(e){}
+      }
+      const out = { spans, gauges };
+      spans = {};
+      return out;
+    }
+  };
+}
@@ -0,0 +1,45 @@
+/* Coalescing persistence scheduler.
+
+   schedule() only marks the state dirty; write() (the journal flush, which
+   returns the bytes it wrote) runs once per idle period (or animation
+   frame where requestIdleCallback is missing).  Leaving the page forces a
+   flush so no edit is lost. */
+export function createPersistence(write, { onFlush } = {}){
+  const stats = { requested:0, writes:0, avoided:0, bytesWritten:0, lastBytes:0 };
+  let dirty = false;
+  let handle = null;
+
+  const idle = typeof requestIdleCallback === 'function';
+
+  function cancel(){
+    if(handle === null) return;
+    if(idle) cancelIdleCallback(handle); else cancelAnimationFrame(handle);
+    handle = null;
+  }
+
+  function flush(){
+    cancel();
+    if(!dirty) return false;
+    dirty = false;
+    const bytes = write();
+    stats.writes += 1;
+    stats.lastBytes = bytes;
+    stats.bytesWritten += bytes;
+    if(onFlush) onFlush();
+    return true;
+  }
+
+  function schedule(){
+    stats.requested += 1;
+    if(dirty){ stats.avoided += 1; return; }
+    dirty = true;
+    handle = idle ? requestIdleCallback(flush, { timeout:500 }) : requestAnimationFrame(flush);
+  }
+
+  document.addEventListener('visibilitychange', ()=>{
+    if(document.visibilityState === 'hidden') flush();
+  });
+  window.addEventListener('pagehide', flush);
+
+  return { schedule, flush, stats, get pending(){ return dirty; } };
+}
@@ -0,0 +1,299 @@
+import {
+  DEFAULT_BUDGETS, WEEK_DAYS, breakfastBase, catalogVersion, dayLimit, dinnerOptions, findItem, lunchOptions, optionsFor
+} from './catalog.js';
+import { horizonOf, mainTypeFor, priceForSelection } from './state.js';
+import { bestFits } from './combos.js';
+
+/* ---------- Render layer ----------
+   The eight cards are built once.  Each day card keeps a node map for its
+   rows; edits patch only the nodes whose content actually changed
+   instead of tearing the grid down. */
+
+/* Each icon is defined once in a hidden sprite; rows reference it with
+   <use> instead of carrying their own copy of the paths. */
+const ICON_SPRITE =
+  '<svg xmlns="http://www.w3.org/2000/svg" style="display:none" aria-hidden="true">' +
+  '<symbol id="ms-icon-breakfast" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="1.7" stroke-linecap="round" stroke-linejoin="round"><path d="M4 10h13a3 3 0 0 0 0-6H4v6z"/><path d="M17 4v6a5 5 0 0 1-5 5H9a5 5 0 0 1-5-5V4"/><line x1="6" y1="18" x2="16" y2="18"/><line x1="8" y1="22" x2="14" y2="22"/></symbol>' +
+  '<symbol id="ms-icon-lunch" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="1.7" stroke-linecap="round" stroke-linejoin="round"><circle cx="12" cy="12" r="4"/><line x1="12" y1="2" x2="12" y2="4"/><line x1="12" y1="20" x2="12" y2="22"/><line x1="4.93" y1="4.93" x2="6.34" y2="6.34"/><line x1="17.66" y1="17.66" x2="19.07" y2="19.07"/><line x1="2" y1="12" x2="4" y2="12"/><line x1="20" y1="12" x2="22" y2="12"/><line x1="4.93" y1="19.07" x2="6.34" y2="17.66"/><line x1="17.66" y1="6.34" x2="19.07" y2="4.93"/></symbol>' +
+  '<symbol id="ms-icon-dinner" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="1.7" stroke-linecap="round" stroke-linejoin="round"><path d="M21 12.79A9 9 0 1 1 11.21 3 7 7 0 0 0 21 12.79z"/></symbol>' +
+  '</svg>';
+
+function installIconSprite(){
+  if(document.getElementById('ms-icon-sprite')) return;
+  const holder = document.createElement('div');
+  holder.id = 'ms-icon-sprite';
+  holder.innerHTML = ICON_SPRITE;
+  document.body.appendChild(holder);
+}
+
+export function createMealIcon(kind){
+  const id = kind === 'breakfast' || kind === 'lunch' ? kind : 'dinner';
+  return `<svg viewBox="0 0 24 24"><use href="#ms-icon-${id}"/></svg>`;
+}
+
+export function diffHtml(cost, budgetVal){
+  const b = parseFloat(budgetVal);
+  if(isNaN(b)) return '';
+  const diff = b - cost;
+  if(Math.abs(diff) < 0.005) return '';
+  const abs = Math.abs(diff).toFixed(2);
+  const text = diff > 0 ? `+${abs}` : `-${abs}`;
+  const cls = diff > 0 ? 'diff-pos' : 'diff-neg';
+  return ` <span class="${cls}">(${text})</span>`;
+}
+
+export function labelForSelection(state, sel, type, week, day){
+  if(sel==='skip') return 'Not planned';
+  if(sel==='custom'){
+    const pk=`price-${week}-${day}-${type}`;
+    const v=(state.weeks[week][pk]||'0').trim();
+    const n=parseFloat(v);
+    return 'Custom (₹ '+(isNaN(n)?v:n.toFixed(2))+')';
+  }
+  const found = findItem(type, sel);
+  return found ? `${found.name} (₹ ${found.price.toFixed(2)})` : 'Not planned';
+}
+
+/* Write helpers: touch the DOM only when the value differs. */
+function setText(el, text){ if(el.textContent !== text) el.textContent = text; }
+function setHtml(el, html){ if(el.msHtml !== html){ el.innerHTML = html; el.msHtml = html; } }
+function setHidden(el, hidden){ if(el.hidden !== hidden) el.hidden = hidden; }
+function setValue(el, v){ if(el.value !== v) el.value = v; }
+function setClass(el, cls){ if(el.className !== cls) el.className = cls; }
+
+function el(tag, cls, parent){
+  const e = document.createElement(tag);
+  if(cls) e.className = cls;
+  if(parent) parent.appendChild(e);
+  return e;
+}
+
+function fillSelect(select, opts){
+  const frag = document.createDocumentFragment();
+  const add = (value, label) => { const o = el('option'); o.value = value; o.innerText = label; frag.appendChild(o); };
+  add('skip','Not planned');
+  opts.forEach(m => add(m.id, `${m.name} (₹ ${m.price.toFixed(2)})`));
+  add('custom','Custom price (type ₹)');
+  select.replaceChildren(frag);
+}
+
+function buildMealRow(card){
+  const row = el('div', 'meal-row', card);
+  const inner = el('div', 'meal-row-inner', row);
+  const icon = el('span', '', inner);
+  const label = el('span', 'meal-label', inner);
+  const select = el('select', 'meal-select', row);
+  const input = el('input', 'custom-input', card);
+  input.type = 'text';
+  setHidden(input, true);
+  return { row, icon, label, select, input, iconKind:null, sig:null };
+}
+
+/* handlers: onMainChange(day, mainType, value), onDinnerChange(day, value),
+   onCombo(day, mainType, mainId, dinnerId), onToggle(day),
+   onPrice(day, mealType, value), onBudget(k, value), onBudgetDefault(k) */
+export function createGrid(grid, state, handlers){
+  installIconSprite();
+  grid.innerHTML = '';
+  const days = [];
+  const budgetInputs = {};
+  const budgetLabels = {};
+  let invalid = new Set();     // 'week:price-key' / 'budgets:key' that do not parse
+
+  for(let day=0; day<7; day++){
+    const card = el('div', 'card', grid);
+    const hdr = el('div', 'day-header', card);
+    const title = el('div', 'day-title' + (day === 6 ? ' sunday' : ''), hdr);
+    title.innerText = WEEK_DAYS[day];
+    if(day !== 6){
+      const tbtn = el('button', 'toggle-btn', hdr);
+      tbtn.innerText = '⇄';
+      tbtn.title = 'Toggle breakfast / lunch';
+      tbtn.onclick = () => handlers.onToggle(day);
+    }
+    const rec = { card, main: buildMealRow(card), mainType:null, fits:null, fitsSig:null };
+    rec.dinner = buildMealRow(card);
+    const totalRow = el('div', 'day-total-row', card);
+    el('div', '', totalRow).textContent = 'Day total:';
+    rec.total = el('div', '', totalRow);
+
+    rec.main.select.onchange = (e) => handlers.onMainChange(day, rec.mainType, e.target.value);
+    rec.main.input.oninput = (e) => handlers.onPrice(day, rec.mainType, e.target.value);
+    rec.dinner.select.onchange = (e) => handlers.onDinnerChange(day, e.target.value);
+    rec.dinner.input.oninput = (e) => handlers.onPrice(day, 'dinner', e.target.value);
+    days.push(rec);
+  }
+
+  /* Budgets card */
+  const card = el('div', 'card', grid);
+  const hdr = el('div', 'day-header', card);
+  el('div', 'day-title budgets', hdr).innerText = 'Budgets';
+  const keys = [
+    {k:'weekly', label:()=>'Week Total'},
+    {k:'sunday', label:(n)=>`Sunday Total (all ${n} weeks)`},
+    {k:'weekdays', label:(n)=>`Weekdays Total (all ${n} weeks)`},
+    {k:'grandTotal', label:()=>'Grand Total'}
+  ];
+  keys.forEach(item=>{
+    budgetLabels[item.k] = { el: el('div', 'budget-label', card), text: item.label };
+    const row = el('div', 'budget-row', card);
+    const inp = el('input', '', row); inp.type = 'text';
+    inp.oninput = (e) => handlers.onBudget(item.k, e.target.value);
+    const btn = el('button', 'budget-default-btn', row); btn.innerText = 'Default';
+    btn.onclick = () => handlers.onBudgetDefault(item.k);
+    budgetInputs[item.k] = inp;
+  });
+
+  function markRow(r, week, day, type){
+    setClass(r.input, invalid.has(`${week}:price-${week}-${day}-${type}`) ? 'custom-input invalid' : 'custom-input');
+  }
+
+  function patchRow(r, week, day, type, opts){
+    const sel = state.weeks[week][`sel-${week}-${day}-${type}`] || 'skip';
+    if(r.iconKind !== type){
+      setClass(r.icon, 'select-icon select-icon-' + type);
+      r.icon.innerHTML = createMealIcon(type);
+      r.iconKind = type;
+    }
+    const sig = type + ':' + catalogVersion + ':' + opts.map(o=>o.id).join(',');
+    if(r.sig !== sig){ fillSelect(r.select, opts); r.sig = sig; }
+    setValue(r.select, sel);
+    setText(r.label, labelForSelection(state, sel, type, week, day));
+    setClass(r.label, sel === 'skip' ? 'meal-label muted' : 'meal-label');
+    const custom = sel === 'custom';
+    setHidden(r.input, !custom);
+    markRow(r, week, day, type);
+    if(custom && document.activeElement !== r.input){
+      setValue(r.input, state.weeks[week][`price-${week}-${day}-${type}`]);
+    }
+    return priceForSelection(state, type, sel, week, day);
+  }
+
+  /* A day over its limit lists the dearest menu pairs that fit it (see
+     combos.js); the row is only created once a day first needs it. */
+  function patchFits(rec, week, day, dayTotal){
+    const limit = dayLimit(day);
+    const fits = dayTotal - limit > 0.005 ? bestFits(rec.mainType, week, day, limit) : [];
+    const sig = fits.map(f => f.main.id + '+' + f.dinner.id).join(',');
+    if(rec.fitsSig === sig) return;
+    rec.fitsSig = sig;
+    if(!rec.fits){
+      if(!fits.length) return;
+      rec.fits = el('div', 'day-fits', rec.card);
+    }
+    rec.fits.replaceChildren();
+    setHidden(rec.fits, !fits.length);
+    for(const f of fits){
+      const b = el('button', 'fit-btn', rec.fits);
+      b.type = 'button';
+      b.textContent = `${f.main.name} + ${f.dinner.name} (₹ ${f.total.toFixed(2)})`;
+      b.title = `Fits the ₹ ${limit} day limit`;
+      b.onclick = () => handlers.onCombo(day, rec.mainType, f.main.id, f.dinner.id);
+    }
+  }
+
+  const api = {
+    days,
+    /* Patch one day card of the selected week. */
+    patchDay(day){
+      const week = state.selectedWeek;
+      const rec = days[day];
+      const mainType = mainTypeFor(state, week, day);
+      rec.mainType = mainType;
+      const dayTotal = patchRow(rec.main, week, day, mainType, optionsFor(mainType, week, day)) +
+                       patchRow(rec.dinner, week, day, 'dinner', optionsFor('dinner', week, day));
+      setHtml(rec.total, '₹ ' + dayTotal.toFixed(2) + diffHtml(dayTotal, dayLimit(day)));
+      patchFits(rec, week, day, dayTotal);
+    },
+    patchBudgets(){
+      const horizon = horizonOf(state);
+      for(const k in budgetLabels) setText(budgetLabels[k].el, budgetLabels[k].text(horizon));
+      for(const k in budgetInputs){
+        const inp = budgetInputs[k];
+        if(document.activeElement !== inp) setValue(inp, state.budgets[k] ?? DEFAULT_BUDGETS[k].toFixed(2));
+        setClass(inp, invalid.has(`budgets:${k}`) ? 'invalid' : '');
+      }
+    },
+    /* Flag the inputs whose text is not a number (from the analysis). */
+    setInvalid(keys){
+      invalid = new Set(keys);
+      const week = state.selectedWeek;
+      days.forEach((rec, day)=>{
+        markRow(rec.main, week, day, rec.mainType);
+        markRow(rec.dinner, week, day, 'dinner');
+      });
+      for(const k in budgetInputs) setClass(budgetInputs[k], invalid.has(`budgets:${k}`) ? 'invalid' : '');
+    },
+    patchWeek(){
+      for(let day=0; day<7; day++) api.patchDay(day);
+      api.patchBudgets();
+    }
+  };
+  return api;
+}
+
+/* ---------- Bulk edit bar ----------
+   One row of selects describing a bulk operation (see bulk.js).
+   onApply(op, scope) gets the operation without its weeks and the scope
+   ('all', 'this' or 'later'); it returns an error message or null. */
+const BULK_OPS = [
+  ['fill', 'Fill'], ['clear', 'Clear'], ['copy_week', 'Copy this week'], ['template', 'Default week']
+];
+const BULK_SCOPES = { all:'in every week', this:'in this week', later:'in later weeks' };
+const MEAL_NAMES = { breakfast:'Breakfast', lunch:'Lunch', dinner:'Dinner' };
+
+export function createBulkBar(row, onApply){
+  row.innerHTML = '';
+  const select = (cls, pairs) => {
+    const sel = el('select', 'bulk-select ' + cls, row);
+    for(const [value, label] of pairs){ const o = el('option', '', sel); o.value = value; o.innerText = label; }
+    return sel;
+  };
+  const op = select('bulk-op', BULK_OPS);
+  const day = select('bulk-day', WEEK_DAYS.map((d, i) => [String(i), d]));
+  const meal = select('bulk-meal', Object.entries(MEAL_NAMES));
+  const item = select('bulk-item', []);
+  const template = select('bulk-template', [1, 2, 3, 4].map(n => [String(n), `${n}`]));
+  const scope = select('bulk-scope', Object.entries(BULK_SCOPES));
+  const apply = el('button', 'bulk-apply', row);
+  apply.type = 'button';
+  apply.innerText = 'Apply';
+  const message = el('span', 'bulk-message', row);
+  let itemSig = null;
+
+  function fillItems(){
+    const list = meal.value === 'breakfast' ? breakfastBase : meal.value === 'lunch' ? lunchOptions : dinnerOptions;
+    const sig = meal.value + ':' + catalogVersion;
+    if(sig === itemSig) return;
+    itemSig = sig;
+    const keep = item.value;
+    fillSelect(item, list);
+    item.value = [...item.childNodes].some(o => o.value === keep) ? keep : 'skip';
+  }
+
+  function sync(){
+    const kind = op.value;
+    setHidden(day, kind !== 'fill');
+    setHidden(meal, kind !== 'fill' && kind !== 'clear');
+    setHidden(item, kind !== 'fill');
+    setHidden(template, kind !== 'template');
+    for(const o of scope.childNodes) setHidden(o, kind === 'copy_week' && o.value === 'this');
+    if(kind === 'copy_week' && scope.value === 'this') scope.value = 'all';
+    fillItems();
+    setText(message, '');
+  }
+
+  op.onchange = sync;
+  meal.onchange = sync;
+  apply.onclick = () => {
+    const kind = op.value;
+    const spec = kind === 'fill' ? { op:kind, day:+day.value, meal:meal.value, item:item.value }
+               : kind === 'clear' ? { op:kind, meal:meal.value }
+               : kind === 'template' ? { op:kind, default:+template.value }
+               : { op:kind };
+    setText(message, onApply(spec, scope.value) || '');
+  };
+  sync();
+  return { refresh: fillItems };
+}
+
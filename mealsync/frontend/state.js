@@ -0,0 +1,220 @@
+import {
+  DEFAULT_BUDGETS, WEEKS, BREAKFAST_DEFAULTS, LUNCH_DEFAULTS, DINNER_DEFAULTS, findItem,
+  getBreakfastConfig, defaultFor
+} from './catalog.js';
+import { encodePlan, horizonOf, migrate } from './codec.js';
+import { LOG_SUFFIX, applyOp, readJournal } from './journal.js';
+
+export { horizonOf };
+
+/* bench.html points these elsewhere so it never touches a real plan. */
+const KEY_OVERRIDE = typeof window !== 'undefined' && window.MEALSYNC_STORAGE_KEY;
+export const STORAGE_KEY = KEY_OVERRIDE || 'mealsync_plan';
+const LEGACY_KEY = KEY_OVERRIDE ? KEY_OVERRIDE + '_state' : 'mealsync_state';
+
+/* Apply default plan into a state object (weeks `first`..horizon) */
+export function applyDefaultMealPlan(s, first=1){
+  if(!s.weeks) s.weeks = {};
+  if(!s.dayChoice) s.dayChoice = {};
+  if(!s.modified) s.modified = {};
+
+  const horizon = horizonOf(s);
+  for(let w=first; w<=horizon; w++){
+    if(!s.weeks[w]) s.weeks[w] = {};
+    for(let d=0; d<=6; d++){
+      const bId = defaultFor(BREAKFAST_DEFAULTS, w, d);
+      const lId = defaultFor(LUNCH_DEFAULTS, w, d);
+      const dnId= defaultFor(DINNER_DEFAULTS, w, d);
+
+      if(bId) s.weeks[w][`sel-${w}-${d}-breakfast`] = bId;
+      else delete s.weeks[w][`sel-${w}-${d}-breakfast`];
+
+      if(lId) s.weeks[w][`sel-${w}-${d}-lunch`] = lId;
+      else delete s.weeks[w][`sel-${w}-${d}-lunch`];
+
+      if(dnId) s.weeks[w][`sel-${w}-${d}-dinner`] = dnId;
+      else delete s.weeks[w][`sel-${w}-${d}-dinner`];
+
+      if(d < 6){ // Mon-Sat
+        const key = `${w}-w${d}`;
+        if(bId) s.dayChoice[key] = 'breakfast';
+        else if(lId) s.dayChoice[key] = 'lunch';
+        else s.dayChoice[key] = 'breakfast';
+      }
+    }
+  }
+}
+
+/* A default plan, not yet saved. */
+export function defaultState(horizon=WEEKS){
+  const s = { selectedWeek:1, horizon, weeks:{}, dayChoice:{}, budgets:{}, modified:{} };
+  for(let w=1; w<=horizon; w++) s.weeks[w] = {};
+  for(const k in DEFAULT_BUDGETS) s.budgets[k] = DEFAULT_BUDGETS[k].toFixed(2);
+  applyDefaultMealPlan(s);
+  return s;
+}
+
+export function createNewState(horizon=WEEKS){
+  const s = defaultState(horizon);
+  saveState(s);
+  return s;
+}
+
+export function ensureStructure(s){
+  if(!s.weeks) s.weeks = {};
+  const horizon = horizonOf(s);
+  for(let w=1; w<=horizon; w++){ if(!s.weeks[w]) s.weeks[w] = {}; }
+  if(!s.budgets) s.budgets = {};
+  if(!s.modified) s.modified = {};
+  if(!s.dayChoice) s.dayChoice = {};
+  if(!s.selectedWeek || s.selectedWeek > horizon) s.selectedWeek = 1;
+  return s;
+}
+
+/* Reads the packed snapshot plus the edit journal after it, migrating a
+   legacy `mealsync_state` blob once. */
+export function loadState(){
+  for(const key of [STORAGE_KEY, LEGACY_KEY]){
+    const raw = localStorage.getItem(key);
+    if(!raw) continue;
+    try{
+      const payload = JSON.parse(raw);
+      const s = migrate(payload);
+      if(key === LEGACY_KEY){
+        saveState(ensureStructure(s));
+        localStorage.removeItem(LEGACY_KEY);
+        return s;
+      }
+      for(const [, path, value] of readJournal(STORAGE_KEY, payload.j || 0)) applyOp(s, path, value);
+      return ensureStructure(s);
+    } catch(e){}
+  }
+  return createNewState();
+}
+
+/* `journalIndex` tags the snapshot with the last journal entry it holds. */
+export function serializeState(s, journalIndex){
+  const packed = encodePlan(s);
+  if(journalIndex) packed.j = journalIndex;
+  return JSON.stringify(packed);
+}
+
+/* Writes a bare snapshot; any journal is superseded. */
+export function saveState(s){
+  localStorage.setItem(STORAGE_KEY, serializeState(s));
+  localStorage.removeItem(STORAGE_KEY + LOG_SUFFIX);
+}
+
+/* price helper */
+export function priceForSelection(s, mealType, sel, week, day){
+  if(sel==='skip') return 0;
+  if(sel==='custom'){
+    const key = `price-${week}-${day}-${mealType}`;
+    const v = s.weeks[week][key];
+    return parseFloat(v || 0) || 0;
+  }
+  const found = findItem(mealType, sel);
+  return found ? found.price : 0;
+}
+
+export function mainTypeFor(s, week, day){
+  return (day === 6) ? 'lunch' : (s.dayChoice[`${week}-w${day}`] || 'breakfast');
+}
+
+/* Fill in the lazy defaults a day card relies on (what rendering used to
+   write into the state as a side effect). */
+export function materializeDay(store, week, day){
+  const s = store.state;
+  if(!s.weeks[week]) store.set(['weeks', week], {});
+  if(day !== 6 && !s.dayChoice[`${week}-w${day}`]) store.set(['dayChoice', `${week}-w${day}`], 'breakfast');
+  const mainType = mainTypeFor(s, week, day);
+  const mainKey = `sel-${week}-${day}-${mainType}`;
+  const defaultVal = mainType === 'breakfast' ? (getBreakfastConfig(week, day).defaultId || 'skip') : 'skip';
+  const wk = s.weeks[week];
+  if(!(mainKey in wk)){
+    store.set(['weeks', week, mainKey], defaultVal);
+  } else if(mainType === 'breakfast' && defaultVal !== 'skip' && wk[mainKey] === 'skip' && !s.modified[mainKey]){
+    store.set(['weeks', week, mainKey], defaultVal);
+  }
+  const dinnerKey = `sel-${week}-${day}-dinner`;
+  if(!(dinnerKey in wk)) store.set(['weeks', week, dinnerKey], 'skip');
+  for(const [key, type] of [[mainKey, mainType], [dinnerKey, 'dinner']]){
+    const pk = `price-${week}-${day}-${type}`;
+    if(wk[key] === 'custom' && !(pk in wk)) store.set(['weeks', week, pk], '0');
+  }
+}
+
+export function materializeBudgets(store){
+  for(const k in DEFAULT_BUDGETS){
+    if(!(k in store.state.budgets)) store.set(['budgets', k], DEFAULT_BUDGETS[k].toFixed(2));
+  }
+}
+
+/* ---------- Deltas ----------
+   A delta has the same shape as the state; a null leaf deletes the key.
+   Every mutation goes through store.set(path, value) so deltas can be
+   recorded and shipped instead of the whole state. */
+
+export function addToDelta(delta, path, value){
+  let node = delta;
+  for(let i=0; i<path.length-1; i++){
+    const p = path[i];
+    if(!node[p] || typeof node[p] !== 'object') node[p] = {};
+    node = node[p];
+  }
+  node[path[path.length-1]] = (value === undefined ? null : value);
+  return delta;
+}
+
+export function deltaPaths(delta, prefix=[], out=[]){
+  for(const k in delta){
+    const v = delta[k];
+    const path = prefix.concat(k);
+    if(v && typeof v === 'object') deltaPaths(v, path, out);
+    else out.push([path, v]);
+  }
+  return out;
+}
+
+function readPath(s, path){
+  let node = s;
+  for(const p of path){
+    if(node == null) return undefined;
+    node = node[p];
+  }
+  return node;
+}
+
+/* Listeners get (path, value, prev, origin).  origin is undefined for
+   edits made on this page, 'server' for patches from the Python side and
+   'tab' for edits another tab made, so the journal and the bridge can
+   leave alone what was already persisted or sent elsewhere. */
+export function createStore(state){
+  const listeners = [];
+  return {
+    state,
+    get(path){ return readPath(state, path); },
+    set(path, value, origin){
+      let node = state;
+      for(let i=0; i<path.length-1; i++){
+        if(!node[path[i]]) node[path[i]] = {};
+        node = node[path[i]];
+      }
+      const last = path[path.length-1];
+      const prev = node[last];
+      if(prev === value || (value == null && !(last in node))) return false;
+      if(value == null) delete node[last];
+      else node[last] = value;
+      for(const fn of listeners) fn(path, value == null ? null : value, prev, origin);
+      return true;
+    },
+    applyDelta(delta, origin){
+      let changed = 0;
+      for(const [path, v] of deltaPaths(delta)){
+        if(this.set(path, v, origin)) changed++;
+      }
+      return changed;
+    },
+    subscribe(fn){ listeners.push(fn); }
+  };
+}
@@ -0,0 +1,20 @@
+/* Minimal Streamlit component protocol (what streamlit-component-lib does). */
+
+function send(type, data){
+  window.parent.postMessage(Object.assign({isStreamlitMessage:true, type}, data), '*');
+}
+
+export function onRender(cb){
+  window.addEventListener('message', (e)=>{
+    const msg = e.data;
+    if(msg && msg.type === 'streamlit:render') cb(msg.args || {});
+  });
+}
+
+export function componentReady(){ send('streamlit:componentReady', {apiVersion:1}); }
+
+export function setComponentValue(value){
+  send('streamlit:setComponentValue', {value, dataType:'json'});
+}
+
+export function setFrameHeight(height){ send('streamlit:setFrameHeight', {height}); }
@@ -0,0 +1,72 @@
+import { addToDelta } from './state.js';
+
+/* ---------- Cross-tab sync ----------
+   Tabs of one browser showing the same plan share its localStorage copy,
+   so each tells the others what it changed instead of letting the last
+   write win.  flush() (run with the coalesced persistence write, after
+   the journal) posts this tab's edits since the last flush as one delta;
+   the other tabs apply it with origin 'tab', which the journal and the
+   bridge skip: the sending tab already journaled it and its server
+   session already has it.  A wholesale change (reset) goes out as the
+   whole plan.  The selected week is per tab and never sent.
+
+   BroadcastChannel where available, else a `<key>_sync` localStorage
+   entry whose storage events reach the other tabs. */
+export function createTabSync(store, key, { onDelta, onReplace } = {}){
+  const tab = Math.random().toString(36).slice(2);
+  const stats = { sent:0, received:0, bytesSent:0 };
+  let outgoing = null;
+  let channel = null;
+  let send;
+
+  function receive(msg){
+    if(!msg || msg.tab === tab) return;
+    stats.received += 1;
+    if(msg.replace) onReplace(msg.replace);
+    else if(msg.delta) onDelta(msg.delta);
+  }
+
+  if(typeof BroadcastChannel === 'function'){
+    channel = new BroadcastChannel('mealsync:' + key);
+    channel.onmessage = (e) => receive(e.data);
+    send = (msg) => channel.postMessage(msg);
+  } else if(typeof window !== 'undefined'){
+    const syncKey = key + '_sync';
+    window.addEventListener('storage', (e)=>{
+      if(e.key !== syncKey || !e.newValue) return;
+      try{ receive(JSON.parse(e.newValue)); } catch(err){}
+    });
+    send = (msg) => localStorage.setItem(syncKey, JSON.stringify(msg));
+  }
+
+  store.subscribe((path, value, prev, origin)=>{
+    if(origin || path[0] === 'selectedWeek') return;
+    addToDelta(outgoing || (outgoing = {}), path, value);
+  });
+
+  function post(msg){
+    if(!send) return;
+    msg.tab = tab;
+    send(msg);
+    stats.sent += 1;
+    stats.bytesSent += JSON.stringify(msg).length;
+  }
+
+  return {
+    stats,
+    /* Post what this tab changed since the last flush. */
+    flush(){
+      if(!outgoing) return;
+      const delta = outgoing;
+      outgoing = null;
+      post({ delta });
+    },
+    /* The plan changed wholesale here: the other tabs take all of it. */
+    sendFull(){
+      outgoing = null;
+      const { selectedWeek, ...plan } = store.state;
+      post({ replace: plan });
+    },
+    close(){ if(channel) channel.close(); }
+  };
+}
@@ -0,0 +1,138 @@
+import { horizonOf, mainTypeFor, priceForSelection } from './state.js';
+import { MEALS } from './codec.js';
+
+/* ---------- Running totals ----------
+   updateSummary() used to rescan the plan on every keystroke.  Instead the
+   price of every slot is cached per week (slot d*3+meal, like the packed
+   format), with per-day, per-week and plan-wide sums on top.  A store
+   change reprices the one slot (or day, for a toggle) it touches and
+   applies the difference to the sums, so an edit costs O(1) whatever the
+   horizon.
+
+   check() compares the sums with a full recompute and logs any drift;
+   the analysis engine runs it on every answer while window.MEALSYNC_DEBUG
+   is set on the page (see analysis.js). */
+
+const SLOT_KEY = /^(?:sel|price)-\d+-(\d)-(breakfast|lunch|dinner)$/;
+const EPSILON = 0.005;
+
+export function createTotals(store){
+  const s = store.state;
+  const weeks = new Map();     // week -> {slots, days, weekdays, sunday}
+  let weekdays = 0, sunday = 0;
+
+  function slotPrice(w, d, m){
+    const meal = MEALS[m];
+    const wk = s.weeks[w] || {};
+    return priceForSelection(s, meal, wk[`sel-${w}-${d}-${meal}`] || 'skip', w, d);
+  }
+
+  function dayCost(rec, w, d){
+    const main = mainTypeFor(s, w, d) === 'lunch' ? 1 : 0;
+    return rec.slots[d*3 + main] + rec.slots[d*3 + 2];
+  }
+
+  function addToDay(rec, d, diff){
+    if(!diff) return;
+    rec.days[d] += diff;
+    if(d === 6){ rec.sunday += diff; sunday += diff; }
+    else { rec.weekdays += diff; weekdays += diff; }
+  }
+
+  function repriceDay(rec, w, d){
+    addToDay(rec, d, dayCost(rec, w, d) - rec.days[d]);
+  }
+
+  function loadWeek(w){
+    const rec = { slots: new Float64Array(21), days: new Float64Array(7), weekdays: 0, sunday: 0 };
+    for(let d=0; d<7; d++){
+      for(let m=0; m<3; m++) rec.slots[d*3 + m] = slotPrice(w, d, m);
+      addToDay(rec, d, dayCost(rec, w, d));
+    }
+    weeks.set(w, rec);
+    return rec;
+  }
+
+  function dropWeek(w){
+    const rec = weeks.get(w);
+    if(!rec) return;
+    weekdays -= rec.weekdays;
+    sunday -= rec.sunday;
+    weeks.delete(w);
+  }
+
+  /* Bring the loaded weeks in line with the horizon. */
+  function fitHorizon(){
+    const horizon = horizonOf(s);
+    for(const w of weeks.keys()) if(w > horizon) dropWeek(w);
+    for(let w=1; w<=horizon; w++) if(!weeks.has(w)) loadWeek(w);
+  }
+
+  function rebuild(){
+    weeks.clear();
+    weekdays = sunday = 0;
+    fitHorizon();
+  }
+
+  store.subscribe((path)=>{
+    const [section, key, leaf] = path;
+    if(section === 'weeks' && key != null){
+      const w = +key;
+      const rec = weeks.get(w);
+      const match = leaf != null && SLOT_KEY.exec(leaf);
+      if(rec && match){
+        const d = +match[1], m = MEALS.indexOf(match[2]);
+        rec.slots[d*3 + m] = slotPrice(w, d, m);
+        repriceDay(rec, w, d);
+      } else if(leaf == null){
+        dropWeek(w);
+        if(w <= horizonOf(s)) loadWeek(w);
+      }
+    } else if(section === 'dayChoice' && key != null){
+      const [w, d] = key.split('-w').map(Number);
+      const rec = weeks.get(w);
+      if(rec) repriceDay(rec, w, d);
+    } else if(section === 'horizon'){
+      fitHorizon();
+    } else if(section === 'weeks' || section === 'dayChoice'){
+      rebuild();
+    }
+  });
+
+  /* Reference totals the slow way, for the debug check. */
+  function recompute(){
+    let wd = 0, sun = 0;
+    for(let w=1; w<=horizonOf(s); w++){
+      for(let d=0; d<7; d++){
+        const mt = mainTypeFor(s, w, d);
+        const c = slotPrice(w, d, MEALS.indexOf(mt)) + slotPrice(w, d, 2);
+        if(d === 6) sun += c; else wd += c;
+      }
+    }
+    return { weekdays: wd, sunday: sun };
+  }
+
+  function check(){
+    const ref = recompute();
+    const ok = Math.abs(ref.weekdays - weekdays) < EPSILON && Math.abs(ref.sunday - sunday) < EPSILON;
+    if(!ok) console.error('mealsync totals drifted', { weekdays, sunday }, 'expected', ref);
+    return ok;
+  }
+
+  rebuild();
+
+  return {
+    rebuild,
+    check,
+    day(w, d){ const rec = weeks.get(w); return rec ? rec.days[d] : 0; },
+    week(w){
+      const rec = weeks.get(w);
+      return rec ? { weekdays: rec.weekdays, sunday: rec.sunday } : { weekdays:0, sunday:0 };
+    },
+    summary(){
+      const rec = weeks.get(s.selectedWeek);
+      const current = rec ? rec.weekdays : 0;
+      return { current, sunday, weekdays, grand: weekdays + sunday };
+    }
+  };
+}
@@ -0,0 +1,9 @@
+import { createEngine } from './engine.js';
+
+/* Analysis worker: see engine.js and analysis.js for the messages. */
+const engine = createEngine();
+
+self.onmessage = (e) => {
+  const result = engine.handle(e.data);
+  if(result) self.postMessage(result);
+};
@@ -0,0 +1,253 @@
+"""Group plans: the combined bill of a household or mess.
+
+A group is a set of users in the :class:`~mealsync.store.PlanStore`
+(``group_members``); every member keeps an ordinary plan with its own
+weeks, day choices and budgets, edited on the planner page as
+``?user=<id>``.
+
+:class:`GroupTotals` costs every member once, in one
+:func:`cost.plan_totals` pass, and from then on keeps the group totals
+current incrementally:
+
+* it listens to the store, so an edit made in this process re-costs only
+  the weeks its delta touches, for that one member, and moves the group
+  sums by the difference;
+* :meth:`GroupTotals.refresh` picks up edits made by other processes by
+  comparing cheap per-member stamps (plan version and last journal id)
+  and reloads only the members whose stamp moved.
+
+Nothing here walks all members on an edit; the group page renders member
+cards a page at a time from the cached figures.
+"""
+
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from mealsync import catalog, cost, plan, report
+
+SORTS = ("name", "over budget", "spend")
+
+
+@dataclass
+class Member:
+    """One member's cached figures."""
+
+    user: str
+    name: str
+    week: np.ndarray = field(default_factory=lambda: np.zeros(catalog.MAX_WEEKS))  # Mon-Sat totals
+    sunday: np.ndarray = field(default_factory=lambda: np.zeros(catalog.MAX_WEEKS))
+    budget: float = None  # grandTotal budget, None if it shows no diff
+    has_plan: bool = False
+    stamp: tuple = None  # store stamp last read; None after a live edit
+
+    @property
+    def weekdays(self):
+        return float(self.week.sum())
+
+    @property
+    def sundays(self):
+        return float(self.sunday.sum())
+
+    @property
+    def grand(self):
+        return self.weekdays + self.sundays
+
+    @property
+    def over(self):
+        """How far the grand total is over budget (0 if not)."""
+        if self.budget is None:
+            return 0.0
+        diff = self.grand - self.budget
+        return diff if diff > report.EPSILON else 0.0
+
+
+def week_cost(state, week, table):
+    """``(Mon-Sat total, Sunday total)`` of one week, as the day cards sum it."""
+    if week > plan.horizon(state):
+        return 0.0, 0.0
+    wk = (state.get("weeks") or {}).get(str(week)) or {}
+    day_choice = state.get("dayChoice") or {}
+    days = [0.0] * 7
+    for d in range(7):
+        lunch = d == catalog.SUNDAY or day_choice.get(f"{week}-w{d}") == "lunch"
+        for meal in ("lunch" if lunch else "breakfast", "dinner"):
+            code = table.code(meal, wk.get(f"sel-{week}-{d}-{meal}"))
+            if code == cost.CUSTOM:
+                days[d] += cost.parse_price(wk.get(f"price-{week}-{d}-{meal}"))
+            else:
+                days[d] += float(table.prices[code])
+    return sum(days[: catalog.SUNDAY]), days[catalog.SUNDAY]
+
+
+def _budget(state):
+    return report.summary_budget({"budgets": state.get("budgets") or {}}, "grandTotal")
+
+
+def touched_weeks(delta):
+    """Weeks whose totals ``delta`` can change, or None for all of them."""
+    if "horizon" in delta:
+        return None
+    weeks = {int(w) for w in delta.get("weeks") or {}}
+    weeks.update(int(k.split("-")[0]) for k in delta.get("dayChoice") or {})
+    return weeks
+
+
+class GroupTotals:
+    """Live totals of one group; safe to share between sessions."""
+
+    def __init__(self, store, group_id, table=None):
+        self.store = store
+        self.group_id = group_id
+        self.table = table or report.price_table(catalog.current().version)
+        self.members = {}
+        self.week = np.zeros(catalog.MAX_WEEKS)
+        self.sunday = np.zeros(catalog.MAX_WEEKS)
+        self.budget = 0.0
+        self.over_budget = 0
+        self.stats = {"edits": 0, "weeks_costed": 0, "reloads": 0}
+        self._lock = threading.RLock()
+        with self._lock:
+            self._load(store.members(group_id))
+        self._unsubscribe = store.subscribe(self._on_edit)
+
+    def close(self):
+        self._unsubscribe()
+
+    # -- group figures -------------------------------------------------
+
+    @property
+    def weekdays(self):
+        return float(self.week.sum())
+
+    @property
+    def sundays(self):
+        return float(self.sunday.sum())
+
+    @property
+    def grand(self):
+        return self.weekdays + self.sundays
+
+    def summary(self):
+        with self._lock:
+            return {
+                "members": len(self.members),
+                "weekdays": round(self.weekdays, 2),
+                "sunday": round(self.sundays, 2),
+                "grand": round(self.grand, 2),
+                "budget": round(self.budget, 2),
+                "over_budget": self.over_budget,
+                "without_plan": sum(not m.has_plan for m in self.members.values()),
+            }
+
+    def weeks(self):
+        """Group spend per week (Mon-Sun) over the longest member horizon."""
+        with self._lock:
+            totals = self.week + self.sunday
+            used = np.flatnonzero(totals)
+            return totals[: max(catalog.WEEKS, used[-1] + 1 if len(used) else 0)].copy()
+
+    def find(self, query="", order="name"):
+        """Members matching ``query`` (id or name), sorted by ``order`` (see ``SORTS``)."""
+        with self._lock:
+            found = list(self.members.values())
+        if query:
+            q = query.lower()
+            found = [m for m in found if q in m.user.lower() or q in (m.name or "").lower()]
+        if order == "over budget":
+            found.sort(key=lambda m: (-m.over, m.user))
+        elif order == "spend":
+            found.sort(key=lambda m: (-m.grand, m.user))
+        else:
+            found.sort(key=lambda m: ((m.name or m.user).lower(), m.user))
+        return found
+
+    # -- bookkeeping ---------------------------------------------------
+
+    def _add(self, member, sign=1):
+        self.week += sign * member.week
+        self.sunday += sign * member.sunday
+        self.budget += sign * (member.budget or 0.0)
+        self.over_budget += sign * bool(member.over)
+
+    def _load(self, rows):
+        """(Re)cost the members in ``rows`` (``(user, name)``) from the store."""
+        if not rows:
+            return
+        stamps = self.store.stamps(u for u, _ in rows)
+        loaded = [(user, name, self.store.load(user)) for user, name in rows]
+        states = [s for _, _, s in loaded if s is not None]
+        totals = cost.plan_totals(states, self.table, catalog.MAX_WEEKS) if states else None
+        i = 0
+        for user, name, state in loaded:
+            old = self.members.get(user)
+            if old is not None:
+                self._add(old, -1)
+            member = Member(user, name or (old.name if old else None), stamp=stamps.get(user))
+            if state is not None:
+                member.week = totals.week[i].copy()
+                member.sunday = totals.day[i, :, catalog.SUNDAY].copy()
+                member.budget = _budget(state)
+                member.has_plan = True
+                i += 1
+            self.members[user] = member
+            self._add(member)
+
+    def _on_edit(self, user, delta, state):
+        member = self.members.get(user)
+        if member is None:
+            return
+        weeks = None if delta is None else touched_weeks(delta)
+        if weeks is not None and not weeks and "budgets" not in delta:
+            return  # selectedWeek, modified flags: no effect on totals
+        with self._lock:
+            self._add(member, -1)
+            if weeks is None:
+                weeks = range(1, catalog.MAX_WEEKS + 1)
+            for w in weeks:
+                if 1 <= w <= catalog.MAX_WEEKS:
+                    member.week[w - 1], member.sunday[w - 1] = week_cost(state, w, self.table)
+                    self.stats["weeks_costed"] += 1
+            member.budget = _budget(state)
+            member.has_plan = True
+            member.stamp = None
+            self._add(member)
+            self.stats["edits"] += 1
+
+    def refresh(self):
+        """Catch up with membership changes and edits from other processes.
+
+        Costs one indexed query per call plus a reload of each member whose
+        stamp moved; members edited live in this process adopt their new
+        stamp without a reload.
+        """
+        rows = self.store.members(self.group_id)
+        stamps = self.store.stamps(u for u, _ in rows)
+        with self._lock:
+            current = dict(rows)
+            for user in [u for u in self.members if u not in current]:
+                self._add(self.members.pop(user), -1)
+            stale = []
+            for user, name in rows:
+                member = self.members.get(user)
+                if member is None:
+                    stale.append((user, name))
+                    continue
+                member.name = name
+                if member.stamp is None:
+                    member.stamp = stamps.get(user)
+                elif member.stamp != stamps.get(user):
+                    stale.append((user, name))
+            self.stats["reloads"] += len(stale)
+            self._load(stale)
+        return len(stale)
+
+    def add(self, members):
+        """Add users (ids or ``(id, name)`` pairs) and cost just them."""
+        self.store.add_members(self.group_id, members)
+        self.refresh()
+
+    def remove(self, users):
+        self.store.remove_members(self.group_id, users)
+        self.refresh()
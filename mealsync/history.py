@@ -0,0 +1,272 @@
+"""Spend history of completed months, with rollups and forecasts.
+
+Layout under the history root::
+
+    users.json                  user ids; a user's index is their row everywhere
+    months/<YYYY-MM>/users.npy  (n,) int64 user rows present that month
+    months/<YYYY-MM>/spend.npy  (n, weeks, 3) float32 spend per week and meal type
+    months/<YYYY-MM>/budget.npy (n,) float32 grandTotal budget at month end
+    rollup/summary.json         per-month aggregates and the latest forecast
+    rollup/user_month.npy       (users, months) float32 monthly spend, NaN if absent
+    rollup/user_budget.npy      (users,) float32 latest grandTotal budget
+    rollup/forecast.npy         (users,) float32 next month's forecast spend
+
+Months are written once from chunks of plans and never rescanned by
+readers: archiving a month folds it into the rollups incrementally, and
+the dashboard only reads ``summary.json`` and single rows of the memory
+mapped rollup arrays.  :meth:`HistoryStore.rebuild` recomputes the
+rollups from the month partitions, streaming them in row chunks.
+
+Forecasts are a weighted rolling mean of the last ``WINDOW`` months
+(weights 1..WINDOW, most recent heaviest), per user and for the totals.
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from mealsync import catalog, cost, plan, report
+
+HISTORY_DIR = os.environ.get("MEALSYNC_HISTORY", "history")
+WINDOW = 3
+CHUNK_ROWS = 65536
+PERCENTILES = (50, 90)
+_MONTH = re.compile(r"^\d{4}-\d{2}$")
+
+
+def month_spend(states, table=None):
+    """``(n, weeks, 3)`` spend per week and meal type, as the day totals count it."""
+    table = table or cost.PriceTable()
+    batch = cost.encode_plans(states, table)
+    prices = cost.slot_prices(batch, table) * cost.active_mask(batch)
+    return prices.sum(axis=2).astype(np.float32)
+
+
+def spend_chunk(items):
+    """``(users, spend, budgets)`` of the valid plans in a chunk of ``(user, text)``."""
+    users, states = [], []
+    for user, text in items:
+        try:
+            wrapped_user, state, _ = report.check_plan(json.loads(text))
+        except (ValueError, TypeError, AttributeError):
+            continue
+        users.append(str(wrapped_user or user))
+        states.append(state)
+    table = report.price_table(catalog.current().version)
+    budgets = [report.summary_budget(s, "grandTotal") for s in states]
+    budgets = np.array([np.nan if b is None else b for b in budgets], dtype=np.float32)
+    if not states:
+        return users, np.zeros((0, catalog.WEEKS, 3), dtype=np.float32), budgets
+    weeks = max(plan.horizon(s) for s in states)
+    return users, month_spend(states, table)[:, :weeks], budgets
+
+
+def weighted_forecast(series, window=WINDOW):
+    """Weighted mean of the last ``window`` columns of ``series``, skipping NaN."""
+    tail = np.asarray(series, dtype=np.float64)[..., -window:]
+    weights = np.arange(1, tail.shape[-1] + 1, dtype=np.float64)
+    present = ~np.isnan(tail)
+    total = np.where(present, tail, 0.0) @ weights
+    norm = present @ weights
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(norm > 0, total / np.where(norm > 0, norm, 1), np.nan)
+
+
+def rolling_mean(values, window=WINDOW):
+    """Trailing mean over up to ``window`` values at each position."""
+    values = np.asarray(values, dtype=np.float64)
+    sums = np.cumsum(np.concatenate([[0.0], values]))
+    idx = np.arange(1, len(values) + 1)
+    start = np.maximum(idx - window, 0)
+    return (sums[idx] - sums[start]) / (idx - start)
+
+
+def _next_month(month):
+    year, mon = map(int, month.split("-"))
+    return f"{year + mon // 12}-{mon % 12 + 1:02d}"
+
+
+def _save(path, array):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def _save_json(path, data):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, separators=(",", ":")))
+    os.replace(tmp, path)
+
+
+class HistoryStore:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.rollup = self.root / "rollup"
+        users = self.root / "users.json"
+        self.users = json.loads(users.read_text()) if users.exists() else []
+        self._rows = {u: i for i, u in enumerate(self.users)}
+
+    # -- reads ---------------------------------------------------------
+
+    def months(self):
+        path = self.root / "months"
+        return sorted(p.name for p in path.iterdir() if _MONTH.match(p.name)) if path.exists() else []
+
+    def partition(self, month):
+        """``(users, spend, budget)`` of one month, memory mapped."""
+        path = self.root / "months" / month
+        return tuple(np.load(path / f"{name}.npy", mmap_mode="r") for name in ("users", "spend", "budget"))
+
+    def summary(self):
+        """Per-month aggregates and the forecast, as written by the last roll-up."""
+        path = self.rollup / "summary.json"
+        return json.loads(path.read_text()) if path.exists() else {"months": []}
+
+    def user_history(self, user):
+        """One user's monthly spend, budget and forecast (None if unknown)."""
+        row = self._rows.get(str(user))
+        if row is None or not (self.rollup / "user_month.npy").exists():
+            return None
+        user_month = np.load(self.rollup / "user_month.npy", mmap_mode="r")
+        if row >= user_month.shape[0]:
+            return None
+        as_float = lambda v: None if np.isnan(v) else round(float(v), 2)  # noqa: E731
+        return {
+            "months": self.summary()["months"],
+            "spend": [as_float(v) for v in user_month[row]],
+            "budget": as_float(np.load(self.rollup / "user_budget.npy", mmap_mode="r")[row]),
+            "forecast": as_float(np.load(self.rollup / "forecast.npy", mmap_mode="r")[row]),
+        }
+
+    # -- writes --------------------------------------------------------
+
+    def _user_rows(self, users):
+        rows = np.empty(len(users), dtype=np.int64)
+        for i, user in enumerate(users):
+            row = self._rows.get(user)
+            if row is None:
+                row = self._rows[user] = len(self.users)
+                self.users.append(user)
+            rows[i] = row
+        return rows
+
+    def append_month(self, month, chunks):
+        """Archive ``month`` from ``(users, spend, budgets)`` chunks (see
+        :func:`spend_chunk`) and fold it into the rollups."""
+        if not _MONTH.match(month):
+            raise ValueError(f"month must be YYYY-MM, got {month!r}")
+        rows, spends, budgets = [], [], []
+        for users, spend, budget in chunks:
+            rows.append(self._user_rows(users))
+            spends.append(spend)
+            budgets.append(budget)
+        weeks = max((s.shape[1] for s in spends), default=catalog.WEEKS)
+        spend = np.zeros((sum(len(r) for r in rows), weeks, 3), dtype=np.float32)
+        start = 0
+        for s in spends:
+            spend[start : start + len(s), : s.shape[1]] = s
+            start += len(s)
+        users = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        budget = np.concatenate(budgets) if budgets else np.zeros(0, dtype=np.float32)
+
+        later = [m for m in self.months() if m >= month]
+        (self.root / "months").mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.root / "months"))
+        np.save(tmp / "users.npy", users)
+        np.save(tmp / "spend.npy", spend)
+        np.save(tmp / "budget.npy", budget)
+        target = self.root / "months" / month
+        if target.exists():
+            shutil.rmtree(target)
+        tmp.rename(target)
+        _save_json(self.root / "users.json", self.users)
+        if later:
+            self.rebuild()  # rewrote or back-filled history
+        else:
+            self._fold(month, users, spend, budget)
+
+    def _month_stats(self, month, users, spend, budget):
+        """Aggregates of one partition, streamed in row chunks."""
+        meals = np.zeros(3)
+        totals = []
+        over = 0
+        for start in range(0, len(users), CHUNK_ROWS):
+            chunk = np.asarray(spend[start : start + CHUNK_ROWS], dtype=np.float64)
+            meals += chunk.sum(axis=(0, 1))
+            total = chunk.sum(axis=(1, 2))
+            over += int((total > np.asarray(budget[start : start + CHUNK_ROWS]) + report.EPSILON).sum())
+            totals.append(total)
+        totals = np.concatenate(totals) if totals else np.zeros(0)
+        stats = {
+            "month": month,
+            "users": int(len(users)),
+            "total": round(float(meals.sum()), 2),
+            "meals": {meal: round(float(v), 2) for meal, v in zip(catalog.MEAL_TYPES, meals)},
+            "mean": round(float(totals.mean()), 2) if len(totals) else 0.0,
+            "over_budget": over,
+        }
+        for q, v in zip(PERCENTILES, np.percentile(totals, PERCENTILES) if len(totals) else [0.0] * len(PERCENTILES)):
+            stats[f"p{q}"] = round(float(v), 2)
+        return stats, totals
+
+    def _fold(self, month, users, spend, budget):
+        """Add one month (later than every other) to the rollups."""
+        self.rollup.mkdir(parents=True, exist_ok=True)
+        summary = self.summary()
+        n = len(self.users)
+        path = self.rollup / "user_month.npy"
+        old = np.load(path) if path.exists() else np.zeros((0, 0), dtype=np.float32)
+        user_month = np.full((n, old.shape[1] + 1), np.nan, dtype=np.float32)
+        user_month[: old.shape[0], : old.shape[1]] = old
+        path = self.rollup / "user_budget.npy"
+        user_budget = np.full(n, np.nan, dtype=np.float32)
+        if path.exists():
+            prev = np.load(path)
+            user_budget[: len(prev)] = prev
+
+        stats, totals = self._month_stats(month, users, spend, budget)
+        user_month[users, -1] = totals
+        user_budget[users] = budget
+        summary.setdefault("months", []).append(month)
+        summary.setdefault("stats", []).append(stats)
+        self._finish(summary, user_month, user_budget)
+
+    def rebuild(self):
+        """Recompute every rollup from the month partitions."""
+        months = self.months()
+        n = len(self.users)
+        user_month = np.full((n, len(months)), np.nan, dtype=np.float32)
+        user_budget = np.full(n, np.nan, dtype=np.float32)
+        summary = {"months": months, "stats": []}
+        for j, month in enumerate(months):
+            users, spend, budget = self.partition(month)
+            stats, totals = self._month_stats(month, users, spend, budget)
+            user_month[users, j] = totals
+            user_budget[users] = budget
+            summary["stats"].append(stats)
+        self.rollup.mkdir(parents=True, exist_ok=True)
+        self._finish(summary, user_month, user_budget)
+
+    def _finish(self, summary, user_month, user_budget):
+        forecast = weighted_forecast(user_month).astype(np.float32)
+        totals = [s["total"] for s in summary["stats"]]
+        known = ~np.isnan(forecast)
+        summary["rolling_total"] = [round(float(v), 2) for v in rolling_mean(totals)]
+        summary["forecast"] = {
+            "month": _next_month(summary["months"][-1]) if summary["months"] else None,
+            "window": WINDOW,
+            "total": round(float(weighted_forecast(np.array(totals))), 2) if totals else None,
+            "users": int(known.sum()),
+            "mean": round(float(forecast[known].mean()), 2) if known.any() else None,
+            "users_over_budget": int((forecast[known] > user_budget[known] + report.EPSILON).sum()),
+        }
+        _save(self.rollup / "user_month.npy", user_month)
+        _save(self.rollup / "user_budget.npy", user_budget)
+        _save(self.rollup / "forecast.npy", forecast)
+        _save_json(self.rollup / "summary.json", summary)
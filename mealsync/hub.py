@@ -0,0 +1,171 @@
+"""One versioned server copy per user, shared by all of the user's sessions.
+
+Every tab or device a user has open is its own Streamlit session.  Kept
+apart, their copies of the plan drift and whichever snapshots last
+overwrites the others' edits.  :class:`PlanHub` instead gives all sessions
+of a user in the process one :class:`SharedPlan`:
+
+* each edit is committed in order under the plan's lock and gets the next
+  version number; the store journals it from the shared copy, so every
+  snapshot includes everyone's edits;
+* a session catches its browser up with :meth:`SharedPlan.changes`, the
+  other sessions' edits since the version it last forwarded merged into
+  one delta, minus the slots its own later edits overwrote.  Concurrent
+  edits therefore merge per slot and the newest edit of a slot wins;
+* only the last ``keep`` edits are kept in memory; a session further
+  behind than that gets the whole plan instead;
+* the plan is reloaded when another process wrote it to the store (see
+  :meth:`~mealsync.store.PlanStore.diverged`), such as ``batch.py
+  --bulk``; every session then gets the whole plan.
+
+Costs are proportional to the edits: nothing here copies or walks the
+plan except a replace or reload; commits and catch-ups each look up the
+plan's store stamp.  Shared plans live as long as one of their
+sessions holds them.
+"""
+
+import collections
+import copy
+import threading
+import weakref
+
+from mealsync import plan
+
+# Per-tab view state, never forwarded to another session.
+LOCAL_KEYS = ("selectedWeek",)
+
+
+def leaves(delta, prefix=()):
+    """``(path, value)`` of every leaf of a delta."""
+    for key, value in delta.items():
+        path = prefix + (str(key),)
+        if isinstance(value, dict) and value:
+            yield from leaves(value, path)
+        else:
+            yield path, value
+
+
+def without(delta, paths):
+    """``delta`` minus the leaves at (or under) ``paths``; None if empty."""
+    out = {}
+    for path, value in leaves(delta):
+        if any(path[:i] in paths for i in range(1, len(path) + 1)):
+            continue
+        node = out
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = value
+    return out or None
+
+
+class SharedPlan:
+    """The server copy of one user's plan and its recent edits."""
+
+    def __init__(self, user, store, keep=256):
+        self.user = user
+        self.store = store
+        self.state = None
+        self._load()
+        self.version = 0
+        self.log = collections.deque(maxlen=keep)  # (version, origin, delta | None for a replace)
+        self.lock = threading.RLock()
+        self.stats = {"commits": 0, "replaces": 0, "conflicts": 0, "reloads": 0}
+
+    def _load(self):
+        if self.store is None:
+            return
+        self.store.track(self.user)
+        state = self.store.load(self.user)
+        self.state = plan.share_defaults(plan.ensure_structure(state)) if state is not None else None
+
+    def refresh(self):
+        """Reload the plan if another process wrote it; True if it did.
+        Every origin then gets the whole plan from :meth:`changes`."""
+        with self.lock:
+            if self.store is None or not self.store.diverged(self.user):
+                return False
+            self._load()
+            self.version += 1
+            self.log.append((self.version, None, None))
+            self.stats["reloads"] += 1
+            return True
+
+    def commit(self, delta, origin, base=None):
+        """Apply one edit made by ``origin`` (a browser page id); returns
+        the new version.  ``base`` is the version the edit was made
+        against; slots another origin changed since then are counted as
+        conflicts (this edit, the newest, wins them)."""
+        with self.lock:
+            self.refresh()
+            if base is not None and base < self.version:
+                theirs = {path for v, o, d in self.log if v > base and o != origin and d for path, _ in leaves(d)}
+                self.stats["conflicts"] += sum(path in theirs for path, _ in leaves(delta))
+            plan.apply_delta(self.state, delta)
+            self.version += 1
+            self.log.append((self.version, origin, delta))
+            self.stats["commits"] += 1
+            if self.store is not None:
+                self.store.record(self.user, delta, self.state)
+            return self.version
+
+    def replace(self, state, origin):
+        """Make ``state`` the plan (first page load, reset); returns the version."""
+        with self.lock:
+            self.state = plan.share_defaults(plan.ensure_structure(copy.deepcopy(state)))
+            self.version += 1
+            self.log.append((self.version, origin, None))
+            self.stats["replaces"] += 1
+            if self.store is not None:
+                self.store.save(self.user, self.state)
+            return self.version
+
+    def changes(self, since, origin):
+        """What ``origin`` has not seen after version ``since``.
+
+        Returns ``(version, delta)`` with a merged delta of the other
+        origins' edits (None if there are none), or ``(version, "replace")``
+        when the plan was replaced by someone else or ``since`` is older
+        than the kept edits.
+        """
+        with self.lock:
+            self.refresh()
+            if since >= self.version:
+                return self.version, None
+            if not self.log or self.log[0][0] > since + 1:
+                return self.version, "replace"
+            merged = None
+            for version, who, delta in self.log:
+                if version <= since:
+                    continue
+                if delta is None:
+                    if who != origin:
+                        return self.version, "replace"
+                    merged = None  # our own replace supersedes everything before it
+                elif who != origin:
+                    merged = plan.merge_deltas(merged or {}, delta)
+                elif merged:
+                    merged = without(merged, {path for path, _ in leaves(delta)})
+            if merged:
+                merged = without(merged, {(k,) for k in LOCAL_KEYS})
+            return self.version, merged
+
+
+class PlanHub:
+    """The process-wide registry of :class:`SharedPlan` objects."""
+
+    def __init__(self, store, keep=256):
+        self.store = store
+        self.keep = keep
+        self._plans = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def plan(self, user):
+        """The user's shared plan, loading it from the store on first use."""
+        with self._lock:
+            shared = self._plans.get(user)
+            if shared is None:
+                shared = self._plans[user] = SharedPlan(user, self.store, self.keep)
+            return shared
+
+    def __len__(self):
+        return len(self._plans)
@@ -0,0 +1,197 @@
+"""Render, persistence and rerun timings, aggregated per process.
+
+Sampled pages (a fraction ``MEALSYNC_METRICS_SAMPLE`` of sessions, or any
+page opened with ``?debug=1``) report client spans in milliseconds --
+``makeGrid``, ``renderWeek``, ``updateSummary``, ``analysis``,
+``saveState``, ``loadState`` -- and gauges -- ``stateBytes``,
+``journalBytes``, ``domNodes`` -- inside the component value they send
+anyway (see ``frontend/metrics.js``).  The server times each rerun of the
+app script.  :class:`Metrics` folds both into fixed-bucket histograms and
+renders them in the Prometheus text format; with ``MEALSYNC_METRICS_FILE``
+set the text is written there (atomically, at most every
+``EXPORT_INTERVAL`` seconds) for node_exporter's textfile collector.
+
+With sampling off and no export file nothing is recorded: the rerun
+timer is a no-op context and pages never measure.
+"""
+
+import bisect
+import contextlib
+import os
+import random
+import tempfile
+import threading
+import time
+
+SAMPLE_RATE = float(os.environ.get("MEALSYNC_METRICS_SAMPLE", "0") or 0)
+EXPORT_PATH = os.environ.get("MEALSYNC_METRICS_FILE")
+EXPORT_INTERVAL = 15.0
+
+SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BYTES = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+NODES = (100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+
+# Client spans are reported in ms; gauges with their buckets.  Anything
+# else a page sends is dropped, so clients cannot add series.
+CLIENT_SPANS = ("makeGrid", "renderWeek", "updateSummary", "analysis", "saveState", "loadState")
+CLIENT_GAUGES = {"stateBytes": ("state_bytes", BYTES), "journalBytes": ("journal_bytes", BYTES),
+                 "domNodes": ("dom_nodes", NODES)}
+MAX_SAMPLES = 64
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus exposes it."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bucket bound holding quantile ``q`` (the max past the last bucket)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metrics:
+    """Thread-safe aggregator shared by every session of a process."""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, export_path=EXPORT_PATH, export_interval=EXPORT_INTERVAL):
+        self.sample_rate = sample_rate
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self.enabled = sample_rate > 0 or bool(export_path)
+        self._lock = threading.Lock()
+        self._hist = {}  # (metric, labels tuple) -> Histogram
+        self._counters = {"reports": 0, "reruns": 0}
+        self._exported = 0.0
+
+    def sample(self):
+        """Whether a new session should report client metrics."""
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _observe(self, metric, labels, value, buckets):
+        key = (metric, labels)
+        hist = self._hist.get(key)
+        if hist is None:
+            hist = self._hist[key] = Histogram(buckets)
+        hist.observe(value)
+
+    def observe(self, metric, value, buckets=SECONDS, **labels):
+        with self._lock:
+            self._observe(metric, tuple(sorted(labels.items())), value, buckets)
+
+    def ingest(self, report):
+        """Fold one client report (``{"spans": {name: [ms]}, "gauges": {...}}``)."""
+        if not isinstance(report, dict):
+            return
+        with self._lock:
+            self._counters["reports"] += 1
+            for name, samples in (report.get("spans") or {}).items():
+                if name not in CLIENT_SPANS or not isinstance(samples, list):
+                    continue
+                for ms in samples[:MAX_SAMPLES]:
+                    if isinstance(ms, (int, float)) and ms >= 0:
+                        self._observe("client_span_seconds", (("span", name),), ms / 1000.0, SECONDS)
+            for name, value in (report.get("gauges") or {}).items():
+                if name in CLIENT_GAUGES and isinstance(value, (int, float)):
+                    metric, buckets = CLIENT_GAUGES[name]
+                    self._observe(f"client_{metric}", (), float(value), buckets)
+
+    @contextlib.contextmanager
+    def rerun(self, page="app", force=False):
+        """Time one script rerun (``force``: even with metrics off)."""
+        if not (self.enabled or force):
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self._counters["reruns"] += 1
+                self._observe("rerun_seconds", (("page", page),), elapsed, SECONDS)
+            self.maybe_export()
+
+    def summary(self):
+        """One row per series for the debug panel."""
+        with self._lock:
+            rows = []
+            for (metric, labels), h in sorted(self._hist.items()):
+                rows.append({
+                    "metric": metric,
+                    "labels": ",".join(f"{k}={v}" for k, v in labels),
+                    "count": h.count,
+                    "mean": h.sum / h.count if h.count else None,
+                    "p50": h.quantile(0.5),
+                    "p99": h.quantile(0.99),
+                    "max": h.max,
+                })
+            return rows
+
+    def render(self):
+        """The Prometheus text exposition of everything recorded."""
+        with self._lock:
+            lines = []
+            for name, value in sorted(self._counters.items()):
+                metric = f"mealsync_{name}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+            typed = set()
+            for (name, labels), h in sorted(self._hist.items()):
+                metric = f"mealsync_{name}"
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f"# TYPE {metric} histogram")
+                base = [f'{k}="{_escape(v)}"' for k, v in labels]
+                cumulative = 0
+                for bound, n in zip(list(h.buckets) + ["+Inf"], h.counts):
+                    cumulative += n
+                    le = ",".join(base + [f'le="{bound}"'])
+                    lines.append(f"{metric}_bucket{{{le}}} {cumulative}")
+                suffix = "{" + ",".join(base) + "}" if base else ""
+                lines.append(f"{metric}_sum{suffix} {h.sum:.6g}")
+                lines.append(f"{metric}_count{suffix} {h.count}")
+            return "\n".join(lines) + "\n"
+
+    def write(self, path=None):
+        """Write :meth:`render` to ``path`` atomically."""
+        path = path or self.export_path
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(prefix=".mealsync-metrics-", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+
+    def maybe_export(self):
+        if not self.export_path:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._exported < self.export_interval:
+                return
+            self._exported = now
+        self.write()
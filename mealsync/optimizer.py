@@ -0,0 +1,209 @@
+"""Budget-constrained plan optimizer.
+
+Fills Mon-Sat of every week with a main meal (breakfast or lunch) and a
+dinner chosen from the options the UI offers that day, so that
+
+* each day stays within its ``day_limit`` (140),
+* each week stays within the ``weekly`` budget,
+* all weeks together stay within the ``weekdays`` budget and, with the
+  Sundays, the ``grandTotal`` budget,
+* the same dinner is never served two days running,
+
+while matching the preference plan (the ``*_DEFAULTS`` tables, or the
+user's own picks) as closely as possible.  Sundays only offer "skip" and
+custom prices in the UI, so they are copied from the user's plan as they
+are and what they cost comes off the ``grandTotal`` budget first.
+
+Each week is an exact dynamic program over (day, previous dinner, rupees
+spent); a full month takes a few milliseconds.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from mealsync import catalog, cost, plan
+
+MATCH_SCORE = 3.0
+PLANNED_SCORE = 1.0
+COST_PENALTY = 1e-3
+
+
+@dataclass
+class Budgets:
+    weekly: float
+    weekdays: float
+    grand: float
+
+    @classmethod
+    def from_state(cls, state=None):
+        raw = (state or {}).get("budgets") or {}
+
+        def get(key):
+            value = cost.parse_price(raw.get(key)) if raw.get(key) not in (None, "") else 0.0
+            return value or float(catalog.DEFAULT_BUDGETS[key])
+
+        return cls(get("weekly"), get("weekdays"), get("grandTotal"))
+
+
+def _preferences(state, week, day):
+    """Preferred (breakfast, lunch, dinner) ids for a day."""
+    if state is not None:
+        wk = (state.get("weeks") or {}).get(str(week)) or {}
+        return tuple(
+            v if v not in (None, "skip", "custom") else None
+            for v in (wk.get(f"sel-{week}-{day}-{meal}") for meal in catalog.MEAL_TYPES)
+        )
+    return (
+        catalog.default_for(catalog.BREAKFAST_DEFAULTS, week, day),
+        catalog.default_for(catalog.LUNCH_DEFAULTS, week, day),
+        catalog.default_for(catalog.DINNER_DEFAULTS, week, day),
+    )
+
+
+def _day_combos(week, day, prefs):
+    """Every (main type, main, dinner) the UI allows that day, scored.
+
+    Returns parallel arrays plus the combo descriptors; dinner index 0 is
+    "skip" and index ``i + 1`` is the i-th catalog dinner.
+    """
+    want_b, want_l, want_d = prefs
+    menu = catalog.current()
+    mains = [("breakfast", None)] + [("breakfast", m) for m in menu.breakfast_options(week, day)]
+    mains += [("lunch", m) for m in menu.menu["lunch"]]
+    dinners = [None] + menu.menu["dinner"]
+    limit = catalog.day_limit(day)
+
+    costs, scores, dinner_idx, combos = [], [], [], []
+    for main_type, main in mains:
+        for j, dinner in enumerate(dinners):
+            price = (main["price"] if main else 0) + (dinner["price"] if dinner else 0)
+            if price > limit:
+                continue
+            score = 0.0
+            if main:
+                score += PLANNED_SCORE
+                if main["id"] == (want_b if main_type == "breakfast" else want_l):
+                    score += MATCH_SCORE
+            if dinner:
+                score += PLANNED_SCORE + (MATCH_SCORE if dinner["id"] == want_d else 0.0)
+            costs.append(int(math.ceil(price)))
+            scores.append(score - COST_PENALTY * price)
+            dinner_idx.append(j)
+            combos.append((main_type, main["id"] if main else "skip", dinner["id"] if dinner else "skip"))
+    return np.array(costs), np.array(scores), np.array(dinner_idx), combos
+
+
+def _solve_week(days, cap):
+    """Exact DP for one week; returns (combo per day, rupees spent)."""
+    n_dinner = len(catalog.current().menu["dinner"]) + 1
+    cap = max(int(cap), 0)
+    value = np.full((n_dinner, cap + 1), -np.inf)
+    value[0, 0] = 0.0
+    trace = []
+
+    for costs, scores, dinner_idx, _ in days:
+        # Best and second-best previous dinner per budget column, so the
+        # "no repeat" rule can fall back when the best shares our dinner.
+        order = np.argsort(value, axis=0)
+        best_row, second_row = order[-1], order[-2]
+        cols = np.arange(cap + 1)
+        best, second = value[best_row, cols], value[second_row, cols]
+
+        new = np.full_like(value, -np.inf)
+        pick = np.full(value.shape, -1, dtype=np.int32)
+        prev = np.zeros(value.shape, dtype=np.int32)
+        for c in range(len(costs)):
+            k, j = costs[c], dinner_idx[c]
+            if k > cap:
+                continue
+            src_val, src_row = best[: cap + 1 - k], best_row[: cap + 1 - k]
+            if j:
+                clash = src_row == j
+                src_val = np.where(clash, second[: cap + 1 - k], src_val)
+                src_row = np.where(clash, second_row[: cap + 1 - k], src_row)
+            cand = src_val + scores[c]
+            better = cand > new[j, k:]
+            new[j, k:][better] = cand[better]
+            pick[j, k:][better] = c
+            prev[j, k:][better] = src_row[better]
+        value = new
+        trace.append((pick, prev))
+
+    j, spent = np.unravel_index(np.argmax(value), value.shape)
+    if not np.isfinite(value[j, spent]):
+        return None, 0
+    chosen = []
+    for (costs, _, _, _), (pick, prev) in zip(reversed(days), reversed(trace)):
+        c = pick[j, spent]
+        chosen.append(c)
+        j, spent = prev[j, spent], spent - costs[c]
+    chosen.reverse()
+    return chosen, int(sum(d[0][c] for d, c in zip(days, chosen)))
+
+
+def _keep_sundays(state, out, weeks):
+    """Copy the user's Sunday slots, custom prices and modified flags into ``out``."""
+    source = state.get("weeks") or {}
+    modified = state.get("modified") or {}
+    for w in range(1, weeks + 1):
+        wk = out["weeks"].setdefault(str(w), {})
+        prefixes = (f"sel-{w}-{catalog.SUNDAY}-", f"price-{w}-{catalog.SUNDAY}-")
+        for key in [k for k in wk if k.startswith(prefixes)]:
+            del wk[key]
+        for key, value in (source.get(str(w)) or {}).items():
+            if key.startswith(prefixes):
+                wk[key] = value
+                if modified.get(key):
+                    out["modified"][key] = True
+
+
+def optimize(state=None, weeks=None, budgets=None):
+    """Return a full plan that fits the budgets.
+
+    ``state`` supplies the budgets, the horizon and, when given, the
+    preferred picks; otherwise the default tables are the preference.
+    """
+    budgets = budgets or Budgets.from_state(state)
+    weeks = weeks or (plan.horizon(state) if state is not None else catalog.WEEKS)
+    out = plan.new_state(weeks)
+    if state is not None:
+        out["budgets"] = dict(state.get("budgets") or out["budgets"])
+        out["selectedWeek"] = state.get("selectedWeek", 1)
+        _keep_sundays(state, out, weeks)
+    sunday = float(cost.plan_totals([out]).sunday[0])
+    remaining = min(budgets.weekdays, budgets.grand - sunday)
+
+    for w in range(1, weeks + 1):
+        days = [_day_combos(w, d, _preferences(state, w, d)) for d in range(catalog.SUNDAY)]
+        # Share what is left evenly so early weeks cannot starve late ones.
+        cap = min(budgets.weekly, remaining / (weeks - w + 1) if w < weeks else remaining)
+        chosen, spent = _solve_week(days, math.floor(cap))
+        remaining -= spent
+        wk = out["weeks"].setdefault(str(w), {})
+        for d, ((_, _, _, combos), c) in enumerate(zip(days, chosen or [None] * 6)):
+            main_type, main, dinner = combos[c] if c is not None else ("breakfast", "skip", "skip")
+            for meal in ("breakfast", "lunch"):
+                wk.pop(f"sel-{w}-{d}-{meal}", None)
+            key = f"sel-{w}-{d}-{main_type}"
+            wk[key] = main
+            wk[f"sel-{w}-{d}-dinner"] = dinner
+            out["dayChoice"][f"{w}-w{d}"] = main_type
+            # Keep the UI from re-filling a deliberately skipped breakfast.
+            out["modified"][key] = True
+    return out
+
+
+def _optimize_chunk(states):
+    return [optimize(s) for s in states]
+
+
+def optimize_many(states, workers=None, chunk_size=64):
+    """Optimize many users' plans in parallel across processes."""
+    chunks = [states[i : i + chunk_size] for i in range(0, len(states), chunk_size)]
+    if len(chunks) <= 1 or workers == 1:
+        return _optimize_chunk(states)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [p for chunk in pool.map(_optimize_chunk, chunks) for p in chunk]
@@ -0,0 +1,190 @@
+"""Python mirror of the browser's plan state helpers.
+
+The state is the same dict ``loadState()`` produces::
+
+    {"selectedWeek": 1,
+     "horizon": 4,
+     "weeks": {"1": {"sel-1-0-dinner": "d-dosa", ...}, ...},
+     "dayChoice": {"1-w0": "breakfast", ...},
+     "budgets": {"weekly": "840.00", ...},
+     "modified": {"sel-1-0-breakfast": True, ...}}
+
+A *delta* has the same shape; a ``None`` leaf deletes the key.
+
+Parts of a plan that still equal the default plan can be shared by every
+session in the process (:func:`share_defaults`); :func:`apply_delta`
+copies a shared part before its first write.
+"""
+
+import copy
+import functools
+
+from mealsync import catalog
+
+SECTIONS = ("weeks", "dayChoice", "budgets", "modified")
+
+
+def horizon(state):
+    """Number of weeks in the plan; port of ``horizonOf()``.
+
+    Plans saved before the horizon was configurable have no ``horizon``
+    key and span their highest week (at least ``catalog.WEEKS``).
+    """
+    n = state.get("horizon")
+    if not n:
+        n = max([catalog.WEEKS] + [int(w) for w in (state.get("weeks") or {}) if str(w).isdigit()])
+    return max(1, min(int(n), catalog.MAX_WEEKS))
+
+
+def apply_default_plan(state, first=1):
+    """Port of ``applyDefaultMealPlan()``, for weeks ``first`` onwards."""
+    weeks = state.setdefault("weeks", {})
+    day_choice = state.setdefault("dayChoice", {})
+    state.setdefault("modified", {})
+    for w in range(first, horizon(state) + 1):
+        wk = weeks.setdefault(str(w), {})
+        for d in range(7):
+            ids = {
+                "breakfast": catalog.default_for(catalog.BREAKFAST_DEFAULTS, w, d),
+                "lunch": catalog.default_for(catalog.LUNCH_DEFAULTS, w, d),
+                "dinner": catalog.default_for(catalog.DINNER_DEFAULTS, w, d),
+            }
+            for meal, item in ids.items():
+                key = f"sel-{w}-{d}-{meal}"
+                if item:
+                    wk[key] = item
+                else:
+                    wk.pop(key, None)
+            if d != catalog.SUNDAY:
+                main = "lunch" if not ids["breakfast"] and ids["lunch"] else "breakfast"
+                day_choice[f"{w}-w{d}"] = main
+    return state
+
+
+def new_state(weeks=catalog.WEEKS):
+    """Port of ``createNewState()`` (without touching storage)."""
+    state = {
+        "selectedWeek": 1,
+        "horizon": weeks,
+        "weeks": {str(w): {} for w in range(1, weeks + 1)},
+        "dayChoice": {},
+        "budgets": {k: f"{v:.2f}" for k, v in catalog.DEFAULT_BUDGETS.items()},
+        "modified": {},
+    }
+    return apply_default_plan(state)
+
+
+def ensure_structure(state):
+    """Fill in missing sections the way ``loadState()`` does."""
+    for section in SECTIONS:
+        if not isinstance(state.get(section), dict):
+            state[section] = {}
+    weeks = state["weeks"]
+    for w in list(weeks):
+        if not isinstance(w, str):
+            weeks[str(w)] = weeks.pop(w)
+    n = horizon(state)
+    for w in range(1, n + 1):
+        weeks.setdefault(str(w), {})
+    if not state.get("selectedWeek") or int(state["selectedWeek"]) > n:
+        state["selectedWeek"] = 1
+    return state
+
+
+def resize(state, weeks):
+    """Delta that changes the plan's horizon to ``weeks``.
+
+    Added weeks get the default plan; weeks past the new end are dropped.
+    """
+    weeks = max(1, min(int(weeks), catalog.MAX_WEEKS))
+    old = horizon(state)
+    delta = {"horizon": weeks}
+    if weeks > old:
+        added = {"horizon": weeks, "weeks": {}, "dayChoice": {}}
+        apply_default_plan(added, first=old + 1)
+        del added["modified"]
+        delta.update(added)
+    elif weeks < old:
+        gone = range(weeks + 1, old + 1)
+        delta["weeks"] = {str(w): None for w in gone}
+        delta["dayChoice"] = {f"{w}-w{d}": None for w in gone for d in range(catalog.SUNDAY)}
+        prefixes = tuple(f"sel-{w}-" for w in gone)
+        delta["modified"] = {k: None for k in state.get("modified") or {} if k.startswith(prefixes)}
+        if int(state.get("selectedWeek") or 1) > weeks:
+            delta["selectedWeek"] = weeks
+    return delta
+
+
+# ids of the process-wide default dicts; they are cached for the life of
+# the process, so the ids stay valid.
+_shared = set()
+
+
+@functools.lru_cache(maxsize=1)
+def _default_plan():
+    state = new_state(catalog.MAX_WEEKS)
+    for part in [state["budgets"], *state["weeks"].values()]:
+        _shared.add(id(part))
+    return state
+
+
+@functools.lru_cache(maxsize=None)
+def _default_day_choice(weeks):
+    out = {k: v for k, v in _default_plan()["dayChoice"].items() if int(k.split("-")[0]) <= weeks}
+    _shared.add(id(out))
+    return out
+
+
+def share_defaults(state):
+    """Point the parts of ``state`` that equal the default plan at one
+    read-only copy shared by every session, so a session's memory only
+    holds what its user changed."""
+    base = _default_plan()
+    weeks = state.get("weeks") or {}
+    for w, wk in weeks.items():
+        default = base["weeks"].get(str(w))
+        if default is not None and wk is not default and wk == default:
+            weeks[w] = default
+    if state.get("budgets") == base["budgets"]:
+        state["budgets"] = base["budgets"]
+    day_choice = _default_day_choice(horizon(state))
+    if state.get("dayChoice") == day_choice:
+        state["dayChoice"] = day_choice
+    return state
+
+
+def _merge(target, delta):
+    for key, value in delta.items():
+        key = str(key)
+        if isinstance(value, dict):
+            node = target.get(key)
+            if not isinstance(node, dict):
+                node = target[key] = {}
+            elif id(node) in _shared:
+                node = target[key] = dict(node)
+            _merge(node, value)
+        elif value is None:
+            target.pop(key, None)
+        else:
+            target[key] = value
+
+
+def apply_delta(state, delta):
+    """Apply a client/server delta in place and return the state."""
+    delta = dict(delta)
+    if "selectedWeek" in delta:
+        state["selectedWeek"] = delta.pop("selectedWeek")
+    _merge(state, delta)
+    return state
+
+
+def merge_deltas(*deltas):
+    """Fold several deltas into one, later keys winning."""
+    out = {}
+    for delta in deltas:
+        for key, value in delta.items():
+            if isinstance(value, dict) and isinstance(out.get(key), dict):
+                out[key] = merge_deltas(out[key], value)
+            else:
+                out[key] = copy.deepcopy(value)
+    return out
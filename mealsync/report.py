@@ -0,0 +1,290 @@
+"""Batch validation and costing of saved plans.
+
+Reads ``mealsync_state`` documents (or packed payloads) from a directory
+of ``.json`` files or a JSONL file, checks them, and computes what the
+browser shows for each: the ``updateSummary()`` totals with their budget
+differences and the day totals that go over their ``day_limit`` (the
+red ``diffHtml`` figures on the day cards).
+
+Input is read lazily in chunks and each chunk is costed in one
+:func:`cost.plan_totals` pass on a worker process; only a bounded number
+of chunks is in flight, so memory stays flat however many plans there
+are.  Rows come back in input order and are streamed to CSV or, with
+``pyarrow`` installed, Parquet.
+"""
+
+import collections
+import csv
+import functools
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from mealsync import catalog, codec, cost, plan
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional: Parquet output needs it
+    pyarrow = None
+
+TOTALS = ("current_week", "sunday", "weekdays", "grand")
+# The summary row each total is compared with.
+BUDGET_FOR = {"current_week": "weekly", "sunday": "sunday", "weekdays": "weekdays", "grand": "grandTotal"}
+COLUMNS = (
+    ("user", "string"),
+    ("valid", "bool"),
+    ("error", "string"),
+    ("warnings", "string"),
+    ("weeks", "int64"),
+    *((name, "float64") for name in TOTALS),
+    *((f"{name}_budget", "float64") for name in TOTALS),
+    *((f"{name}_diff", "float64") for name in TOTALS),
+    ("overrun_days", "int64"),
+    ("overrun_total", "float64"),
+    ("worst_day", "string"),
+    ("worst_overrun", "float64"),
+)
+OVERRUN_COLUMNS = (
+    ("user", "string"),
+    ("week", "int64"),
+    ("day", "string"),
+    ("total", "float64"),
+    ("limit", "float64"),
+    ("overrun", "float64"),
+)
+# diffHtml hides differences that round to zero.
+EPSILON = 0.005
+
+
+def read_documents(source):
+    """Yield ``(user, text)`` for every document in ``source``.
+
+    A directory yields its ``*.json`` files (user = file stem); a
+    ``.db`` file yields every plan in that :class:`~mealsync.store.PlanStore`
+    (journal included, the database opened read-only) as a packed payload;
+    any other file is read as JSONL
+    (user = 1-based line number).  Documents may wrap the plan as
+    ``{"user": ..., "state": ...}``, which :func:`check_plan` unwraps.
+    """
+    source = Path(source)
+    if source.suffix in (".db", ".sqlite"):
+        yield from _stored_documents(source)
+        return
+    if source.is_dir():
+        # scandir rather than a sorted listing: nothing is held per file.
+        with os.scandir(source) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json") and entry.is_file():
+                    yield entry.name[: -len(".json")], Path(entry.path).read_text("utf-8")
+        return
+    with open(source, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if line.strip():
+                yield str(n), line
+
+
+def _stored_documents(path):
+    from mealsync.store import read_plans
+
+    for user, state in read_plans(path):
+        yield user, json.dumps(codec.encode(state), separators=(",", ":"))
+
+
+def chunked(items, size):
+    it = iter(items)
+    while chunk := list(itertools.islice(it, size)):
+        yield chunk
+
+
+def check_plan(doc):
+    """Return ``(user, state, warnings)`` for a parsed document.
+
+    Raises ``ValueError`` for documents that are not a plan at all;
+    problems the browser would shrug off (unknown items, unparsable
+    prices or budgets) are returned as warnings.
+    """
+    user = None
+    if isinstance(doc, dict) and isinstance(doc.get("state"), dict):
+        user, doc = doc.get("user"), doc["state"]
+    state = plan.ensure_structure(codec.migrate(doc))
+    raw = state.get("horizon")
+    if raw is not None and not (isinstance(raw, int) and 1 <= raw <= catalog.MAX_WEEKS):
+        raise ValueError(f"horizon must be 1-{catalog.MAX_WEEKS} weeks, got {raw!r}")
+    try:
+        int(state["selectedWeek"])
+    except (TypeError, ValueError):
+        raise ValueError(f"bad selectedWeek {state['selectedWeek']!r}") from None
+
+    warnings = []
+    codes = price_table(catalog.current().version).codes
+    for week in state["weeks"].values():
+        if not isinstance(week, dict):
+            raise ValueError("week entries must be objects")
+        for key, value in week.items():
+            if value in (None, "", "skip", "custom"):
+                continue
+            if key.startswith("sel-"):
+                meal = key[key.rfind("-") + 1 :]
+                if meal in codes and value not in codes[meal]:
+                    warnings.append(f"unknown item {value!r} in {key}")
+            elif key.startswith("price-") and cost.parse_float(value) is None:
+                warnings.append(f"unparsable price {value!r} in {key}")
+    for key in BUDGET_FOR.values():
+        value = state["budgets"].get(key)
+        if value and cost.parse_float(value) is None:
+            warnings.append(f"unparsable budget {key}={value!r}")
+    return user, state, warnings
+
+
+def summary_budget(state, key):
+    """The budget ``updateSummary()`` compares with, None if it shows no diff."""
+    value = state["budgets"].get(key) or catalog.DEFAULT_BUDGETS[key]
+    return cost.parse_float(value)
+
+
+def _r(value):
+    return None if value is None else round(float(value), 2)
+
+
+@functools.lru_cache(maxsize=4)
+def price_table(version):
+    """:class:`cost.PriceTable` of the current catalog, built once per version."""
+    return cost.PriceTable(catalog.current().menu)
+
+
+def cost_chunk(items):
+    """Cost one chunk of ``(user, text)`` documents.
+
+    Returns ``(rows, overruns)``: one row per document, invalid ones with
+    ``valid`` false and the reason in ``error``, plus one overrun row per
+    day over its limit.
+    """
+    rows, plans = [], []
+    for user, text in items:
+        row = dict.fromkeys(name for name, _ in COLUMNS)
+        row.update(user=user, valid=False)
+        try:
+            wrapped_user, state, warnings = check_plan(json.loads(text))
+        except (ValueError, TypeError, AttributeError) as exc:
+            row["error"] = str(exc) or type(exc).__name__
+        else:
+            row.update(user=str(wrapped_user or user), valid=True, warnings="; ".join(warnings) or None)
+            plans.append((row, state))
+        rows.append(row)
+    if not plans:
+        return rows, []
+
+    table = price_table(catalog.current().version)
+    states = [state for _, state in plans]
+    totals = cost.plan_totals(states, table)
+    limits = np.array([catalog.day_limit(d) for d in range(7)], dtype=np.float64)
+    horizons = np.array([plan.horizon(state) for state in states])
+    over = totals.day - limits
+    # Days past a plan's horizon are padding, not overruns.
+    over[np.arange(totals.day.shape[1]) >= horizons[:, None]] = 0.0
+    hit = over > EPSILON
+    counts = hit.sum(axis=(1, 2)).tolist()
+    excess = np.round(np.where(hit, over, 0.0).sum(axis=(1, 2)), 2).tolist()
+    flat = over.reshape(len(states), -1)
+    worst = flat.argmax(axis=1).tolist()
+    worst_value = np.round(flat.max(axis=1), 2).tolist()
+    values = {name: np.round(getattr(totals, name), 2).tolist() for name in TOTALS}
+
+    for i, (row, state) in enumerate(plans):
+        row["weeks"] = int(horizons[i])
+        for name in TOTALS:
+            value = values[name][i]
+            budget = summary_budget(state, BUDGET_FOR[name])
+            row[name] = value
+            row[f"{name}_budget"] = _r(budget)
+            row[f"{name}_diff"] = None if budget is None else _r(budget - value)
+        row["overrun_days"] = counts[i]
+        row["overrun_total"] = excess[i]
+        if counts[i]:
+            w, d = divmod(worst[i], 7)
+            row["worst_day"] = f"W{w + 1} {catalog.WEEK_DAYS[d]}"
+            row["worst_overrun"] = worst_value[i]
+
+    overruns = [
+        {
+            "user": plans[i][0]["user"],
+            "week": w + 1,
+            "day": catalog.WEEK_DAYS[d],
+            "total": total,
+            "limit": limits[d].item(),
+            "overrun": amount,
+        }
+        for i, w, d, total, amount in zip(
+            *(idx.tolist() for idx in np.nonzero(hit)),
+            np.round(totals.day[hit], 2).tolist(),
+            np.round(over[hit], 2).tolist(),
+        )
+    ]
+    return rows, overruns
+
+
+def run(source, chunk_size=1000, workers=None, work=cost_chunk):
+    """Yield ``work(chunk)`` (by default ``(rows, overruns)``) per chunk of
+    ``source``, in input order.
+
+    At most two chunks per worker are queued at a time.
+    """
+    chunks = chunked(read_documents(source), chunk_size)
+    if workers == 1:
+        yield from map(work, chunks)
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque(pool.submit(work, c) for c in itertools.islice(chunks, 2 * workers))
+        while pending:
+            result = pending.popleft().result()
+            for c in itertools.islice(chunks, 1):
+                pending.append(pool.submit(work, c))
+            yield result
+
+
+class CsvSink:
+    def __init__(self, path, columns):
+        self.names = [name for name, _ in columns]
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, self.names)
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    """Appends each chunk as a row group."""
+
+    def __init__(self, path, columns):
+        if pyarrow is None:
+            raise RuntimeError("Parquet output needs the pyarrow package")
+        types = {"string": pyarrow.string(), "bool": pyarrow.bool_(), "int64": pyarrow.int64(), "float64": pyarrow.float64()}
+        self.schema = pyarrow.schema([(name, types[kind]) for name, kind in columns])
+        self._writer = pyarrow.parquet.ParquetWriter(str(path), self.schema)
+
+    def write(self, rows):
+        if rows:
+            self._writer.write_table(pyarrow.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def open_sink(path, columns=COLUMNS):
+    """A CSV or Parquet writer, picked by the file extension."""
+    suffix = Path(path).suffix.lower()
+    if suffix in (".parquet", ".pq"):
+        return ParquetSink(path, columns)
+    if suffix == ".csv" or str(path) == "/dev/stdout":
+        return CsvSink(path, columns)
+    raise ValueError(f"unsupported output format {suffix!r}; use .csv or .parquet")
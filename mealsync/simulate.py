@@ -0,0 +1,230 @@
+"""What-if price simulation across many plans.
+
+Every plan is reduced to counts, so a candidate price vector costs the
+whole user base in one matrix product:
+
+* ``weekdays``, ``sunday`` and ``current_week`` are ``(users, items)``
+  matrices counting how often each item is in a slot that counts towards
+  that summary total (``fixed`` holds the custom prices, which no
+  scenario changes);
+* ``combos`` is a ``(users, combos)`` matrix counting days per distinct
+  (Sunday or not, main item, dinner item) combination; a day total
+  depends only on its combination, so the days over their ``day_limit``
+  are ``combos @ over`` for an ``(combos, scenarios)`` indicator matrix.
+  Days with a custom price are few and their amounts arbitrary, so they
+  are kept as a flat list instead.
+
+Scenarios are evaluated in blocks of columns, so hundreds of them over
+100k plans take seconds and bounded memory.
+"""
+
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+from mealsync import catalog, cost, plan, report
+
+BUDGET_KEYS = ("weekly", "sunday", "weekdays", "grandTotal")
+PERCENTILES = (10, 50, 90, 99)
+BLOCK = 32
+EPSILON = report.EPSILON
+
+
+@dataclass
+class Usage:
+    """Item counts of ``n`` plans against one :class:`cost.PriceTable`."""
+
+    users: list
+    weekdays: np.ndarray  # (n, items) float64
+    sunday: np.ndarray  # (n, items) float64
+    current_week: np.ndarray  # (n, items) float64
+    fixed: np.ndarray  # (n, 3) custom spend in weekdays, sunday, current week
+    budgets: np.ndarray  # (n, 4) BUDGET_KEYS, NaN where diffHtml shows nothing
+    combos: np.ndarray  # (n, combos) float32 day counts, days without custom prices
+    combo_keys: np.ndarray  # (combos,) int64, sorted
+    custom_rows: np.ndarray  # (days,) user of each day with a custom price
+    custom_keys: np.ndarray  # (days,) its combination key
+    custom_amounts: np.ndarray  # (days,) its custom spend
+
+    def __len__(self):
+        return len(self.users)
+
+    @classmethod
+    def from_states(cls, states, users=None, table=None):
+        table = table or cost.PriceTable()
+        users = list(users) if users is not None else list(range(len(states)))
+        batch = cost.encode_plans(states, table)
+        n, k = len(batch), len(table.prices)
+        horizons = np.array([plan.horizon(s) for s in states], dtype=np.int64).reshape(n)
+
+        main = np.where(batch.lunch_main, batch.codes[..., cost.LUNCH], batch.codes[..., cost.BREAKFAST]).astype(np.int64)
+        dinner = batch.codes[..., cost.DINNER].astype(np.int64)
+        custom = (batch.custom * cost.active_mask(batch)).sum(axis=3)  # (n, weeks, 7)
+        row = np.broadcast_to(np.arange(n)[:, None, None], main.shape)
+        week = np.arange(batch.weeks)[None, :, None]
+        day = np.arange(7)[None, None, :]
+        planned = week < horizons[:, None, None]
+        selected = np.clip(batch.selected_week - 1, 0, batch.weeks - 1)[:, None, None]
+
+        def counts(mask):
+            idx = np.concatenate([(row * k + main)[mask], (row * k + dinner)[mask]])
+            return np.bincount(idx, minlength=n * k).reshape(n, k).astype(np.float64)
+
+        weekdays = planned & (day < catalog.SUNDAY)
+        sunday = planned & (day == catalog.SUNDAY)
+        current = weekdays & (week == selected)
+        fixed = np.stack([(custom * m).sum(axis=(1, 2)) for m in (weekdays, sunday, current)], axis=1)
+
+        keys = ((day == catalog.SUNDAY) * k + main) * k + dinner
+        has_custom = custom != 0
+        plain = planned & ~has_custom
+        special = planned & has_custom
+        combo_keys, inverse = np.unique(keys[plain], return_inverse=True)
+        m = len(combo_keys)
+        combos = np.bincount(row[plain] * m + inverse.reshape(-1), minlength=n * m).reshape(n, m)
+
+        budgets = np.array(
+            [[_nan(report.summary_budget(s, key)) for key in BUDGET_KEYS] for s in states], dtype=np.float64
+        ).reshape(n, len(BUDGET_KEYS))
+        return cls(
+            users, counts(weekdays), counts(sunday), counts(current), fixed, budgets,
+            combos.astype(np.float32), combo_keys, row[special], keys[special], custom[special],
+        )
+
+    @classmethod
+    def concat(cls, parts):
+        """Join usages of disjoint user sets (e.g. one per chunk)."""
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            raise ValueError("no plans to simulate")
+        keys = np.unique(np.concatenate([p.combo_keys for p in parts]))
+        combos = np.zeros((sum(map(len, parts)), len(keys)), dtype=np.float32)
+        start = 0
+        for p in parts:
+            combos[start : start + len(p), np.searchsorted(keys, p.combo_keys)] = p.combos
+            start += len(p)
+        stack = lambda name: np.concatenate([getattr(p, name) for p in parts])  # noqa: E731
+        offsets = np.cumsum([0] + [len(p) for p in parts[:-1]])
+        return cls(
+            [u for p in parts for u in p.users],
+            stack("weekdays"),
+            stack("sunday"),
+            stack("current_week"),
+            stack("fixed"),
+            stack("budgets"),
+            combos,
+            keys,
+            np.concatenate([p.custom_rows + off for p, off in zip(parts, offsets)]),
+            stack("custom_keys"),
+            stack("custom_amounts"),
+        )
+
+
+def _split_keys(keys, items):
+    """(is_sunday, main code, dinner code) of combination keys."""
+    return keys // (items * items), keys // items % items, keys % items
+
+
+def _day_totals(prices, keys, items):
+    """Day total of each combination per scenario, and the total it must
+    exceed to show as over its limit."""
+    sunday, main, dinner = _split_keys(keys, items)
+    limits = np.where(sunday == 1, catalog.SUNDAY_LIMIT, catalog.WEEKDAY_LIMIT)
+    return prices[main] + prices[dinner], limits[:, None] + EPSILON
+
+
+def _nan(value):
+    return np.nan if value is None else value
+
+
+def usage_chunk(items):
+    """:class:`Usage` of the valid plans in one chunk of ``(user, text)``."""
+    users, states = [], []
+    for user, text in items:
+        try:
+            wrapped_user, state, _ = report.check_plan(json.loads(text))
+        except (ValueError, TypeError, AttributeError):
+            continue
+        users.append(str(wrapped_user or user))
+        states.append(state)
+    return Usage.from_states(states, users, report.price_table(catalog.current().version))
+
+
+def scenario_prices(table, scenarios):
+    """``(items, scenarios)`` price matrix: the table's prices with each
+    scenario's ``{item_id: price}`` overrides applied."""
+    prices = np.repeat(table.prices[:, None], len(scenarios), axis=1)
+    for j, overrides in enumerate(scenarios):
+        for item_id, price in overrides.items():
+            codes = [c[item_id] for c in table.codes.values() if item_id in c]
+            if not codes or item_id in ("skip", "custom"):
+                raise ValueError(f"unknown item {item_id!r}")
+            prices[codes, j] = float(price)
+    return prices
+
+
+def _distribution(values):
+    out = {"mean": values.mean(axis=0)}
+    # One contiguous row per scenario keeps the partitioning cache friendly.
+    for q, row in zip(PERCENTILES, np.percentile(np.ascontiguousarray(values.T), PERCENTILES, axis=1)):
+        out[f"p{q}"] = row
+    return out
+
+
+def simulate(usage, scenarios, table=None, block=BLOCK):
+    """Cost every plan under each scenario.
+
+    ``scenarios`` maps a name to ``{item_id: new price}``; the current
+    prices are always included first as ``"current"``.  Returns one
+    report per scenario with the number of users over each budget (as
+    ``updateSummary()`` would flag it), over any day limit, and the spend
+    distribution, plus the mean change against current prices.
+    """
+    table = table or cost.PriceTable()
+    names = ["current", *scenarios]
+    prices = scenario_prices(table, [{}, *scenarios.values()])
+    k = len(table.prices)
+    budgets = np.nan_to_num(usage.budgets, nan=np.inf)
+    # Custom-price days are costed per distinct combination, then summed
+    # per user over the (row-sorted) runs of days.
+    custom_keys, custom_index = np.unique(usage.custom_keys, return_inverse=True)
+    custom_index = custom_index.reshape(-1)
+    starts = np.flatnonzero(np.diff(usage.custom_rows, prepend=-1))
+    custom_users = usage.custom_rows[starts]
+    amounts = usage.custom_amounts[:, None]
+
+    reports, baseline = [], None
+    for start in range(0, len(names), block):
+        p = prices[:, start : start + block]
+        weekdays = usage.weekdays @ p + usage.fixed[:, 0:1]
+        sun = usage.sunday @ p + usage.fixed[:, 1:2]
+        current = usage.current_week @ p + usage.fixed[:, 2:3]
+        grand = weekdays + sun
+        totals, limits = _day_totals(p, usage.combo_keys, k)
+        days_over = usage.combos @ (totals > limits).astype(np.float32)
+        if len(starts):
+            totals, limits = _day_totals(p, custom_keys, k)
+            custom_over = (totals[custom_index] + amounts > limits[custom_index]).astype(np.float32)
+            days_over[custom_users] += np.add.reduceat(custom_over, starts, axis=0)
+        over = {
+            key: total > budgets[:, j : j + 1] + EPSILON
+            for j, (key, total) in enumerate(zip(BUDGET_KEYS, (current, sun, weekdays, grand)))
+        }
+        any_over = np.logical_or.reduce(list(over.values()))
+        if baseline is None:
+            baseline = grand[:, 0].copy()
+        change = (grand - baseline[:, None]).mean(axis=0)
+        spend = {"grand": _distribution(grand), "current_week": _distribution(current)}
+        for j in range(p.shape[1]):
+            reports.append({
+                "scenario": names[start + j],
+                "users": len(usage),
+                "over_budget": {key: int(v[:, j].sum()) for key, v in over.items()},
+                "over_any_budget": int(any_over[:, j].sum()),
+                "users_over_day_limit": int((days_over[:, j] > 0).sum()),
+                "days_over_limit": int(days_over[:, j].sum()),
+                "spend": {name: {s: round(float(v[j]), 2) for s, v in d.items()} for name, d in spend.items()},
+                "grand_change_mean": round(float(change[j]), 2),
+            })
+    return reports
@@ -0,0 +1,469 @@
+"""SQLite-backed per-user plan storage.
+
+Plans are stored in the packed format of :mod:`mealsync.codec`.  The
+database runs in WAL mode so readers never block the writer, reads use a
+small connection pool, and writes are buffered and written by a single
+background thread as one transaction per interval.
+
+Edits are journaled: :meth:`PlanStore.record` appends the edit's delta to
+``plan_log`` (a small sequential insert) and only every
+``compact_every`` edits writes a full snapshot to ``plans``, tagged with
+the last log row it includes (``log_seq``).  A plan loads as its snapshot
+plus the log rows after the tag.  Log rows are never rewritten, so the
+log doubles as an audit trail; :meth:`PlanStore.prune_log` trims it.
+Repeated snapshots of the same user inside an interval collapse into one
+row write.
+
+Several processes may share the database.  A process that loads a plan to
+write it back calls :meth:`~PlanStore.track` first; when another process
+has written the plan since (a new journal row or snapshot moves its
+stamp, see :meth:`~PlanStore.stamps`), this one's snapshots of the plan
+are dropped instead of written over the other's rows, and
+:meth:`~PlanStore.diverged` tells the holder to reload.
+
+Plans can be grouped (a household or a mess): ``group_members`` maps a
+group to its members' user ids, each member keeping an ordinary plan.
+Listeners registered with :meth:`PlanStore.subscribe` see every edit as it
+is submitted, which is how :class:`~mealsync.group.GroupTotals` keeps
+group totals current without rereading members.
+"""
+
+import contextlib
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from mealsync import codec, plan
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    user_id    TEXT PRIMARY KEY,
+    payload    TEXT NOT NULL,
+    version    INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    log_seq    INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS plan_log (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id    TEXT NOT NULL,
+    delta      TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plan_log_user ON plan_log (user_id, id);
+CREATE TABLE IF NOT EXISTS group_members (
+    group_id   TEXT NOT NULL,
+    user_id    TEXT NOT NULL,
+    name       TEXT,
+    PRIMARY KEY (group_id, user_id)
+);
+"""
+
+UPSERT = """
+INSERT INTO plans (user_id, payload, version, updated_at, log_seq) VALUES (?, ?, 1, ?, ?)
+ON CONFLICT(user_id) DO UPDATE SET
+    payload = excluded.payload,
+    version = plans.version + 1,
+    updated_at = excluded.updated_at,
+    log_seq = excluded.log_seq
+"""
+
+APPEND = "INSERT INTO plan_log (user_id, delta, created_at) VALUES (?, ?, ?)"
+
+SNAPSHOT, APPEND_KIND = "snapshot", "append"
+
+
+def _dumps(obj):
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _stamps(conn, users):
+    """``{user: (version, last journal id)}`` of the stored ``users``."""
+    users = list(users)
+    out = {}
+    for i in range(0, len(users), 500):  # SQLite caps bound parameters
+        chunk = users[i : i + 500]
+        marks = ",".join("?" * len(chunk))
+        for user, version, log_id in conn.execute(
+            f"SELECT p.user_id, p.version, (SELECT COALESCE(MAX(id), 0) FROM plan_log l "
+            f"WHERE l.user_id = p.user_id) FROM plans p WHERE p.user_id IN ({marks})",
+            chunk,
+        ):
+            out[user] = (version, log_id)
+    return out
+
+
+def _stored(conn, user_id):
+    """The user's snapshot payload (or None) and the journal rows after it."""
+    row = conn.execute("SELECT payload, log_seq FROM plans WHERE user_id = ?", (user_id,)).fetchone()
+    tail = [
+        r[0]
+        for r in conn.execute(
+            "SELECT delta FROM plan_log WHERE user_id = ? AND id > ? ORDER BY id", (user_id, row[1] if row else 0)
+        )
+    ]
+    return (row[0] if row else None), tail
+
+
+def _replay(payload, deltas):
+    state = plan.ensure_structure(codec.migrate(json.loads(payload)))
+    for delta in deltas:
+        plan.apply_delta(state, json.loads(delta))
+    return plan.ensure_structure(state)
+
+
+def read_plans(path):
+    """Yield ``(user, plan)`` for every plan stored at ``path``, opening
+    the database read-only (no writer, no schema changes).  Raises
+    ``FileNotFoundError`` if there is no such file."""
+    path = Path(path)
+    if not path.is_file():
+        raise FileNotFoundError(f"no plan store at {path}")
+    conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        users = [r[0] for r in conn.execute("SELECT user_id FROM plans ORDER BY user_id")]
+        for user in users:
+            payload, tail = _stored(conn, user)
+            if payload is not None:
+                yield user, _replay(payload, tail)
+    finally:
+        conn.close()
+
+
+def connect(path, timeout=30.0):
+    """Open a connection tuned for concurrent use of one database file."""
+    conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
+    return conn
+
+
+def _migrate(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(plans)")}
+    if "log_seq" not in columns:
+        conn.execute("ALTER TABLE plans ADD COLUMN log_seq INTEGER NOT NULL DEFAULT 0")
+
+
+class PlanStore:
+    """Thread-safe plan store shared by every session of a process."""
+
+    def __init__(self, path, pool_size=4, batch_interval=0.05, max_batch=1000, compact_every=50):
+        self.path = str(path)
+        self.batch_interval = batch_interval
+        self.max_batch = max_batch
+        self.compact_every = compact_every
+        self.stats = {"saves": 0, "appends": 0, "rows_written": 0, "batches": 0}
+
+        self._pool = queue.LifoQueue()
+        for _ in range(pool_size):
+            self._pool.put(connect(self.path))
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+            _migrate(conn)
+
+        # Writes in submission order: (kind, user_id, payload, seq).
+        self._queue = []
+        self._inflight = []
+        self._latest = {}  # user -> seq of the newest queued snapshot
+        self._tail = {}  # user -> edits journaled since the last snapshot
+        self._stamps = {}  # user -> stamp after this process last loaded or wrote the plan
+        self._foreign = set()  # users whose plan another process wrote since
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._submitted = 0
+        self._written = 0
+        self._closed = False
+        self._listeners = []
+        self._writer_conn = connect(self.path)
+        self._writer = threading.Thread(target=self._run, name="mealsync-plan-writer", daemon=True)
+        self._writer.start()
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    # -- reads ---------------------------------------------------------
+
+    def _unwritten(self, user_id):
+        return [e for e in self._inflight + self._queue if e[1] == user_id]
+
+    def load_payload(self, user_id):
+        """The latest packed snapshot for ``user_id`` (without the journal tail), or None."""
+        with self._lock:
+            snapshots = [e for e in self._unwritten(user_id) if e[0] == SNAPSHOT]
+            if snapshots:
+                return json.loads(snapshots[-1][2])
+        with self.connection() as conn:
+            row = conn.execute("SELECT payload FROM plans WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load(self, user_id):
+        """The user's plan in the shape ``loadState()`` produces, or None."""
+        # Holding the lock keeps the writer from retiring in-flight rows
+        # while the database is read; replaying a delta twice is harmless.
+        with self._lock:
+            events = self._unwritten(user_id)
+            last = max((i for i, e in enumerate(events) if e[0] == SNAPSHOT), default=None)
+            if last is not None:
+                payload, tail = events[last][2], []
+                events = events[last + 1 :]
+            else:
+                with self.connection() as conn:
+                    payload, tail = _stored(conn, user_id)
+        if payload is None:
+            return None
+        return _replay(payload, tail + [e[2] for e in events if e[0] == APPEND_KIND])
+
+    def history(self, user_id, limit=100):
+        """The user's most recent journaled edits, newest first: (id, time, delta)."""
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT id, created_at, delta FROM plan_log WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+                (user_id, limit),
+            ).fetchall()
+        return [(i, at, json.loads(delta)) for i, at, delta in rows]
+
+    def version(self, user_id):
+        with self.connection() as conn:
+            row = conn.execute("SELECT version FROM plans WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    def users(self):
+        with self.connection() as conn:
+            return [r[0] for r in conn.execute("SELECT user_id FROM plans ORDER BY user_id")]
+
+    def stamps(self, users):
+        """``{user: (version, last journal id)}`` for the stored ``users``;
+        a stamp changes whenever the plan does."""
+        with self.connection() as conn:
+            return _stamps(conn, users)
+
+    def track(self, user_id):
+        """Take the user's stamp as what this process holds of the plan;
+        call it right before loading a plan that will be written back.
+
+        Until then, snapshots queued after another process wrote the plan
+        are dropped rather than written over its journal rows.
+        """
+        with self._lock:
+            self._changed.wait_for(lambda: not any(e[1] == user_id for e in self._inflight))
+            if self._diverged(user_id):
+                self._drop_snapshots(user_id)
+            self._foreign.discard(user_id)
+            with self.connection() as conn:
+                self._stamps[user_id] = _stamps(conn, [user_id]).get(user_id)
+
+    def diverged(self, user_id):
+        """True if another process wrote the user's plan since this one
+        tracked it (see :meth:`track`) or last wrote it."""
+        with self._lock:
+            return self._diverged(user_id)
+
+    def _diverged(self, user_id):
+        if user_id in self._foreign:
+            return True
+        if user_id not in self._stamps or any(e[1] == user_id for e in self._inflight):
+            return False  # nothing to compare with, or our own write is landing
+        with self.connection() as conn:
+            return _stamps(conn, [user_id]).get(user_id) != self._stamps[user_id]
+
+    def _drop_snapshots(self, user_id):
+        """Forget queued snapshots of a plan another process has written."""
+        self._queue = [e for e in self._queue if e[0] != SNAPSHOT or e[1] != user_id]
+
+    # -- groups --------------------------------------------------------
+
+    def members(self, group_id):
+        """``[(user, name)]`` of a group, in user order."""
+        with self.connection() as conn:
+            return conn.execute(
+                "SELECT user_id, name FROM group_members WHERE group_id = ? ORDER BY user_id", (group_id,)
+            ).fetchall()
+
+    def groups(self):
+        """``[(group, member count)]`` of every group."""
+        with self.connection() as conn:
+            return conn.execute(
+                "SELECT group_id, COUNT(*) FROM group_members GROUP BY group_id ORDER BY group_id"
+            ).fetchall()
+
+    def add_members(self, group_id, members):
+        """Add users (ids or ``(id, name)`` pairs) to a group; existing
+        members get the new name."""
+        rows = [(group_id, *((m, None) if isinstance(m, str) else m)) for m in members]
+        with self.connection() as conn:
+            conn.executemany(
+                "INSERT INTO group_members (group_id, user_id, name) VALUES (?, ?, ?) "
+                "ON CONFLICT(group_id, user_id) DO UPDATE SET name = COALESCE(excluded.name, name)",
+                rows,
+            )
+
+    def remove_members(self, group_id, users):
+        with self.connection() as conn:
+            conn.executemany(
+                "DELETE FROM group_members WHERE group_id = ? AND user_id = ?", [(group_id, u) for u in users]
+            )
+
+    # -- listeners -----------------------------------------------------
+
+    def subscribe(self, fn):
+        """Call ``fn(user, delta, state)`` on every submitted edit (``delta``
+        is None for a full snapshot); returns a function that unsubscribes."""
+        self._listeners.append(fn)
+        return lambda: self._listeners.remove(fn) if fn in self._listeners else None
+
+    def _notify(self, user_id, delta, state):
+        for fn in list(self._listeners):
+            try:
+                fn(user_id, delta, state)
+            except Exception:
+                logger.exception("plan store listener failed")
+
+    # -- writes --------------------------------------------------------
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError("plan store is closed")
+
+    def save(self, user_id, state):
+        """Queue a full snapshot of the user's plan for the next batched write."""
+        self.save_many([(user_id, state)])
+
+    def save_many(self, items):
+        items = list(items)
+        self._snapshot(items)
+        for user_id, state in items:
+            self._notify(user_id, None, state)
+
+    def _snapshot(self, items):
+        rows = [(user_id, _dumps(codec.encode(state))) for user_id, state in items]
+        with self._lock:
+            self._check_open()
+            for user_id, payload in rows:
+                self._submitted += 1
+                self._queue.append((SNAPSHOT, user_id, payload, self._submitted))
+                self._latest[user_id] = self._submitted
+                self._tail[user_id] = 0
+            self.stats["saves"] += len(rows)
+            self._changed.notify_all()
+
+    def record(self, user_id, delta, state):
+        """Journal one edit of the user's plan.
+
+        ``state`` is the plan after the edit; it is snapshotted on the
+        user's first edit in this process and then every
+        ``compact_every`` edits.
+        """
+        with self._lock:
+            self._check_open()
+            self._submitted += 1
+            self._queue.append((APPEND_KIND, user_id, _dumps(delta), self._submitted))
+            self.stats["appends"] += 1
+            tail = self._tail.get(user_id)
+            self._tail[user_id] = (tail or 0) + 1
+            self._changed.notify_all()
+        if tail is None or tail + 1 >= self.compact_every:
+            self._snapshot([(user_id, state)])
+        self._notify(user_id, delta, state)
+
+    def prune_log(self, older_than):
+        """Delete journal rows older than ``older_than`` (epoch seconds)
+        that a snapshot already includes; returns the number deleted."""
+        with self.connection() as conn:
+            cur = conn.execute(
+                "DELETE FROM plan_log WHERE created_at < ? AND id <= "
+                "(SELECT log_seq FROM plans WHERE plans.user_id = plan_log.user_id)",
+                (older_than,),
+            )
+            return cur.rowcount
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is on disk."""
+        with self._lock:
+            target = self._submitted
+            return self._changed.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._changed.notify_all()
+        self._writer.join()
+        self._writer_conn.close()
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    def _write_batch(self, conn, batch, now, expected, foreign):
+        """Write ``batch`` in the open transaction; returns the number of
+        rows written, the users another process wrote to (``foreign`` and
+        those whose stamp is no longer the ``expected`` one: their
+        snapshots are left out, the journal keeps their edits) and the
+        stamps of every user written."""
+        foreign = foreign | {u for u, stamp in _stamps(conn, expected).items() if stamp != expected[u]}
+        last_log = {}
+        written = 0
+        for kind, user_id, payload, seq in batch:
+            if kind == APPEND_KIND:
+                last_log[user_id] = conn.execute(APPEND, (user_id, payload, now)).lastrowid
+            elif self._latest.get(user_id) == seq and user_id not in foreign:  # older snapshots are superseded
+                if user_id not in last_log:
+                    row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM plan_log WHERE user_id = ?", (user_id,))
+                    last_log[user_id] = row.fetchone()[0]
+                conn.execute(UPSERT, (user_id, payload, now, last_log[user_id]))
+            else:
+                continue
+            written += 1
+        return written, foreign, _stamps(conn, {e[1] for e in batch})
+
+    def _run(self):
+        while True:
+            with self._lock:
+                self._changed.wait_for(lambda: self._queue or self._closed)
+                if self._closed and not self._queue:
+                    return
+            # Let concurrent writes pile up into one transaction.
+            time.sleep(self.batch_interval)
+            with self._lock:
+                batch = self._queue[: self.max_batch]
+                del self._queue[: self.max_batch]
+                self._inflight = batch
+                expected = {e[1]: self._stamps[e[1]] for e in batch if e[1] in self._stamps}
+                foreign = self._foreign & expected.keys()
+            if not batch:
+                continue
+            conn = self._writer_conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                written, foreign, stamps = self._write_batch(conn, batch, time.time(), expected, foreign)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                logger.exception("plan batch write failed; retrying")
+                conn.execute("ROLLBACK")
+                with self._lock:
+                    self._queue[:0] = batch
+                    self._inflight = []
+                continue
+            with self._lock:
+                self._inflight = []
+                for user_id in foreign - self._foreign:
+                    logger.info("plan of %s was written by another process", user_id)
+                    self._drop_snapshots(user_id)
+                self._foreign |= foreign
+                for user_id, stamp in stamps.items():
+                    if self._stamps.get(user_id) == expected.get(user_id):  # not re-tracked meanwhile
+                        self._stamps[user_id] = stamp
+                # The queue is FIFO, so everything up to this batch is durable.
+                self._written = batch[-1][3]
+                self.stats["rows_written"] += written
+                self.stats["batches"] += 1
+                self._changed.notify_all()
@@ -0,0 +1,59 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from mealsync import catalog
+from mealsync.history import HISTORY_DIR, HistoryStore
+
+st.set_page_config(page_title="MealSync spend", layout="wide")
+
+
+# Keyed on the rollup's mtime, so a newly archived month shows up on the
+# next run and nothing is re-read in between.
+@st.cache_resource(max_entries=2)
+def _history(root, mtime_ns):
+    return HistoryStore(root)
+
+
+def history(root=HISTORY_DIR):
+    path = os.path.join(root, "rollup", "summary.json")
+    mtime = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+    return _history(root, mtime)
+
+
+store = history()
+summary = store.summary()
+st.title("Spend history")
+if not summary["months"]:
+    st.info("No months archived yet: run `python batch.py <plans> --archive YYYY-MM`.")
+    st.stop()
+
+stats = pd.DataFrame(summary["stats"]).set_index("month")
+forecast = summary["forecast"]
+last = stats.iloc[-1]
+cols = st.columns(4)
+cols[0].metric(f"Spend {stats.index[-1]}", f"₹ {last['total']:,.0f}")
+cols[1].metric("Users", f"{int(last['users']):,}")
+cols[2].metric(f"Forecast {forecast['month']}", f"₹ {forecast['total']:,.0f}",
+               delta=f"{forecast['total'] - last['total']:,.0f}", delta_color="inverse")
+cols[3].metric("Forecast over budget", f"{forecast['users_over_budget']:,} users")
+
+meals = pd.DataFrame([s["meals"] for s in summary["stats"]], index=stats.index)
+st.subheader("Spend per meal type")
+st.bar_chart(meals[list(catalog.MEAL_TYPES)])
+st.subheader(f"Total spend, {forecast['window']}-month rolling mean")
+st.line_chart(pd.DataFrame({"total": stats["total"], "rolling": summary["rolling_total"]}, index=stats.index))
+st.subheader("Per month")
+st.dataframe(stats[["users", "mean", "p50", "p90", "over_budget"]], width="stretch")
+
+user = st.text_input("User", st.query_params.get("user", ""))
+if user:
+    found = store.user_history(user)
+    if found is None:
+        st.warning(f"No history for {user!r}.")
+    else:
+        cols = st.columns(2)
+        cols[0].metric(f"Forecast {forecast['month']}", "—" if found["forecast"] is None else f"₹ {found['forecast']:,.2f}")
+        cols[1].metric("Budget (grand total)", "—" if found["budget"] is None else f"₹ {found['budget']:,.2f}")
+        st.line_chart(pd.DataFrame({"spend": found["spend"]}, index=found["months"]))
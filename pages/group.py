@@ -0,0 +1,76 @@
+import pandas as pd
+import streamlit as st
+
+from mealsync.component import shared_store
+from mealsync.group import SORTS, GroupTotals
+
+st.set_page_config(page_title="MealSync group", layout="wide")
+
+PAGE_SIZE = 24
+COLUMNS = 4
+
+
+# One live aggregate per group, shared by every session; member edits
+# made on the planner page update it through the store's listeners.
+# Evicted totals unsubscribe, or they would keep recosting every edit.
+@st.cache_resource(max_entries=32, on_release=lambda totals: totals.close())
+def group_totals(group_id):
+    return GroupTotals(shared_store(), group_id)
+
+
+def money(value):
+    return f"₹ {value:,.2f}"
+
+
+store = shared_store()
+group_id = st.query_params.get("group", "")
+if not group_id:
+    st.title("Groups")
+    groups = store.groups()
+    if not groups:
+        st.info("No groups yet: run `python batch.py mealsync.db --group <name> --user <id> ...`.")
+        st.stop()
+    for name, count in groups:
+        st.markdown(f"- [{name}](?group={name}) — {count} members")
+    st.stop()
+
+totals = group_totals(group_id)
+totals.refresh()
+summary = totals.summary()
+st.title(f"Group {group_id}")
+cols = st.columns(4)
+cols[0].metric("Members", f"{summary['members']:,}",
+               help=f"{summary['without_plan']} without a plan yet" if summary["without_plan"] else None)
+cols[1].metric("Grand total", money(summary["grand"]),
+               delta=money(summary["grand"] - summary["budget"]), delta_color="inverse")
+cols[2].metric("Sundays", money(summary["sunday"]))
+cols[3].metric("Over budget", f"{summary['over_budget']:,} members")
+weeks = totals.weeks()
+st.bar_chart(pd.DataFrame({"spend": weeks}, index=[f"W{w}" for w in range(1, len(weeks) + 1)]))
+
+
+# Only the visible page of cards is built; paging and searching rerun
+# this fragment alone.
+@st.fragment
+def member_cards():
+    left, mid, right = st.columns([3, 2, 1])
+    query = left.text_input("Search members", key="group_query")
+    order = mid.selectbox("Sort by", SORTS, key="group_order")
+    found = totals.find(query, order)
+    pages = max(1, -(-len(found) // PAGE_SIZE))
+    page = right.number_input("Page", 1, pages, key="group_page")
+    shown = found[(page - 1) * PAGE_SIZE : page * PAGE_SIZE]
+    st.caption(f"{len(found):,} members · page {page} of {pages}")
+    grid = st.columns(COLUMNS)
+    for i, member in enumerate(shown):
+        with grid[i % COLUMNS].container(border=True):
+            st.markdown(f"**{member.name or member.user}** · [plan](/?user={member.user})")
+            if not member.has_plan:
+                st.caption("No plan yet")
+                continue
+            delta = None if member.budget is None else money(member.grand - member.budget)
+            st.metric("Grand total", money(member.grand), delta=delta, delta_color="inverse")
+            st.caption(f"Mon–Sat {money(member.weekdays)} · Sundays {money(member.sundays)}")
+
+
+member_cards()
@@ -0,0 +1,34 @@
+import os
+import time
+
+from mealsync import assets
+
+
+def make(root, name, age_days):
+    path = root / name
+    path.mkdir()
+    (path / "manifest.json").write_text("{}")
+    stamp = time.time() - age_days * 86400
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def test_prune_keeps_recent_and_current_builds(tmp_path):
+    current = make(tmp_path, "cur", 30)
+    recent = [make(tmp_path, f"recent{i}", i) for i in range(4)]
+    stale = make(tmp_path, "stale", 30)
+    tmp = make(tmp_path, ".tmp-crashed", 30)
+    fresh_tmp = make(tmp_path, ".tmp-building", 0)
+
+    assets.prune(tmp_path, current, keep=2, grace=7 * 86400)
+
+    assert current.exists() and fresh_tmp.exists()
+    assert all(p.exists() for p in recent)  # beyond keep, but used within the grace period
+    assert not stale.exists() and not tmp.exists()
+
+
+def test_build_leaves_other_builds_alone(tmp_path):
+    previous = make(tmp_path, "previous", 0)
+    out = assets.build.__wrapped__(assets.FRONTEND_DIR, tmp_path)
+    assert (out / "manifest.json").exists()
+    assert previous.exists()
@@ -0,0 +1,61 @@
+from mealsync import bulk, hub, plan
+from mealsync.store import PlanStore
+
+CLEAR = [{"op": "clear", "meal": "breakfast", "weeks": [1]}]
+
+
+def stored(path, users):
+    store = PlanStore(path)
+    store.save_many([(user, plan.new_state()) for user in users])
+    store.flush()
+    return store
+
+
+def breakfasts(state):
+    return {k: v for k, v in state["weeks"]["1"].items() if "-breakfast" in k and k.startswith("sel-")}
+
+
+def test_apply_to_store_reports_skipped_users_apart_from_errors(tmp_path):
+    store = stored(tmp_path / "plans.db", ["alice", "bob"])
+    try:
+        store.save("bob", plan.resize(plan.new_state(), 1))
+        changed, skipped, errors = bulk.apply_to_store(store, [{"op": "clear", "meal": "breakfast", "weeks": [2]}],
+                                                       ["alice", "bob", "carol"])
+        assert changed == 1
+        assert skipped == {"carol": "no stored plan"}
+        assert list(errors) == ["bob"]
+        assert bulk.apply_to_store(store, [{"op": "template", "days": {}}], ["alice"])[1] == {
+            "alice": "nothing to change"
+        }
+    finally:
+        store.close()
+
+
+def test_open_sessions_get_bulk_edits_from_another_process(tmp_path):
+    path = tmp_path / "plans.db"
+    app = stored(path, ["alice"])
+    try:
+        shared = hub.PlanHub(app).plan("alice")
+        shared.commit({"selectedWeek": 2}, "page")
+        app.flush()
+        seen = shared.version
+
+        admin = PlanStore(path)
+        try:
+            assert bulk.apply_to_store(admin, CLEAR) == (1, {}, {})
+        finally:
+            admin.close()
+
+        version, patch = shared.changes(seen, "page")
+        assert (version, patch) == (seen + 1, "replace")
+        assert set(breakfasts(shared.state).values()) == {"skip"}
+
+        # Later edits build on the reloaded plan; snapshots keep the bulk edit.
+        for day in range(6):
+            shared.commit({"weeks": {"2": {f"price-2-{day}-dinner": "70"}}}, "page")
+        app.flush()
+        reloaded = PlanStore(path).load("alice")
+        assert set(breakfasts(reloaded).values()) == {"skip"}
+        assert reloaded["weeks"]["2"]["price-2-5-dinner"] == "70"
+    finally:
+        app.close()
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from mealsync import codec, plan
+
+
+def edited_state(weeks=4):
+    state = plan.new_state(weeks)
+    state["selectedWeek"] = 2
+    state["weeks"]["1"]["sel-1-6-dinner"] = "custom"
+    state["weeks"]["1"]["price-1-6-dinner"] = "500"
+    state["weeks"]["2"]["sel-2-0-dinner"] = "skip"
+    state["dayChoice"]["3-w2"] = "lunch"
+    state["modified"]["sel-2-0-dinner"] = True
+    state["budgets"]["weekly"] = "900.00"
+    return state
+
+
+@pytest.mark.parametrize("weeks", [4, 13, 52])
+def test_round_trip(weeks):
+    state = edited_state(weeks)
+    packed = json.loads(json.dumps(codec.encode(state)))
+    decoded = codec.decode(packed)
+    for section in ("weeks", "dayChoice", "modified", "budgets"):
+        assert decoded[section] == state[section], section
+    assert decoded["selectedWeek"] == 2
+    assert plan.horizon(decoded) == weeks
+
+
+def test_migrate_passes_legacy_state_through():
+    state = edited_state()
+    assert codec.migrate(state) is state
+
+
+@pytest.mark.parametrize("payload", [
+    {"v": 1, "w": 4},
+    {"v": 1, "s": "AA=="},
+    {"v": 1, "w": "4", "s": ""},
+    {"v": 1, "w": True, "s": ""},
+    {"v": 1, "w": 10**9, "s": ""},
+    {"v": 1, "w": 4, "s": 123},
+    {"v": 2, "w": 4, "s": ""},
+    {"w": 4, "s": ""},
+    [],
+])
+def test_malformed_payload_is_a_value_error(payload):
+    with pytest.raises(ValueError):
+        codec.migrate(payload)
+
+
+@pytest.mark.parametrize("field, value", [
+    ("d", []), ("d", "x"), ("c", 5), ("m", [1]), ("p", [1]), ("b", 5), ("sw", [1]),
+])
+def test_bad_field_is_a_value_error(field, value):
+    packed = codec.encode(edited_state())
+    packed[field] = value
+    with pytest.raises(ValueError):
+        codec.decode(packed)
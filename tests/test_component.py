@@ -0,0 +1,34 @@
+from mealsync import hub, plan
+from mealsync.component import PlanSync
+from mealsync.store import PlanStore
+
+EDIT = {"weeks": {"1": {"sel-1-0-dinner": "custom", "price-1-0-dinner": "90"}}}
+
+
+def test_delta_without_a_plan_asks_for_the_full_plan(tmp_path):
+    store = PlanStore(tmp_path / "plans.db")
+    try:
+        sync = PlanSync("newuser", store, hub.PlanHub(store))
+        assert not sync.receive({"sid": "page", "seq": 7, "delta": EDIT})
+        assert not sync.receive({"sid": "page", "seq": 8, "delta": EDIT})
+        args = sync.args()
+        assert args["ack"] == 0 and args["needFull"]
+
+        full = plan.apply_delta(plan.new_state(), EDIT)
+        assert sync.receive({"sid": "page", "seq": 9, "full": full})
+        args = sync.args()
+        assert args["ack"] == 9 and "needFull" not in args
+        store.flush()
+        assert store.load("newuser")["weeks"]["1"]["price-1-0-dinner"] == "90"
+    finally:
+        store.close()
+
+
+def test_delta_without_a_plan_or_store():
+    sync = PlanSync()
+    assert not sync.receive({"sid": "page", "seq": 3, "delta": EDIT})
+    assert sync.args()["needFull"]
+    assert sync.receive({"sid": "page", "seq": 4, "full": plan.new_state()})
+    assert sync.receive({"sid": "page", "seq": 5, "delta": EDIT})
+    assert sync.args()["ack"] == 5
+    assert sync.plan["weeks"]["1"]["price-1-0-dinner"] == "90"
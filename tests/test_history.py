@@ -0,0 +1,10 @@
+import json
+
+from mealsync import codec, history, plan
+
+
+def test_spend_chunk_skips_malformed_documents():
+    items = [("a", '{"v":1,"w":4}'), ("b", json.dumps(codec.encode(plan.new_state()))), ("c", "{}")]
+    users, spend, budgets = history.spend_chunk(items)
+    assert users == ["b"]
+    assert spend.shape[0] == budgets.shape[0] == 1
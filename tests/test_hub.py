@@ -0,0 +1,60 @@
+from mealsync import hub, plan
+from mealsync.component import PlanSync
+
+
+def slot(week, day, price):
+    return {"weeks": {str(week): {f"sel-{week}-{day}-dinner": "custom", f"price-{week}-{day}-dinner": price}}}
+
+
+def shared_plan():
+    shared = hub.SharedPlan("alice", None)
+    shared.replace(plan.new_state(), "setup")
+    return shared
+
+
+def test_changes_merge_edits_to_different_slots():
+    shared = shared_plan()
+    start = shared.version
+    shared.commit(slot(1, 0, "10"), "a", start)
+    shared.commit(slot(2, 3, "20"), "b", start)
+
+    version, for_a = shared.changes(start, "a")
+    assert version == start + 2
+    assert for_a == slot(2, 3, "20")
+    assert shared.changes(start, "b")[1] == slot(1, 0, "10")
+    assert shared.stats["conflicts"] == 0
+
+
+def test_newest_edit_of_a_slot_wins():
+    shared = shared_plan()
+    start = shared.version
+    shared.commit(slot(1, 0, "10"), "a", start)
+    shared.commit(slot(1, 0, "20"), "b", start)
+
+    assert shared.stats["conflicts"] == 2  # b edited both leaves a had changed
+    assert shared.state["weeks"]["1"]["price-1-0-dinner"] == "20"
+    assert shared.changes(start, "a")[1] == slot(1, 0, "20")
+    # b's own edit overwrote a's, so there is nothing for b to catch up on.
+    assert shared.changes(start, "b")[1] is None
+
+
+def test_own_later_edit_hides_older_edits_of_the_slot():
+    shared = shared_plan()
+    start = shared.version
+    shared.commit(slot(1, 0, "10"), "b", start)
+    shared.commit(slot(2, 1, "15"), "b", start + 1)
+    shared.commit(slot(1, 0, "30"), "a", start)
+    assert shared.changes(start, "a")[1] == slot(2, 1, "15")
+
+
+def test_own_edit_needs_no_catch_up():
+    plans = hub.PlanHub(None)
+    shared = plans.plan("alice")
+    shared.replace(plan.new_state(), "setup")
+    sync = PlanSync("alice", hub=plans)
+    sync.receive({"sid": "page", "seq": 1, "full": plan.new_state()})
+    base, queued = sync.args()["version"], sync.patch_seq
+    sync.receive({"sid": "page", "seq": 2, "base": base, "delta": slot(1, 0, "10")})
+    assert sync.version == base + 1
+    assert sync.args()["version"] == base + 1
+    assert sync.patch_seq == queued
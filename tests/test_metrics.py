@@ -0,0 +1,11 @@
+from mealsync import metrics
+
+
+def test_ingest_keeps_only_known_spans_and_gauges():
+    m = metrics.Metrics(sample_rate=1.0)
+    m.ingest({"spans": {"renderWeek": [1.5, 2.0], **{f"junk{i}": [1] for i in range(100)}},
+              "gauges": {"domNodes": 300, "junk": 1}})
+    rows = {(r["metric"], r["labels"]): r for r in m.summary()}
+    assert set(rows) == {("client_span_seconds", "span=renderWeek"), ("client_dom_nodes", "")}
+    assert rows[("client_span_seconds", "span=renderWeek")]["count"] == 2
+    assert "junk" not in m.render()
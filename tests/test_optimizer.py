@@ -0,0 +1,31 @@
+from mealsync import catalog, cost, optimizer, plan
+
+
+def sunday_state(price="500"):
+    state = plan.new_state()
+    for w in (1, 3):
+        state["weeks"][str(w)][f"sel-{w}-6-dinner"] = "custom"
+        state["weeks"][str(w)][f"price-{w}-6-dinner"] = price
+        state["modified"][f"sel-{w}-6-dinner"] = True
+    state["weeks"]["2"]["sel-2-6-lunch"] = "skip"
+    return state
+
+
+def test_optimize_keeps_sundays():
+    state = sunday_state()
+    out = optimizer.optimize(state)
+    for w in (1, 3):
+        assert out["weeks"][str(w)][f"sel-{w}-6-dinner"] == "custom"
+        assert out["weeks"][str(w)][f"price-{w}-6-dinner"] == "500"
+        assert out["modified"][f"sel-{w}-6-dinner"] is True
+    assert out["weeks"]["2"]["sel-2-6-lunch"] == "skip"
+    assert cost.plan_totals([out]).sunday[0] == 1000.0
+
+
+def test_optimize_counts_sundays_against_the_grand_budget():
+    state = sunday_state()
+    state["budgets"].update(weekdays="5000.00", grandTotal="2000.00")
+    totals = cost.plan_totals([optimizer.optimize(state)])
+    assert totals.grand[0] <= 2000.0
+    assert totals.sunday[0] == 1000.0
+    assert all(day <= catalog.day_limit(d) for week in totals.day[0] for d, day in enumerate(week))
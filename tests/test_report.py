@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from mealsync import codec, plan, report
+from mealsync.store import PlanStore
+
+
+def test_truncated_packed_plan_is_reported_invalid(tmp_path):
+    source = tmp_path / "plans.jsonl"
+    lines = [json.dumps(codec.encode(plan.new_state())), '{"v":1,"w":4}', "not json", "[]"]
+    source.write_text("\n".join(lines) + "\n")
+    for workers in (1, 2):
+        rows = [row for chunk_rows, _ in report.run(source, chunk_size=2, workers=workers) for row in chunk_rows]
+        assert [row["valid"] for row in rows] == [True, False, False, False]
+        assert "'s'" in rows[1]["error"]
+
+
+def test_read_documents_opens_a_store_read_only(tmp_path):
+    path = tmp_path / "plans.db"
+    store = PlanStore(path)
+    try:
+        store.save("alice", plan.new_state())
+        store.record("alice", {"budgets": {"weekly": "900"}}, plan.new_state())
+        store.flush()
+        live = dict(report.read_documents(path))  # while the app has it open
+    finally:
+        store.close()
+    before = path.stat().st_mtime_ns
+    docs = dict(report.read_documents(path))
+    assert docs == live and list(docs) == ["alice"]
+    assert report.check_plan(json.loads(docs["alice"]))[1]["budgets"]["weekly"] == "900"
+    assert path.stat().st_mtime_ns == before
+
+    missing = tmp_path / "typo.db"
+    with pytest.raises(FileNotFoundError):
+        list(report.read_documents(missing))
+    assert not missing.exists()
@@ -0,0 +1,15 @@
+import json
+
+from mealsync import codec, plan, simulate
+
+
+def test_usage_chunk_skips_malformed_documents():
+    items = [
+        ("a", json.dumps(codec.encode(plan.new_state()))),
+        ("b", '{"v":1,"w":4}'),
+        ("c", "not json"),
+        ("d", json.dumps({"user": "dee", "state": plan.new_state()})),
+    ]
+    usage = simulate.usage_chunk(items)
+    assert usage.users == ["a", "dee"]
+    assert usage.weekdays.shape[0] == 2
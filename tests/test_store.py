@@ -0,0 +1,77 @@
+import sqlite3
+
+from mealsync import plan
+from mealsync.store import PlanStore
+
+
+def edit(i):
+    return {"weeks": {str(i % 4 + 1): {f"sel-{i % 4 + 1}-{i % 6}-dinner": "custom",
+                                        f"price-{i % 4 + 1}-{i % 6}-dinner": str(100 + i)}}}
+
+
+def record_edits(store, user, count):
+    state = plan.new_state()
+    store.save(user, state)
+    for i in range(count):
+        delta = edit(i)
+        state = plan.apply_delta(state, delta)
+        store.record(user, delta, state)
+    return state
+
+
+def test_load_replays_the_journal_tail_after_a_snapshot(tmp_path):
+    path = tmp_path / "plans.db"
+    store = PlanStore(path, compact_every=3)
+    try:
+        expected = record_edits(store, "alice", 8)
+        assert store.load("alice") == expected
+        store.flush()
+        assert store.load("alice") == expected
+    finally:
+        store.close()
+
+    with sqlite3.connect(path) as conn:
+        (log_seq,) = conn.execute("SELECT log_seq FROM plans WHERE user_id = 'alice'").fetchone()
+        (last,) = conn.execute("SELECT MAX(id) FROM plan_log WHERE user_id = 'alice'").fetchone()
+    assert 0 < log_seq < last  # compacted, with a journal tail left to replay
+
+    reopened = PlanStore(path, compact_every=3)
+    try:
+        assert reopened.load("alice") == expected
+        assert len(reopened.history("alice")) == 8
+    finally:
+        reopened.close()
+
+
+def test_snapshots_never_cover_another_process_journal(tmp_path):
+    path = tmp_path / "plans.db"
+    mine = PlanStore(path)
+    try:
+        mine.save("alice", plan.new_state())
+        mine.flush()
+        mine.track("alice")
+        stale = mine.load("alice")
+
+        other = PlanStore(path)
+        try:
+            other.track("alice")
+            theirs = plan.apply_delta(other.load("alice"), edit(1))
+            other.record("alice", edit(1), theirs)
+        finally:
+            other.close()
+
+        assert mine.diverged("alice")
+        # A stale holder's edit (whose snapshot would drop theirs) only journals.
+        mine.record("alice", edit(2), plan.apply_delta(stale, edit(2)))
+        mine.flush()
+        expected = plan.apply_delta(theirs, edit(2))
+        assert mine.load("alice") == expected
+
+        mine.track("alice")
+        assert not mine.diverged("alice")
+        mine.save("alice", expected)
+        mine.flush()
+        assert not mine.diverged("alice")
+    finally:
+        mine.close()
+    assert PlanStore(path).load("alice") == expected
@@ -0,0 +1,196 @@
+"""Benchmark suite with regression thresholds.
+
+Measures, headless:
+
+* ``app.py`` reruns through ``streamlit.testing.v1.AppTest`` (first run,
+  and reruns that each carry one browser edit) and the size of the args
+  handed to the component;
+* the packed codec round trip and batched costing for plans of 1 to 52
+  weeks;
+* the size of the built frontend (``mealsync.assets``), raw and gzipped;
+* the frontend's grid build, summary totals and ``saveState``/``loadState``
+  round trip under node (``tools/js/bench.mjs``), skipped without node.
+
+Results are flattened to ``section.metric`` keys and compared with
+``tools/bench_thresholds.json``; any metric over its threshold is a
+regression and makes the run exit 1.
+
+    python tools/benchmark.py --out bench.json
+    python tools/benchmark.py --update-thresholds   # after an intended change
+"""
+
+import argparse
+import json
+import math
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from mealsync import assets, catalog, codec, cost, plan  # noqa: E402
+
+THRESHOLDS = Path(__file__).with_name("bench_thresholds.json")
+HORIZONS = (1, 4, 13, 26, 52)
+# --update-thresholds allows this much headroom over the measured value;
+# timings also get an absolute slack so sub-millisecond noise passes.
+HEADROOM = 3.0
+SIZE_HEADROOM = 1.25
+SLACK_MS = 1.0
+
+
+def timed(fn, repeat=20):
+    """Median wall time of ``fn()`` in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def synthetic_state(weeks, rng):
+    """A default plan with a third of the dinners changed and some custom prices."""
+    state = plan.new_state(weeks)
+    dinners = catalog.current().menu["dinner"]
+    for w in range(1, weeks + 1):
+        wk = state["weeks"][str(w)]
+        for d in range(7):
+            r = rng.random()
+            if r < 0.3:
+                wk[f"sel-{w}-{d}-dinner"] = rng.choice(dinners)["id"]
+            elif r < 0.4:
+                wk[f"sel-{w}-{d}-dinner"] = "custom"
+                wk[f"price-{w}-{d}-dinner"] = f"{rng.random() * 150:.2f}"
+    return state
+
+
+def bench_app(reruns=30):
+    from streamlit.testing.v1 import AppTest
+
+    def component_args(at):
+        return at.get("component_instance")[0].proto.json_args
+
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=60)
+    t0 = time.perf_counter()
+    at.run()
+    first = (time.perf_counter() - t0) * 1000
+    if at.exception:
+        raise RuntimeError(f"app.py raised: {at.exception[0].message}")
+    first_args = component_args(at)
+
+    version = catalog.current().version
+    at.session_state["mealsync"] = {"sid": "bench", "seq": 1, "pushAck": 0, "catalogVersion": version, "full": plan.new_state()}
+    at.run()
+
+    rng = random.Random(1)
+    dinners = [item["id"] for item in catalog.current().menu["dinner"]]
+    times = []
+    for seq in range(2, reruns + 2):
+        w, d = rng.randint(1, catalog.WEEKS), rng.randint(0, 5)
+        delta = {"weeks": {str(w): {f"sel-{w}-{d}-dinner": rng.choice(dinners)}}}
+        at.session_state["mealsync"] = {"sid": "bench", "seq": seq, "pushAck": 0, "catalogVersion": version, "delta": delta}
+        t0 = time.perf_counter()
+        at.run()
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return {
+        "first_run_ms": first,
+        "rerun_p50_ms": times[len(times) // 2],
+        "rerun_p99_ms": times[min(len(times) - 1, int(len(times) * 0.99))],
+        "first_args_bytes": len(first_args),
+        "rerun_args_bytes": len(component_args(at)),
+    }
+
+
+def bench_python():
+    out = {}
+    rng = random.Random(1)
+    table = cost.PriceTable()
+    for weeks in HORIZONS:
+        state = synthetic_state(weeks, rng)
+        packed = codec.encode(state)
+        raw = json.dumps(packed, separators=(",", ":"))
+        out[f"weeks_{weeks}.encode_ms"] = timed(lambda: codec.encode(state))
+        out[f"weeks_{weeks}.decode_ms"] = timed(lambda: codec.decode(json.loads(raw)))
+        out[f"weeks_{weeks}.packed_bytes"] = len(raw)
+        batch = [synthetic_state(weeks, rng) for _ in range(64)]
+        out[f"weeks_{weeks}.totals_64_plans_ms"] = timed(lambda: cost.plan_totals(batch, table), repeat=5)
+    return out
+
+
+def bench_assets():
+    out = assets.build()
+    sizes = json.loads((out / "manifest.json").read_text())["sizes"]
+    return {
+        "files": len(sizes),
+        "shipped_bytes": sum(entry["bytes"] for entry in sizes.values()),
+        "shipped_gzip_bytes": sum(entry.get("gzip", entry["bytes"]) for entry in sizes.values()),
+    }
+
+
+def bench_js():
+    node = shutil.which("node")
+    if node is None:
+        return None
+    result = subprocess.run(
+        [node, str(ROOT / "tools" / "js" / "bench.mjs"), *map(str, HORIZONS)],
+        check=True, capture_output=True, text=True,
+    )
+    data = json.loads(result.stdout)
+    return {f"weeks_{weeks}.{k}": v for weeks, metrics in data.items() for k, v in metrics.items()}
+
+
+def threshold_for(key, value):
+    if key.endswith("_ms"):
+        return round(max(value * HEADROOM, value + SLACK_MS), 3)
+    return math.ceil(value * SIZE_HEADROOM)
+
+
+def check(results, thresholds):
+    regressions = []
+    for key, limit in thresholds.items():
+        value = results.get(key)
+        if value is not None and value > limit:
+            regressions.append({"metric": key, "value": value, "threshold": limit})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", type=Path, help="write the JSON report here as well")
+    parser.add_argument("--reruns", type=int, default=30)
+    parser.add_argument("--skip-app", action="store_true", help="skip the AppTest reruns")
+    parser.add_argument("--update-thresholds", action="store_true", help="rewrite thresholds from this run")
+    args = parser.parse_args(argv)
+
+    results, skipped = {}, []
+    sections = {"python": bench_python, "assets": bench_assets, "js": bench_js}
+    if not args.skip_app:
+        sections["app"] = lambda: bench_app(args.reruns)
+    for name, bench in sections.items():
+        data = bench()
+        if data is None:
+            skipped.append(name)
+            continue
+        results.update({f"{name}.{k}": round(v, 4) for k, v in data.items()})
+
+    if args.update_thresholds:
+        thresholds = {k: threshold_for(k, v) for k, v in sorted(results.items())}
+        THRESHOLDS.write_text(json.dumps(thresholds, indent=2) + "\n")
+    thresholds = json.loads(THRESHOLDS.read_text()) if THRESHOLDS.exists() else {}
+    report = {"results": results, "skipped": skipped, "regressions": check(results, thresholds)}
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(text + "\n")
+    print(text)
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
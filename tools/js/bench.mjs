@@ -0,0 +1,105 @@
+/* Frontend benchmark under node: grid build, summary totals and the
+   localStorage round trip on synthetic plans of growing horizon.
+
+     node tools/js/bench.mjs 1 4 13 26 52
+
+   Prints one JSON object keyed by horizon; tools/benchmark.py runs this
+   and checks the numbers against its thresholds. */
+import { install, counters } from './dom.mjs';
+
+install();
+
+const FRONTEND = new URL('../../mealsync/frontend/', import.meta.url);
+const { createNewState, createStore, loadState, saveState, STORAGE_KEY } = await import(new URL('state.js', FRONTEND));
+const { createGrid } = await import(new URL('render.js', FRONTEND));
+const { createTotals } = await import(new URL('totals.js', FRONTEND));
+const { dinnerOptions } = await import(new URL('catalog.js', FRONTEND));
+
+const REPEAT = 20;
+const EDITS = 2000;
+
+function rng(seed){
+  return () => {
+    seed = (seed + 0x6D2B79F5) | 0;
+    let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+    t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+/* A default plan with a third of the dinners changed and some custom prices. */
+function syntheticState(weeks, seed=1){
+  const rand = rng(seed);
+  const s = createNewState(weeks);
+  for(let w=1; w<=weeks; w++){
+    for(let d=0; d<7; d++){
+      const r = rand();
+      if(r < 0.3) s.weeks[w][`sel-${w}-${d}-dinner`] = dinnerOptions[Math.floor(rand() * dinnerOptions.length)].id;
+      else if(r < 0.4){
+        s.weeks[w][`sel-${w}-${d}-dinner`] = 'custom';
+        s.weeks[w][`price-${w}-${d}-dinner`] = (rand() * 150).toFixed(2);
+      }
+    }
+  }
+  s.selectedWeek = weeks;
+  return s;
+}
+
+function median(fn, repeat=REPEAT){
+  const times = [];
+  for(let i=0; i<repeat; i++){
+    const t0 = performance.now();
+    fn(i);
+    times.push(performance.now() - t0);
+  }
+  times.sort((a, b) => a - b);
+  return times[times.length >> 1];
+}
+
+const noop = () => {};
+const handlers = {
+  onMainChange:noop, onDinnerChange:noop, onCombo:noop, onToggle:noop, onPrice:noop, onBudget:noop, onBudgetDefault:noop
+};
+
+function benchWeeks(weeks){
+  const state = syntheticState(weeks);
+  const grid = document.getElementById('grid');
+  const nodesBefore = counters.created;
+  const makeGrid = median(() => createGrid(grid, state, handlers).patchWeek());
+  const gridNodes = (counters.created - nodesBefore) / REPEAT;
+
+  const summaryFull = median(() => createTotals(createStore(state)).summary());
+
+  const store = createStore(state);
+  const totals = createTotals(store);
+  const rand = rng(7);
+  const t0 = performance.now();
+  for(let i=0; i<EDITS; i++){
+    const w = 1 + Math.floor(rand() * weeks), d = Math.floor(rand() * 7);
+    store.set(['weeks', w, `sel-${w}-${d}-dinner`], dinnerOptions[i % dinnerOptions.length].id);
+    totals.summary();
+  }
+  const summaryEdit = (performance.now() - t0) / EDITS;
+
+  const save = median(() => saveState(state));
+  const load = median(() => loadState());
+  const bytes = localStorage.getItem(STORAGE_KEY).length;
+
+  return {
+    makeGrid_ms: makeGrid,
+    grid_nodes: gridNodes,
+    updateSummary_full_ms: summaryFull,
+    updateSummary_edit_ms: summaryEdit,
+    saveState_ms: save,
+    loadState_ms: load,
+    state_bytes: bytes
+  };
+}
+
+const horizons = process.argv.slice(2).map(Number).filter(Boolean);
+const weeksList = horizons.length ? horizons : [1, 4, 13, 26, 52];
+/* One discarded pass, so JIT warm-up is not billed to the first horizon. */
+benchWeeks(weeksList[0]);
+const out = {};
+for(const weeks of weeksList) out[weeks] = benchWeeks(weeks);
+console.log(JSON.stringify(out));
@@ -0,0 +1,99 @@
+/* Minimal DOM stand-in for running the frontend modules under node.
+
+   Implements just what mealsync/frontend touches (elements, fragments,
+   selectors by id/class/tag, localStorage, postMessage) and counts DOM
+   writes so benchmarks can report them.  Layout and CSS are not
+   modelled. */
+export const counters = { created:0, inserted:0, removed:0, html:0, text:0, attr:0 };
+class ClassList {
+  constructor(el){ this.el = el; }
+  _get(){ return this.el.className ? this.el.className.split(/\s+/).filter(Boolean) : []; }
+  add(...c){ const s=new Set(this._get()); c.forEach(x=>s.add(x)); this.el.className=[...s].join(' '); }
+  remove(...c){ this.el.className=this._get().filter(x=>!c.includes(x)).join(' '); }
+  contains(c){ return this._get().includes(c); }
+  toggle(c, force){ const has=this.contains(c); const want = force===undefined ? !has : !!force; if(want&&!has) this.add(c); if(!want&&has) this.remove(c); return want; }
+}
+export class Element {
+  constructor(tag){ counters.created++; this.tagName=(tag||'').toUpperCase(); this.childNodes=[]; this.parentNode=null; this._className=''; this.style={}; this.dataset={}; this._text=''; this._html=''; this.attributes={}; this.listeners={}; this.value=''; this.selected=false; this.disabled=false; this.hidden=false; this.id=''; }
+  get className(){ return this._className; } set className(v){ counters.attr++; this._className=String(v); }
+  get classList(){ return new ClassList(this); }
+  get children(){ return this.childNodes; }
+  get firstChild(){ return this.childNodes[0]||null; }
+  get nextSibling(){ if(!this.parentNode) return null; const a=this.parentNode.childNodes; return a[a.indexOf(this)+1]||null; }
+  appendChild(c){ if(c.isFragment){ [...c.childNodes].forEach(x=>this.appendChild(x)); return c; } if(c.parentNode) c.parentNode.removeChild(c); c.parentNode=this; this.childNodes.push(c); counters.inserted++; return c; }
+  append(...cs){ cs.forEach(c=>this.appendChild(typeof c==='string'?new Text(c):c)); }
+  insertBefore(c, ref){ if(!ref) return this.appendChild(c); if(c.parentNode) c.parentNode.removeChild(c); c.parentNode=this; this.childNodes.splice(this.childNodes.indexOf(ref),0,c); counters.inserted++; return c; }
+  removeChild(c){ const i=this.childNodes.indexOf(c); if(i>=0){ this.childNodes.splice(i,1); c.parentNode=null; counters.removed++; } return c; }
+  replaceChild(n, o){ this.insertBefore(n, o); this.removeChild(o); return o; }
+  remove(){ if(this.parentNode) this.parentNode.removeChild(this); }
+  replaceChildren(...cs){ while(this.childNodes.length) this.removeChild(this.childNodes[0]); cs.forEach(c=>this.appendChild(c)); }
+  set innerHTML(v){ counters.html++; this.childNodes.forEach(c=>c.parentNode=null); if(this.childNodes.length) counters.removed+=this.childNodes.length; this.childNodes=[]; this._html=String(v); this._text=''; }
+  get innerHTML(){ return this._html || this.childNodes.map(c=>c.outerText||'').join(''); }
+  set textContent(v){ counters.text++; this.childNodes=[]; this._text=String(v); this._html=''; }
+  get textContent(){ return this._text || this._html.replace(/<[^>]*>/g,'') || this.childNodes.map(c=>c.textContent).join(''); }
+  set innerText(v){ this.textContent=v; } get innerText(){ return this.textContent; }
+  get outerText(){ return this.textContent; }
+  setAttribute(k,v){ counters.attr++; this.attributes[k]=String(v); if(k==='id') this.id=v; if(k==='class') this._className=v; }
+  getAttribute(k){ return this.attributes[k] ?? null; }
+  removeAttribute(k){ delete this.attributes[k]; }
+  addEventListener(t,f){ (this.listeners[t]=this.listeners[t]||[]).push(f); }
+  removeEventListener(t,f){ this.listeners[t]=(this.listeners[t]||[]).filter(x=>x!==f); }
+  dispatch(t, extra={}){ const e=Object.assign({type:t,target:this,currentTarget:this,preventDefault(){},stopPropagation(){}}, extra); if(this['on'+t]) this['on'+t](e); (this.listeners[t]||[]).forEach(f=>f(e)); let p=this.parentNode; while(p){ (p.listeners[t]||[]).forEach(f=>f(Object.assign({}, e, {currentTarget:p}))); p=p.parentNode; } }
+  click(){ this.dispatch('click'); }
+  get options(){ return this.childNodes.filter(c=>c.tagName==='OPTION'); }
+  get selectedIndex(){ return this.options.findIndex(o=>o.value===this.value); }
+  walk(fn){ for(const c of this.childNodes){ if(fn(c)) return c; const r=c.walk?c.walk(fn):null; if(r) return r; } return null; }
+  all(fn, out=[]){ for(const c of this.childNodes){ if(fn(c)) out.push(c); if(c.all) c.all(fn,out); } return out; }
+  querySelector(sel){ return this.walk(matcher(sel)); }
+  querySelectorAll(sel){ return this.all(matcher(sel)); }
+  closest(sel){ const m=matcher(sel); let n=this; while(n){ if(m(n)) return n; n=n.parentNode; } return null; }
+  getBoundingClientRect(){ return {height:1000, width:1000, top:0, left:0}; }
+  focus(){} blur(){}
+  cloneNode(deep){ const e=new Element(this.tagName); e._className=this._className; e._html=this._html; e._text=this._text; Object.assign(e.attributes,this.attributes); if(deep) this.childNodes.forEach(c=>e.appendChild(c.cloneNode(true))); return e; }
+}
+class Text extends Element { constructor(t){ super('#text'); this._text=t; } }
+function matcher(sel){
+  if(sel === '*') return n=>n.tagName !== undefined;
+  if(sel.startsWith('#')) return n=>n.id===sel.slice(1);
+  if(sel.startsWith('.')) return n=>n.classList && n.classList.contains(sel.slice(1));
+  if(sel.startsWith('[')){ const m=sel.match(/\[([\w-]+)(?:="?([^"\]]*)"?)?\]/); return n=>n.attributes && (m[2]===undefined ? m[1] in n.attributes : n.attributes[m[1]]===m[2]); }
+  return n=>n.tagName===sel.toUpperCase();
+}
+export function install(){
+  const body = new Element('body');
+  const doc = {
+    body, documentElement: body, readyState:'complete', listeners:{},
+    createElement:(t)=>new Element(t),
+    createElementNS:(ns,t)=>new Element(t),
+    createTextNode:(t)=>new Text(t),
+    createDocumentFragment:()=>{ const f=new Element('#fragment'); f.isFragment=true; return f; },
+    getElementById:(id)=>body.walk(n=>n.id===id),
+    querySelector:(s)=>body.querySelector(s),
+    querySelectorAll:(s)=>body.querySelectorAll(s),
+    addEventListener(t,f){ (this.listeners[t]=this.listeners[t]||[]).push(f); },
+    removeEventListener(){},
+    visibilityState:'visible',
+  };
+  const store = new Map();
+  const localStorage = { getItem:k=>store.has(k)?store.get(k):null, setItem:(k,v)=>{ counters.storageWrites=(counters.storageWrites||0)+1; store.set(k,String(v)); }, removeItem:k=>store.delete(k), key:i=>[...store.keys()][i]??null, get length(){ return store.size; }, clear:()=>store.clear() };
+  const posted = [];
+  const win = { listeners:{}, addEventListener(t,f){ (this.listeners[t]=this.listeners[t]||[]).push(f); }, removeEventListener(){},
+    dispatch(t,e){ (this.listeners[t]||[]).forEach(f=>f(e)); },
+    parent:{ postMessage:(m)=>posted.push(JSON.parse(JSON.stringify(m))) }, location:{search:'', href:'http://localhost/index.html'} };
+  Object.assign(globalThis, { document:doc, window:win, localStorage, confirm:()=>true,
+    ResizeObserver: class { observe(){} disconnect(){} },
+    requestAnimationFrame:(f)=>setTimeout(()=>f(performance.now()),0),
+    cancelAnimationFrame:(h)=>clearTimeout(h), cancelIdleCallback:(h)=>clearTimeout(h),
+    requestIdleCallback:(f)=>setTimeout(()=>f({timeRemaining:()=>10, didTimeout:false}),0),
+    HTMLElement: Element });
+  win.localStorage = localStorage; win.document = doc;
+  const mk=(tag,id,cls,parent=body)=>{ const e=new Element(tag); if(id) e.id=id; if(cls) e.className=cls; parent.appendChild(e); return e; };
+  const c = mk('div',null,'container');
+  mk('div','weekRow','week-row',c); mk('div','bulkRow','bulk-row',c); mk('div','grid','grid',c);
+  const sum = mk('div','summary','summary',c);
+  for(const id of ['curWeekVal','sunTotalVal','wdTotalVal','grandVal']) mk('div',id,'val',sum);
+  mk('div','suggestions','suggestions',sum);
+  mk('button','undoBtn','history-btn',sum); mk('button','redoBtn','history-btn',sum);
+  mk('button','resetBtn','reset-btn',sum);
+  return { doc, win, posted, storage:store, counters };
+}
@@ -0,0 +1,350 @@
+"""Concurrent-session load test of ``app.py`` over Streamlit's websocket.
+
+Starts ``streamlit run app.py`` on localhost (or uses ``--url``) and
+connects many headless clients to it. Each client speaks the same
+protocol a browser tab does: ``BackMsg`` reruns carrying the component's
+value, and ``ForwardMsg`` answers up to ``script_finished``.
+
+Each client replays the values ``frontend/bridge.js`` sends while a user
+edits, at random think times:
+
+* ``select``: a meal choice changes;
+* ``price``: a slot is switched to custom, then its price is typed one
+  keystroke at a time, and every keystroke is sent;
+* ``week``: the selected week changes;
+* ``reset``: a full snapshot of a fresh plan is sent.
+
+The client answers the server's args the way the bridge does. When
+patches arrive, it reports again; a new plan version alone is kept for
+the next report. These follow-up reruns are counted as ``ack``.
+
+    python tools/load_test_app.py --sessions 40 --edits 60 --think 0.5
+    python tools/load_test_app.py --tabs 2 --out run.json --baseline before.json
+
+The report gives the following:
+
+* rerun latency p50/p99 overall and per kind, measured at the client;
+* the server's CPU seconds per rerun;
+* the server's RSS per open session and its growth while editing;
+* a rough ``sessions_per_core``: how many sessions at this edit rate keep
+  one server core busy.
+
+CPU and RSS are read from ``/proc``, so they need Linux and either a
+server started here or its ``--pid``. The workload is fixed by ``--seed``
+so runs can be compared. ``--baseline`` prints the change against an
+earlier ``--out`` report.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from mealsync import catalog, plan  # noqa: E402
+
+KINDS = ("select", "price", "week", "reset")
+WEIGHTS = (0.6, 0.2, 0.17, 0.03)
+FOLLOW_UPS = 3  # follow-up reports per change before giving up
+
+
+class ServerStats:
+    """CPU seconds and RSS of a local process, from ``/proc``."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.tick = os.sysconf("SC_CLK_TCK")
+        self.page = os.sysconf("SC_PAGE_SIZE")
+
+    def cpu(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self.tick  # utime + stime
+
+    def rss(self):
+        with open(f"/proc/{self.pid}/statm") as f:
+            return int(f.read().split()[1]) * self.page
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, db, timeout=60):
+    """``streamlit run app.py`` on ``port`` with its own plan database."""
+    env = {**os.environ, "MEALSYNC_DB": db}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", str(ROOT / "app.py"), "--server.headless", "true",
+         "--server.port", str(port), "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"streamlit exited with {proc.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise SystemExit("streamlit did not come up")
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def edit_stream(rng, weeks, edits):
+    """``(kind, [value, ...])`` for one session: deltas or ``("full", plan)``."""
+    menu = catalog.current().menu
+    for _ in range(edits):
+        kind = rng.choices(KINDS, WEIGHTS)[0]
+        w, d = rng.randint(1, weeks), rng.randint(0, 5)
+        meal = rng.choice(catalog.MEAL_TYPES)
+        if kind == "select":
+            item = rng.choice(menu[meal])["id"]
+            yield kind, [{"weeks": {str(w): {f"sel-{w}-{d}-{meal}": item}}}]
+        elif kind == "price":
+            typed = f"{rng.randint(20, 400)}.{rng.randint(0, 9)}"
+            key = f"price-{w}-{d}-{meal}"
+            changes = [{"weeks": {str(w): {f"sel-{w}-{d}-{meal}": "custom", key: "0"}}}]
+            changes += [{"weeks": {str(w): {key: typed[:i]}}} for i in range(1, len(typed) + 1)]
+            yield kind, changes
+        elif kind == "week":
+            yield kind, [{"selectedWeek": w}]
+        else:
+            yield kind, [("full", plan.new_state(weeks))]
+
+
+class Page:
+    """One headless browser tab: a websocket session and its bridge state."""
+
+    def __init__(self, url, index, user, weeks):
+        self.url = url
+        self.query = f"user={user}&weeks={weeks}"
+        self.weeks = weeks
+        self.sid = f"load{index}"
+        self.seq = 0
+        self.push_ack = 0
+        self.base = 0
+        self.catalog_version = None
+        self.widget = None  # component element id, known after the first run
+        self.page_hash = ""
+        self.ws = None
+        self.timings = []  # (kind, seconds)
+        self.errors = 0
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        await self.ws.close()
+
+    async def _rerun(self, kind, value=None):
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.query_string = self.query
+        state.page_script_hash = self.page_hash
+        if value is not None:
+            widget = state.widget_states.widgets.add()
+            widget.id = self.widget
+            widget.json_value = json.dumps(value)
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        args = None
+        while True:
+            reply = ForwardMsg()
+            reply.ParseFromString(await self.ws.recv())
+            which = reply.WhichOneof("type")
+            if which == "new_session":
+                self.page_hash = reply.new_session.main_script_hash
+            elif which == "delta" and reply.delta.WhichOneof("type") == "new_element":
+                element = reply.delta.new_element
+                if element.WhichOneof("type") == "component_instance":
+                    self.widget = element.component_instance.id
+                    args = json.loads(element.component_instance.json_args)
+                elif element.WhichOneof("type") == "exception":
+                    self.errors += 1
+            elif which == "script_finished":
+                break
+        if kind:
+            self.timings.append((kind, time.perf_counter() - t0))
+        return args or {}
+
+    def _value(self, change=None):
+        value = {"sid": self.sid, "seq": self.seq, "pushAck": self.push_ack, "base": self.base,
+                 "catalogVersion": self.catalog_version}
+        if isinstance(change, tuple):
+            value["full"] = change[1]
+        else:
+            value["delta"] = change or {}
+        return value
+
+    def _answer(self, args):
+        """Fold the server's args in like the bridge; True if it reports again."""
+        changed = False
+        if args.get("catalog"):
+            self.catalog_version = args["catalog"]["version"]
+        patches = [p for p in args.get("patches") or [] if p["seq"] > self.push_ack]
+        if patches:
+            self.push_ack = patches[-1]["seq"]
+            changed = True
+        if args.get("sid") == self.sid and args.get("version"):
+            self.base = args["version"]
+        return changed
+
+    async def send(self, kind, change):
+        """Report one change, then the follow-up values its answer causes."""
+        self.seq += 1
+        args = await self._rerun(kind, self._value(change))
+        for _ in range(FOLLOW_UPS):
+            if not self._answer(args):
+                break
+            args = await self._rerun("ack", self._value())
+
+    async def open(self):
+        """Load the page; the browser then reports its whole plan."""
+        await self.connect()
+        self._answer(await self._rerun(None))
+        await self.send("load", ("full", plan.new_state(self.weeks)))
+
+
+async def drive(page, stream, think, rng):
+    for kind, changes in stream:
+        await asyncio.sleep(rng.expovariate(1 / think) if think else 0)
+        for change in changes:
+            await page.send(kind, change)
+
+
+def summarize(timings):
+    return {
+        "reruns": len(timings),
+        "p50_ms": round(percentile(timings, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 2),
+        "max_ms": round(max(timings, default=0.0) * 1000, 2),
+    }
+
+
+def compare(report, baseline):
+    """Relative change of the headline numbers against an earlier report."""
+    rows = {key: (baseline["latency"][key], report["latency"][key]) for key in ("p50_ms", "p99_ms")}
+    for key in ("cpu_ms_per_rerun", "rss_kb_per_session", "sessions_per_core"):
+        rows[key] = (baseline.get(key), report.get(key))
+    return {key: {"before": a, "after": b, "change": f"{(b - a) / a:+.1%}" if a and b is not None else None}
+            for key, (a, b) in rows.items()}
+
+
+async def load(args, stats):
+    url = args.url.rstrip("/").replace("http", "ws", 1) + "/_stcore/stream"
+    # Warm the server's shared parts so they are not billed to the sessions.
+    warm = Page(url, -1, "load-warm", args.weeks)
+    await warm.open()
+    await drive(warm, edit_stream(random.Random(-args.seed), args.weeks, 5), 0, random.Random(0))
+    await warm.close()
+
+    sample = {"rss0": stats.rss() if stats else None}
+    pages = [Page(url, i, f"load{i // args.tabs}", args.weeks) for i in range(args.sessions)]
+    for i in range(0, len(pages), 16):
+        await asyncio.gather(*(page.open() for page in pages[i:i + 16]))
+    streams = [list(edit_stream(random.Random(args.seed * 100003 + i), args.weeks, args.edits))
+               for i in range(args.sessions)]
+
+    if stats:
+        sample.update(rss_open=stats.rss(), cpu0=stats.cpu())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(drive(page, stream, args.think, random.Random(args.seed + i))
+                           for i, (page, stream) in enumerate(zip(pages, streams))))
+    sample["wall"] = time.perf_counter() - t0
+    if stats:
+        sample.update(rss_end=stats.rss(), cpu=stats.cpu() - sample["cpu0"])
+    for page in pages:
+        await page.close()
+    return pages, sample
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--tabs", type=int, default=1, help="sessions per user")
+    parser.add_argument("--weeks", type=int, default=catalog.WEEKS)
+    parser.add_argument("--edits", type=int, default=60, help="edits per session")
+    parser.add_argument("--think", type=float, default=0.5, help="mean seconds between edits")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", help="a running app (default: start one on a free port)")
+    parser.add_argument("--pid", type=int, help="server process for CPU/RSS with --url")
+    parser.add_argument("--out", help="also write the report here")
+    parser.add_argument("--baseline", help="earlier --out report to compare against")
+    args = parser.parse_args(argv)
+
+    server = tmp = None
+    if not args.url:
+        tmp = tempfile.TemporaryDirectory()
+        port = free_port()
+        server = start_server(port, os.path.join(tmp.name, "load.db"))
+        args.url, args.pid = f"http://127.0.0.1:{port}", server.pid
+    stats = ServerStats(args.pid) if args.pid and os.path.exists(f"/proc/{args.pid}") else None
+    try:
+        pages, sample = asyncio.run(load(args, stats))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+            tmp.cleanup()
+
+    timings = [(kind, s) for page in pages for kind, s in page.timings if kind != "load"]
+    reruns, wall = len(timings), sample["wall"]
+    report = {
+        "sessions": args.sessions,
+        "users": -(-args.sessions // args.tabs),
+        "weeks": args.weeks,
+        "edits_per_session": args.edits,
+        "think_s": args.think,
+        "seed": args.seed,
+        "wall_s": round(wall, 2),
+        "reruns_per_s": round(reruns / wall, 1) if wall else None,
+        "errors": sum(page.errors for page in pages),
+        "latency": summarize([s for _, s in timings]),
+        "by_kind": {kind: summarize([s for k, s in timings if k == kind])
+                    for kind in KINDS + ("ack",) if any(k == kind for k, _ in timings)},
+    }
+    if stats:
+        cpu_per_rerun = sample["cpu"] / reruns if reruns else 0.0
+        # Reruns one session causes per second at this think time.
+        session_rate = reruns / wall / args.sessions if wall else 0.0
+        report.update({
+            "cpu_s": round(sample["cpu"], 2),
+            "cpu_utilization": round(sample["cpu"] / wall, 2) if wall else None,
+            "cpu_ms_per_rerun": round(cpu_per_rerun * 1000, 3),
+            "rss_kb_per_session": round((sample["rss_open"] - sample["rss0"]) / args.sessions / 1024, 1),
+            "rss_kb_growth_per_session": round((sample["rss_end"] - sample["rss_open"]) / args.sessions / 1024, 1),
+            "rss_total_mb": round(sample["rss_end"] / 2**20, 1),
+            "sessions_per_core": round(1 / (cpu_per_rerun * session_rate), 1) if cpu_per_rerun and session_rate else None,
+        })
+    if args.baseline:
+        report["baseline"] = compare(report, json.loads(Path(args.baseline).read_text()))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Load test for :class:`mealsync.store.PlanStore` against a temp DB file.
+
+Simulates many concurrent sessions, each journaling every edit (the way
+the component does) and occasionally reloading its plan, then checks
+that every user's final plan made it to disk.
+
+    python tools/load_test_store.py --sessions 300 --edits 50
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from mealsync import catalog, codec, plan  # noqa: E402
+from mealsync.store import PlanStore  # noqa: E402
+
+
+def random_edit(rng):
+    w = rng.randint(1, catalog.WEEKS)
+    d = rng.randint(0, 5)
+    meal = rng.choice(catalog.MEAL_TYPES)
+    item = rng.choice(catalog.current().menu[meal])["id"]
+    return {"weeks": {str(w): {f"sel-{w}-{d}-{meal}": item}}}
+
+
+def session(store, user, edits, rng, latencies, errors, finals, barrier):
+    state = plan.new_state()
+    barrier.wait()
+    for i in range(edits):
+        delta = random_edit(rng)
+        plan.apply_delta(state, delta)
+        t0 = time.perf_counter()
+        try:
+            store.record(user, delta, state)
+            if i % 10 == 0:
+                store.load(user)
+        except Exception as exc:  # the point is to count these
+            errors.append(repr(exc))
+        latencies.append(time.perf_counter() - t0)
+    finals[user] = state
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--edits", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PlanStore(Path(tmp) / "load.db", pool_size=args.pool_size)
+        latencies, errors, finals = [], [], {}
+        barrier = threading.Barrier(args.sessions)
+        threads = [
+            threading.Thread(
+                target=session,
+                args=(store, f"user-{i}", args.edits, random.Random(args.seed + i), latencies, errors, finals, barrier),
+            )
+            for i in range(args.sessions)
+        ]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        store.flush()
+        elapsed = time.perf_counter() - t0
+
+        store.close()
+        # Reopen so the check reads snapshot plus journal from disk only.
+        reopened = PlanStore(Path(tmp) / "load.db")
+        mismatched = 0
+        for user, state in finals.items():
+            stored = reopened.load(user)
+            if stored is None or codec.decode(codec.encode(stored))["weeks"] != codec.decode(codec.encode(state))["weeks"]:
+                mismatched += 1
+        reopened.close()
+
+    saves = args.sessions * args.edits
+    report = {
+        "sessions": args.sessions,
+        "saves": saves,
+        "seconds": round(elapsed, 3),
+        "saves_per_second": round(saves / elapsed, 1),
+        "save_p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "save_p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "batches": store.stats["batches"],
+        "rows_written": store.stats["rows_written"],
+        "snapshots": store.stats["saves"],
+        "errors": len(errors),
+        "mismatched_users": mismatched,
+    }
+    print(json.dumps(report, indent=2))
+    return 1 if errors or mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
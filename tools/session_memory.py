@@ -0,0 +1,128 @@
+"""Memory cost of each additional session.
+
+Builds up sessions the way the app holds them: a :class:`PlanSync` that
+received the browser's full plan and then a stream of edit deltas.  RSS
+and traced Python allocations are sampled as sessions are added; the
+report gives the bytes each additional session costs (slope of a
+least-squares fit).
+
+    python tools/session_memory.py --sessions 400 --weeks 4 --edits 30
+    python tools/session_memory.py --apptest --sessions 50
+
+``--apptest`` runs every session as a real ``AppTest`` of ``app.py``
+instead, which includes Streamlit's own per-session overhead.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from mealsync import catalog, plan  # noqa: E402
+from mealsync.component import PlanSync  # noqa: E402
+
+
+def rss_bytes():
+    """Current resident set size (Linux), else peak RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def random_edit(rng, weeks):
+    w, d = rng.randint(1, weeks), rng.randint(0, 5)
+    meal = rng.choice(catalog.MEAL_TYPES)
+    item = rng.choice(catalog.current().menu[meal])["id"]
+    return {"weeks": {str(w): {f"sel-{w}-{d}-{meal}": item}}}
+
+
+def sync_session(i, weeks, edits, rng):
+    sync = PlanSync()
+    sync.receive({"sid": f"s{i}", "seq": 1, "pushAck": 0, "full": plan.new_state(weeks)})
+    for seq in range(2, edits + 2):
+        sync.receive({"sid": f"s{i}", "seq": seq, "pushAck": 0, "delta": random_edit(rng, weeks)})
+    return sync
+
+
+def apptest_session(i, weeks, edits, rng):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=60)
+    at.query_params["weeks"] = str(weeks)
+    version = catalog.current().version
+    at.session_state["mealsync"] = {"sid": f"s{i}", "seq": 1, "pushAck": 0, "catalogVersion": version,
+                                    "full": plan.new_state(weeks)}
+    at.run()
+    for seq in range(2, edits + 2):
+        at.session_state["mealsync"] = {"sid": f"s{i}", "seq": seq, "pushAck": 0, "catalogVersion": version,
+                                        "delta": random_edit(rng, weeks)}
+        at.run()
+    return at
+
+
+def slope(xs, ys):
+    n = len(xs)
+    mx, my = sum(xs) / n, sum(ys) / n
+    var = sum((x - mx) ** 2 for x in xs)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var if var else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=400)
+    parser.add_argument("--weeks", type=int, default=catalog.WEEKS)
+    parser.add_argument("--edits", type=int, default=30)
+    parser.add_argument("--samples", type=int, default=8)
+    parser.add_argument("--apptest", action="store_true", help="use real AppTest sessions")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    make = apptest_session if args.apptest else sync_session
+    rng = random.Random(args.seed)
+    # Warm the shared, per-process parts so they are not billed to session 1.
+    warm = make(-1, args.weeks, 1, rng)
+    del warm
+    gc.collect()
+
+    tracemalloc.start()
+    sessions, counts, rss, traced = [], [], [], []
+    step = max(1, args.sessions // args.samples)
+    for i in range(args.sessions + 1):
+        if i % step == 0:
+            gc.collect()
+            counts.append(len(sessions))
+            rss.append(rss_bytes())
+            traced.append(tracemalloc.get_traced_memory()[0])
+        if i < args.sessions:
+            sessions.append(make(i, args.weeks, args.edits, rng))
+    tracemalloc.stop()
+
+    report = {
+        "mode": "apptest" if args.apptest else "plan_sync",
+        "sessions": len(sessions),
+        "weeks": args.weeks,
+        "edits_per_session": args.edits,
+        "rss_bytes_per_session": round(slope(counts, rss)),
+        "python_bytes_per_session": round(slope(counts, traced)),
+        "rss_total_mb": round(rss[-1] / 2**20, 1),
+        "samples": [{"sessions": c, "rss_mb": round(r / 2**20, 2), "traced_kb": round(t / 1024, 1)}
+                    for c, r, t in zip(counts, rss, traced)],
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())